@@ -1,13 +1,20 @@
 # backend/app.py
-from flask import Flask, request, jsonify
+import time
+_APP_IMPORT_STARTED_AT = time.perf_counter()
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import uuid
 import os
 import logging
 import asyncio
+import multiprocessing
+import queue
 import sys
+import threading
 from werkzeug.utils import secure_filename
 import datetime
+import functools
+import hmac
 import json 
 
 # --- Logging Configuration ---
@@ -21,15 +28,28 @@ log = logging.getLogger(__name__)
 
 # --- Import Core Chatbot Logic and Utilities ---
 try:
-    from chatbot_core import initialize_chatbot_core, process_user_turn
-    from groq_api import call_groq_llm_final_answer_lc as call_groq_llm_general_purpose 
+    from chatbot_core import process_user_turn, request_knowledge_base_reload, get_knowledge_base_status
     from session_manager import ChatSession 
+    from retrieval_executor import retrieval_executor
+    from translation_cache import translation_cache
+    from message_catalog import get_message
+    from turn_trace import get_turn_stats
+    from turn_events import emit_event, turn_event_sink
+    from llm_scheduler import llm_scheduler
+    from semantic_cache import semantic_answer_cache
+    from follow_up_classifier import get_follow_up_stats
+    from intent_classifier import local_intent_classifier
+    from conversation_memory import memory_compactor
+    from llm_metrics import llm_metrics
+    from core_startup import CORE_STARTUP_MODE, get_startup_report, is_ready, record_phase, run_startup, start_background_startup
     # from pdf_utils import extract_text_from_pdf # PDF DISABLED
 except ImportError as e:
     log.critical(f"CRITICAL_IMPORT_ERROR: Failed to import core modules: {e}.", exc_info=True)
     print(f"CRITICAL_IMPORT_ERROR: {e}. Exiting.", file=sys.stderr)
     sys.exit(1)
 
+record_phase("imports", time.perf_counter() - _APP_IMPORT_STARTED_AT)
+
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
 log.info("CORS configured to allow http://localhost:3000 for /api/* routes with credentials support.")
@@ -37,6 +57,9 @@ log.info("CORS configured to allow http://localhost:3000 for /api/* routes with
 SESSIONS: dict[str, ChatSession] = {} 
 log.info(f"APP_STARTUP: In-memory SESSIONS dictionary initialized (ID: {id(SESSIONS)}).")
 
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN") # Admin endpoints are disabled unless this is set
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15")) # Keeps proxies from closing a quiet stream
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads_temp')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -45,13 +68,27 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
 log.info(f"Temporary upload folder set to: {UPLOAD_FOLDER}")
 
 
-if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug:
-    log.info("APP_INIT: Main process or production mode. Initializing chatbot core...")
-    if not initialize_chatbot_core():
-        log.critical("APP_INIT_FATAL: Chatbot core system initialization FAILED.")
-        sys.exit(1) 
+# Encoder worker processes (parallel_encoder.py) are spawned and re-import this module; they must not start the app.
+if (os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug) and multiprocessing.parent_process() is None:
+    if CORE_STARTUP_MODE == "blocking":
+        log.info("APP_INIT: Main process or production mode. Initializing chatbot core...")
+        if not run_startup():
+            log.critical("APP_INIT_FATAL: Chatbot core system initialization FAILED.")
+            sys.exit(1) 
+        else:
+            log.info("APP_INIT: Chatbot core system initialized successfully.")
     else:
-        log.info("APP_INIT: Chatbot core system initialized successfully.")
+        log.info("APP_INIT: Main process or production mode. Initializing chatbot core in the background (see /readyz).")
+        start_background_startup()
+
+@app.route('/healthz', methods=['GET'])
+def healthz_route():
+    return jsonify({"status": "alive"}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readyz_route():
+    report = get_startup_report()
+    return jsonify(report), 200 if is_ready() else 503
 
 @app.route('/api/new_chat', methods=['POST'])
 def new_chat_route():
@@ -162,35 +199,19 @@ async def chat_route():
 
                 if filename.lower().endswith(".pdf"):
                     log.warning(f"API_CHAT: PDF processing for '{filename}' is currently disabled.")
-                    pdf_disabled_ack_context = (
-                        f"The PDF document '{filename}' was received, but PDF processing is currently disabled. "
-                        f"I cannot analyze its content at this time."
-                    )
-                    pdf_disabled_ack_msg = await call_groq_llm_general_purpose(
-                        pdf_disabled_ack_context,
-                        session.current_language_name, session.last_detected_dialect_info,
-                        memory_messages=session.get_lc_memory_messages(),
-                    ) or f"PDF '{filename}' received, but processing is disabled."
+                    pdf_disabled_ack_msg = get_message("pdf_processing_disabled", session.current_language,
+                                                       session.last_detected_dialect_info, filename=filename)
                     session.add_to_history("system", pdf_disabled_ack_msg)
                     if not input_for_core: input_for_core = pdf_disabled_ack_msg
                 else: 
-                    non_pdf_ack_context = (
-                        f"The file '{filename}' was received. "
-                        f"I am currently set up to acknowledge non-PDF files but not process their content deeply."
-                    )
-                    ack_msg_localized = await call_groq_llm_general_purpose(
-                        non_pdf_ack_context, session.current_language_name, 
-                        session.last_detected_dialect_info, memory_messages=session.get_lc_memory_messages(),
-                    ) or non_pdf_ack_context 
+                    ack_msg_localized = get_message("file_received", session.current_language,
+                                                    session.last_detected_dialect_info, filename=filename)
                     session.add_to_history("system", ack_msg_localized)
                     if not input_for_core: input_for_core = ack_msg_localized
             except Exception as e_file:
                 log.error(f"API_CHAT: Error during file upload for '{filename}': {e_file}", exc_info=True)
-                err_file_ctx = f"An error occurred while handling the uploaded file '{filename}'. Please try again."
-                error_response_localized = await call_groq_llm_general_purpose(
-                    err_file_ctx, session.current_language_name, 
-                    session.last_detected_dialect_info, memory_messages=session.get_lc_memory_messages(),
-                ) or err_file_ctx 
+                error_response_localized = get_message("file_upload_error", session.current_language,
+                                                       session.last_detected_dialect_info, filename=filename)
                 session.add_to_history("assistant", error_response_localized)
                 return jsonify({"reply": error_response_localized, "sessionId": session_id_from_request, 
                                 "languageCode": session.current_language, "languageName": session.current_language_name,
@@ -202,11 +223,7 @@ async def chat_route():
 
     if not input_for_core: 
         log.warning(f"API_CHAT: No effective text input after file processing. Session: {session_id_from_request}.")
-        empty_input_ctx = "It seems your message was empty or only contained a file I couldn't turn into a query. How can I help you today?"
-        final_bot_reply_localized = await call_groq_llm_general_purpose(
-            empty_input_ctx, session.current_language_name, 
-            session.last_detected_dialect_info, memory_messages=session.get_lc_memory_messages(),
-        ) or "How can I help you?" 
+        final_bot_reply_localized = get_message("empty_input", session.current_language, session.last_detected_dialect_info)
         session.add_to_history("assistant", final_bot_reply_localized)
         return jsonify({"reply": final_bot_reply_localized, "sessionId": session_id_from_request, 
                         "languageCode": session.current_language, "languageName": session.current_language_name,
@@ -220,11 +237,7 @@ async def chat_route():
             session.add_to_history("assistant", final_bot_reply) 
         else: 
             log.error(f"API_CHAT: Core processing returned empty. Session: {session_id_from_request}.")
-            fallback_err_ctx = "I'm having trouble formulating a response. Please try rephrasing."
-            final_bot_reply = await call_groq_llm_general_purpose(
-                fallback_err_ctx, session.current_language_name, 
-                session.last_detected_dialect_info, memory_messages=session.get_lc_memory_messages(),
-            ) or fallback_err_ctx 
+            final_bot_reply = get_message("empty_core_reply", session.current_language, session.last_detected_dialect_info)
             session.add_to_history("assistant", final_bot_reply)
 
         log.info(f"API_CHAT: Sess {session_id_from_request} - Reply Lang: {session.current_language_name}, Reply: '{(str(final_bot_reply)[:100])}'")
@@ -237,18 +250,8 @@ async def chat_route():
     except Exception as e_core: 
         log.error(f"API_CHAT: Exception in process_user_turn. Session {session_id_from_request}: {e_core}", exc_info=True)
         user_input_preview = (str(user_message_text)[:30] + '...') if user_message_text else 'your request'
-        # Corrected f-string:
-        core_error_ctx = f"An unexpected error occurred processing your request ('{user_input_preview}'). Please try again."
-        
-        error_reply_localized = "An unexpected internal error occurred. Please try again later." 
-        try:
-            error_reply_localized = await call_groq_llm_general_purpose(
-                core_error_ctx, session.current_language_name, 
-                session.last_detected_dialect_info, memory_messages=session.get_lc_memory_messages(),
-            ) or core_error_ctx # Use the English context if LLM fails for localization
-        except Exception as e_llm_err:
-            log.error(f"API_CHAT: Further exception localizing core error message: {e_llm_err}", exc_info=True)
-            # error_reply_localized remains the hardcoded one
+        error_reply_localized = get_message("core_error", session.current_language,
+                                            session.last_detected_dialect_info, input_preview=user_input_preview)
         
         session.add_to_history("assistant", error_reply_localized) 
         return jsonify({
@@ -259,6 +262,94 @@ async def chat_route():
         }), 500
 
 
+def _reply_payload(session: ChatSession, session_id: str, reply: str) -> dict:
+    return {
+        "reply": reply, "sessionId": session_id,
+        "languageCode": session.current_language, "languageName": session.current_language_name,
+        "activeTVModel": session.active_tv_model, "recognizedTVModels": session.recognized_tv_models
+    }
+
+def _sse_frame(event_type: str, payload: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+async def _run_streamed_turn(session: ChatSession, session_id: str, input_for_core: str, user_message_text: str | None, sink) -> None:
+    # Same history bookkeeping as chat_route(), with the reply delivered as a "done" (or "error") event.
+    with turn_event_sink(sink):
+        try:
+            final_bot_reply = await process_user_turn(session, input_for_core)
+            if final_bot_reply:
+                session.add_to_history("assistant", final_bot_reply)
+            else:
+                log.error(f"API_CHAT_STREAM: Core processing returned empty. Session: {session_id}.")
+                final_bot_reply = get_message("empty_core_reply", session.current_language, session.last_detected_dialect_info)
+                session.add_to_history("assistant", final_bot_reply)
+            log.info(f"API_CHAT_STREAM: Sess {session_id} - Reply Lang: {session.current_language_name}, Reply: '{(str(final_bot_reply)[:100])}'")
+            emit_event("done", **_reply_payload(session, session_id, final_bot_reply))
+        except Exception as e_core:
+            log.error(f"API_CHAT_STREAM: Exception in process_user_turn. Session {session_id}: {e_core}", exc_info=True)
+            user_input_preview = (str(user_message_text)[:30] + '...') if user_message_text else 'your request'
+            error_reply_localized = get_message("core_error", session.current_language,
+                                                session.last_detected_dialect_info, input_preview=user_input_preview)
+            session.add_to_history("assistant", error_reply_localized)
+            emit_event("error", error_detail="Core processing error.", **_reply_payload(session, session_id, error_reply_localized))
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream_route():
+    """
+    Server-Sent Events variant of /api/chat (JSON bodies only; file uploads stay on /api/chat).
+    Events: "stage" ({"stage": name}) as the pipeline progresses, "token" ({"text": chunk}) while the
+    final answer is generated, then exactly one "done" (same fields as /api/chat's JSON reply) or
+    "error". "done" carries the authoritative reply; streamed tokens are only a preview of it.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        log.error("API_CHAT_STREAM: Missing or invalid JSON body.")
+        return jsonify({"error": "Invalid JSON format.", "reply": "Could not understand request (malformed JSON)."}), 400
+    session_id_from_request = data.get('sessionId')
+    user_message_text = data.get('message')
+    if not session_id_from_request:
+        return jsonify({"error": "Session ID is required.", "reply": "Your session ID is missing."}), 400
+    session = SESSIONS.get(session_id_from_request)
+    if not session:
+        log.error(f"API_CHAT_STREAM: Invalid session ID: '{session_id_from_request}'.")
+        return jsonify({"error": "Invalid session ID.", "reply": "Your session is invalid. Please start a new chat."}), 400
+
+    session.set_language(data.get('language', 'en'))
+    if user_message_text and user_message_text.strip():
+        session.add_to_history("user", user_message_text)
+    input_for_core = user_message_text.strip() if user_message_text and user_message_text.strip() else ""
+
+    events: queue.Queue = queue.Queue()
+    if not input_for_core:
+        final_bot_reply_localized = get_message("empty_input", session.current_language, session.last_detected_dialect_info)
+        session.add_to_history("assistant", final_bot_reply_localized)
+        events.put({"type": "done", **_reply_payload(session, session_id_from_request, final_bot_reply_localized)})
+        events.put(None)
+    else:
+        # The turn runs on its own thread and event loop, so a client that disconnects early does not cut it short.
+        def run_turn():
+            try:
+                asyncio.run(_run_streamed_turn(session, session_id_from_request, input_for_core, user_message_text, events.put))
+            finally:
+                events.put(None)
+        threading.Thread(target=run_turn, name=f"chat-stream-{session_id_from_request[:8]}", daemon=True).start()
+
+    def generate():
+        while True:
+            try:
+                event = events.get(timeout=SSE_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            event_type = event.pop("type")
+            yield _sse_frame(event_type, event)
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @app.route('/api/chat_history', methods=['GET'])
 def get_chat_history_route():
     try:
@@ -322,13 +413,59 @@ def get_chat_session_route(session_id: str):
         log.error(f"API_SESSION: Error loading session {session_id}: {e}", exc_info=True)
         return jsonify({"error": f"Failed to load session {session_id}."}), 500
 
+def _is_admin_request() -> bool:
+    return bool(ADMIN_API_TOKEN) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_API_TOKEN)
+
+def require_admin(view):
+    """Rejects the request with 403 unless it carries the admin token."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _is_admin_request():
+            log.warning(f"API_ADMIN: Rejected {request.method} {request.path} (missing or invalid admin token).")
+            return jsonify({"error": "Forbidden."}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+# GET /api/admin/<name> -> JSON stats. New components register one line here instead of another route.
+ADMIN_STATUS_PROVIDERS = {
+    "knowledge_base_status": get_knowledge_base_status,
+    "retrieval_status": retrieval_executor.stats,
+    "translation_cache_status": translation_cache.stats,
+    "turn_stats": get_turn_stats,
+    "llm_scheduler_status": llm_scheduler.stats,
+    "semantic_cache_status": semantic_answer_cache.stats,
+    "follow_up_classifier_status": get_follow_up_stats,
+    "intent_classifier_status": local_intent_classifier.stats,
+    "memory_status": memory_compactor.stats,
+    "llm_metrics": llm_metrics.stats,
+}
+
+@app.route('/api/admin/reload_knowledge_base', methods=['POST'])
+@require_admin
+def reload_knowledge_base_route():
+    started = request_knowledge_base_reload(reason="admin_endpoint")
+    log.info(f"API_ADMIN: Knowledge base reload {'started' if started else 'already in progress'}.")
+    return jsonify({"started": started, "status": get_knowledge_base_status()}), 202
+
+@app.route('/api/admin/<status_name>', methods=['GET'])
+@require_admin
+def admin_status_route(status_name: str):
+    provider = ADMIN_STATUS_PROVIDERS.get(status_name)
+    if provider is None:
+        return jsonify({"error": f"Unknown status '{status_name}'.", "available": sorted(ADMIN_STATUS_PROVIDERS)}), 404
+    if status_name == "llm_metrics" and request.args.get("format") == "prometheus":
+        return Response(llm_metrics.prometheus(), mimetype="text/plain; version=0.0.4"), 200
+    return jsonify(provider()), 200
+
 if __name__ == '__main__':
-    if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug:
+    if (os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug) and CORE_STARTUP_MODE == "blocking":
         log.info("APP_INIT (Flask Main/Production): Initializing chatbot core...")
-        if not initialize_chatbot_core():
+        if not run_startup():
             log.critical("APP_INIT_FATAL (Flask Main/Production): Chatbot core system initialization FAILED. Exiting.")
             sys.exit(1)
         else:
             log.info("APP_INIT (Flask Main/Production): Chatbot core system initialized successfully.")
+    elif os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug:
+        start_background_startup() # No-op if the module-level block already started it
     log.info("Starting Flask backend server...")
     app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=True)
\ No newline at end of file
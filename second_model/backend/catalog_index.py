@@ -0,0 +1,100 @@
+# backend/catalog_index.py
+import logging
+import re
+from dataclasses import dataclass
+
+log = logging.getLogger(__name__)
+
+
+def catalog_model_key(model_name: str | None) -> str:
+    """Key used for model lookups: the case-insensitive comparison the handlers always did, minus stray whitespace."""
+    return (model_name or "").strip().upper()
+
+
+_MODEL_TOKEN_RE = re.compile(r"[A-Z0-9_.\-]+")
+
+
+@dataclass(frozen=True)
+class ModelRecord:
+    model: str                      # Model name as first spelled in data.json / key_components.json
+    general_images: dict | None     # First non-empty "images" entry of the model in data.json
+    component_entry: dict | None    # The model's entry in key_components.json
+    issues: tuple                   # Unique issue titles, sorted
+
+
+class ModelCatalog:
+    """
+    Per-model lookups over the flattened RAG data and the component entries, built once per
+    knowledge-base snapshot so handlers never scan either list per request.
+    """
+    def __init__(self, data: list, components_data: list):
+        names: dict[str, str] = {}
+        images: dict[str, dict] = {}
+        components: dict[str, dict] = {}
+        issues: dict[str, set] = {}
+
+        for item in data or []:
+            if not isinstance(item, dict):
+                continue
+            key = catalog_model_key(item.get("model"))
+            if not key:
+                continue
+            names.setdefault(key, item.get("model").strip())
+            if item.get("images") and key not in images:
+                images[key] = item["images"]
+            issue_title = item.get("issue")
+            if issue_title and isinstance(issue_title, str):
+                issues.setdefault(key, set()).add(issue_title.strip())
+
+        for entry in components_data or []:
+            if not isinstance(entry, dict):
+                continue
+            key = catalog_model_key(entry.get("tv_model"))
+            if key and key not in components:
+                components[key] = entry
+                names.setdefault(key, entry.get("tv_model").strip())
+
+        self._records: dict[str, ModelRecord] = {
+            key: ModelRecord(
+                model=name,
+                general_images=images.get(key),
+                component_entry=components.get(key),
+                issues=tuple(sorted(issues.get(key, ()))),
+            )
+            for key, name in names.items()
+        }
+        log.info(f"CATALOG_INDEX: Indexed {len(self._records)} models "
+                 f"({len(images)} with images, {len(components)} with component entries).")
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, model_name: str) -> bool:
+        return catalog_model_key(model_name) in self._records
+
+    def get(self, model_name: str | None) -> ModelRecord | None:
+        return self._records.get(catalog_model_key(model_name))
+
+    def find_in_text(self, text: str | None) -> str | None:
+        """Returns the first catalog model named verbatim (case-insensitively) in `text`, spelled as in the catalog."""
+        for token in _MODEL_TOKEN_RE.findall((text or "").upper()):
+            record = self._records.get(token.strip(".-_"))
+            if record:
+                return record.model
+        return None
+
+    def general_images(self, model_name: str | None) -> dict | None:
+        record = self.get(model_name)
+        return record.general_images if record else None
+
+    def component_entry(self, model_name: str | None) -> dict | None:
+        record = self.get(model_name)
+        return record.component_entry if record else None
+
+    def issues(self, model_name: str | None) -> tuple:
+        record = self.get(model_name)
+        return record.issues if record else ()
+
+
+def build_model_catalog(data: list, components_data: list) -> ModelCatalog:
+    return ModelCatalog(data, components_data)
@@ -5,19 +5,23 @@ import os
 import sys
 import json
 import re 
+import threading
+import time
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
 from langchain_core.messages import BaseMessage 
 
 try:
-    from initial_interaction_handler import handle_initial_query
+    from initial_interaction_handler import SpeculativeIntent, handle_initial_query, start_speculative_intent
     from session_flow_handler import handle_ongoing_session_turn
     
     from groq_api import (
         call_groq_llm_final_answer_lc, 
-        translate_text_lc
+        translate_text_lc,
+        translate_segments_lc
     )
-    from vector_search import load_data, create_faiss_index
+    from vector_search import load_data, load_or_create_faiss_index
     from session_manager import ChatSession 
     from language_handler import (
         detect_language_and_intent, 
@@ -26,6 +30,10 @@ try:
         translate_english_to_darija_via_service
     )
     from knowledge_handler import handle_general_knowledge_query 
+    from catalog_index import ModelCatalog, build_model_catalog
+    from message_catalog import get_message
+    from turn_trace import trace_stage, turn_trace
+    from turn_events import final_answer_stream
 except ImportError as e:
     print(f"CRITICAL IMPORT ERROR in chatbot_core.py: {e}. Application will likely fail.", file=sys.stderr)
     sys.exit(1)
@@ -36,65 +44,230 @@ DATA_FILE_NAME = os.getenv("RAG_DATA_FILE", "data.json")
 COMPONENTS_DATA_FILE_NAME = os.getenv("COMPONENTS_DATA_FILE", "key_components.json")
 IMAGE_BASE_PATH_USER_MSG = "troubleshooting/" 
 
+# How often (seconds) the data files are polled for changes; 0 disables the watcher.
+KB_WATCH_INTERVAL_SECONDS = float(os.getenv("KB_WATCH_INTERVAL_SECONDS", "0"))
+
+@dataclass(frozen=True)
+class KnowledgeBaseSnapshot:
+    """
+    Everything retrieval needs, built together and swapped in as one object. A turn reads the
+    current snapshot once and uses it throughout, so a reload never mixes old data with a new index.
+    """
+    data: list
+    index: object
+    text_to_original_data_idx_map: list
+    components_data: list
+    model_catalog: ModelCatalog
+    version: int
+    loaded_at: float
+    data_file_mtime: float | None
+    components_file_mtime: float | None
+
+# Legacy module globals, kept in sync with the current snapshot for code that imports them.
 data_store = None
 index_store = None
 text_to_original_data_idx_map_store = None
 components_data_store: list = [] 
+model_catalog_store: ModelCatalog | None = None
 is_core_initialized = False
 
+_kb_snapshot: KnowledgeBaseSnapshot | None = None
+_kb_reload_lock = threading.Lock()
+_kb_reload_status = {"state": "idle", "reason": None, "started_at": None, "finished_at": None, "error": None, "duration_s": None}
+_kb_watcher_thread: threading.Thread | None = None
+
+def _data_file_paths() -> tuple[str, str]:
+    current_module_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(current_module_dir, DATA_FILE_NAME), os.path.join(current_module_dir, COMPONENTS_DATA_FILE_NAME)
+
+def _file_mtime(path: str) -> float | None:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def _load_components_data(components_data_file_path: str) -> list:
+    if not os.path.exists(components_data_file_path):
+        log.warning(f"Components data file '{components_data_file_path}' not found.")
+        return []
+    try:
+        with open(components_data_file_path, 'r', encoding='utf-8') as f:
+            components_data = json.load(f)
+        if not isinstance(components_data, list): components_data = []
+        log.info(f"Loaded {len(components_data)} component entries.")
+        return components_data
+    except Exception as e:
+        log.error(f"Failed to load components data: {e}", exc_info=True)
+        return []
+
+def _build_knowledge_base_snapshot(previous: KnowledgeBaseSnapshot | None = None) -> KnowledgeBaseSnapshot | None:
+    """Loads data, index and components from disk. Returns None (and logs why) if the RAG data is unusable."""
+    data_file_path, components_data_file_path = _data_file_paths()
+    if not os.path.exists(data_file_path): log.critical(f"CRITICAL: RAG data file '{data_file_path}' missing."); return None
+    data_file_mtime = _file_mtime(data_file_path)
+    components_file_mtime = _file_mtime(components_data_file_path)
+    data = load_data(data_file_path)
+    if not data: log.critical(f"CRITICAL: No RAG data loaded from {data_file_path}."); return None
+    log.info(f"Loaded {len(data)} RAG entries from {data_file_path}.")
+    index, text_to_original_data_idx_map = load_or_create_faiss_index(
+        data, data_file_path, previous_index=previous.index if previous else None
+    )
+    if not index: log.critical("CRITICAL: FAISS RAG index creation failed."); return None
+    log.info("FAISS RAG index ready.")
+    components_data = _load_components_data(components_data_file_path)
+    return KnowledgeBaseSnapshot(
+        data=data,
+        index=index,
+        text_to_original_data_idx_map=text_to_original_data_idx_map,
+        components_data=components_data,
+        model_catalog=build_model_catalog(data, components_data),
+        version=(previous.version + 1) if previous else 1,
+        loaded_at=time.time(),
+        data_file_mtime=data_file_mtime,
+        components_file_mtime=components_file_mtime,
+    )
+
+def _install_knowledge_base_snapshot(snapshot: KnowledgeBaseSnapshot) -> None:
+    global _kb_snapshot, data_store, index_store, text_to_original_data_idx_map_store, components_data_store, model_catalog_store
+    _kb_snapshot = snapshot # Single reference assignment: readers see either the old or the new snapshot
+    data_store = snapshot.data
+    index_store = snapshot.index
+    text_to_original_data_idx_map_store = snapshot.text_to_original_data_idx_map
+    components_data_store = snapshot.components_data
+    model_catalog_store = snapshot.model_catalog
+
+def get_knowledge_base_snapshot() -> KnowledgeBaseSnapshot | None:
+    return _kb_snapshot
+
 def initialize_chatbot_core():
     # ... (This function remains the same as your last full working version) ...
-    global data_store, index_store, text_to_original_data_idx_map_store, components_data_store
-    global is_core_initialized, DATA_FILE_NAME, COMPONENTS_DATA_FILE_NAME
+    global is_core_initialized
     if is_core_initialized: return True
     load_dotenv() 
     log.info("--- Initializing Chatbot Core System ---")
-    current_module_dir = os.path.dirname(os.path.abspath(__file__))
-    data_file_path = os.path.join(current_module_dir, DATA_FILE_NAME)
-    components_data_file_path = os.path.join(current_module_dir, COMPONENTS_DATA_FILE_NAME)
-    if not os.getenv("GROQ_API_KEY"): log.critical("CRITICAL: GROQ_API_KEY is not set.")
-    if not os.path.exists(data_file_path): log.critical(f"CRITICAL: RAG data file '{data_file_path}' missing."); return False
-    data_store = load_data(data_file_path)
-    if not data_store: log.critical(f"CRITICAL: No RAG data loaded from {data_file_path}."); return False
-    log.info(f"Loaded {len(data_store)} RAG entries from {data_file_path}.")
-    index_store, text_to_original_data_idx_map_store = create_faiss_index(data_store)
-    if not index_store: log.critical("CRITICAL: FAISS RAG index creation failed."); return False
-    log.info("FAISS RAG index created successfully.")
-    if os.path.exists(components_data_file_path):
-        try:
-            with open(components_data_file_path, 'r', encoding='utf-8') as f:
-                components_data_store = json.load(f)
-                if not isinstance(components_data_store, list): components_data_store = []
-            log.info(f"Loaded {len(components_data_store)} component entries.")
-        except Exception as e: log.error(f"Failed to load components data: {e}", exc_info=True); components_data_store = []
-    else: components_data_store = []; log.warning(f"Components data file '{components_data_file_path}' not found.")
+    if not os.getenv("GROQ_API_KEY") and os.getenv("LLM_PROVIDER", "groq").strip().lower() == "groq": log.critical("CRITICAL: GROQ_API_KEY is not set.")
+    snapshot = _build_knowledge_base_snapshot()
+    if snapshot is None: return False
+    _install_knowledge_base_snapshot(snapshot)
     is_core_initialized = True
+    start_knowledge_base_watcher()
     log.info("--- Chatbot Core Initialization Complete ---")
     return True
 
+def reload_knowledge_base(reason: str = "manual") -> dict:
+    """
+    Rebuilds the knowledge base from disk and swaps it in. Runs in the calling thread; requests
+    keep being served from the current snapshot meanwhile. Concurrent calls are not queued: a
+    call made while a reload is running returns immediately with state 'in_progress'.
+    """
+    if not _kb_reload_lock.acquire(blocking=False):
+        log.info(f"KB_RELOAD: Reload requested ({reason}) while another is running. Skipping.")
+        return get_knowledge_base_status()
+    try:
+        started = time.time()
+        _kb_reload_status.update({"state": "in_progress", "reason": reason, "started_at": started, "finished_at": None, "error": None, "duration_s": None})
+        log.info(f"KB_RELOAD: Rebuilding knowledge base ({reason})...")
+        previous = _kb_snapshot
+        try:
+            snapshot = _build_knowledge_base_snapshot(previous)
+        except Exception as e:
+            log.error(f"KB_RELOAD: Unexpected error rebuilding knowledge base: {e}", exc_info=True)
+            snapshot = None
+            _kb_reload_status["error"] = str(e)
+        finished = time.time()
+        if snapshot is None:
+            _kb_reload_status.update({"state": "failed", "finished_at": finished, "duration_s": finished - started,
+                                      "error": _kb_reload_status["error"] or "Knowledge base build failed; previous snapshot kept."})
+            log.error(f"KB_RELOAD: Reload failed after {finished - started:.2f}s. Still serving snapshot v{previous.version if previous else 'none'}.")
+        else:
+            _install_knowledge_base_snapshot(snapshot)
+            _kb_reload_status.update({"state": "succeeded", "finished_at": finished, "duration_s": finished - started})
+            log.info(f"KB_RELOAD: Snapshot v{snapshot.version} installed in {finished - started:.2f}s "
+                     f"({len(snapshot.data)} issues, {len(snapshot.components_data)} component entries).")
+        return get_knowledge_base_status()
+    finally:
+        _kb_reload_lock.release()
+
+def request_knowledge_base_reload(reason: str = "manual") -> bool:
+    """Starts reload_knowledge_base() in a background thread. Returns False if a reload is already running."""
+    if _kb_reload_lock.locked():
+        return False
+    threading.Thread(target=reload_knowledge_base, args=(reason,), name="kb-reload", daemon=True).start()
+    return True
+
+def get_knowledge_base_status() -> dict:
+    snapshot = _kb_snapshot
+    return {
+        "version": snapshot.version if snapshot else None,
+        "loaded_at": snapshot.loaded_at if snapshot else None,
+        "issues": len(snapshot.data) if snapshot else 0,
+        "components": len(snapshot.components_data) if snapshot else 0,
+        "models": len(snapshot.model_catalog) if snapshot else 0,
+        "reload": dict(_kb_reload_status),
+    }
+
+def _watch_knowledge_base_files(interval_seconds: float) -> None:
+    data_file_path, components_data_file_path = _data_file_paths()
+    snapshot = _kb_snapshot
+    last_seen_mtimes = (snapshot.data_file_mtime, snapshot.components_file_mtime) if snapshot else (None, None)
+    while True:
+        time.sleep(interval_seconds)
+        current_mtimes = (_file_mtime(data_file_path), _file_mtime(components_data_file_path))
+        if current_mtimes == last_seen_mtimes:
+            continue
+        # Remembered even if the reload fails, so a broken file is retried on its next edit, not every interval.
+        last_seen_mtimes = current_mtimes
+        log.info("KB_WATCHER: Data file change detected.")
+        reload_knowledge_base(reason="file_watcher")
+
+def start_knowledge_base_watcher() -> None:
+    global _kb_watcher_thread
+    if KB_WATCH_INTERVAL_SECONDS <= 0 or _kb_watcher_thread is not None:
+        return
+    _kb_watcher_thread = threading.Thread(
+        target=_watch_knowledge_base_files, args=(KB_WATCH_INTERVAL_SECONDS,), name="kb-watcher", daemon=True
+    )
+    _kb_watcher_thread.start()
+    log.info(f"KB_WATCHER: Polling {DATA_FILE_NAME} and {COMPONENTS_DATA_FILE_NAME} every {KB_WATCH_INTERVAL_SECONDS}s.")
+
+
+async def _localize_segments(session: ChatSession, segments_en: list[str], context_hint: str) -> list[str]:
+    """Translates English segments to the session language in one call; a segment that fails stays in English."""
+    if session.current_language == "en":
+        return list(segments_en)
+    with trace_stage("localize_segments"):
+        translated = await translate_segments_lc(segments_en, "English", session.current_language_name,
+                                                 session.last_detected_dialect_info, context_hint)
+    return [localized if localized and not localized.startswith("Error:") else original
+            for original, localized in zip(segments_en, translated)]
+
 
 async def process_user_turn(session: ChatSession, user_input_raw: str) -> str:
     if not is_core_initialized:
         # ... (Error handling for uninitialized core) ...
         return "System is currently unavailable. Please try again shortly."
-    
+
+    with turn_trace(f"lang={session.current_language}"):
+        # Intent classification for a fresh query only needs the raw text, so it runs while language detection is in flight.
+        speculative_intent = start_speculative_intent(session, user_input_raw, _kb_snapshot.model_catalog if _kb_snapshot else None)
+        try:
+            return await _process_user_turn(session, user_input_raw, speculative_intent)
+        finally:
+            if speculative_intent:
+                speculative_intent.cancel()
+
+
+async def _process_user_turn(session: ChatSession, user_input_raw: str, speculative_intent: SpeculativeIntent | None) -> str:
     # 1. Language Detection and Explicit Switch
     # ... (This section remains the same as your last full working version) ...
-    detected_lang_code, detected_dialect_req_type, _ = await detect_language_and_intent(user_input_raw)
+    with trace_stage("detect_language"):
+        detected_lang_code, detected_dialect_req_type, _ = await detect_language_and_intent(user_input_raw)
     is_explicit_lang_request = detected_dialect_req_type and "_request" in detected_dialect_req_type
     if is_explicit_lang_request:
         if detected_lang_code != session.current_language or \
            (detected_dialect_req_type and detected_dialect_req_type != session.last_detected_dialect_info): 
             session.set_language(detected_lang_code, detected_dialect_req_type)
-            ack_ctx = (f"Language switched to {session.current_language_name} "
-                       f"({session.last_detected_dialect_info or 'general'}). How can I help?")
-            return await call_groq_llm_final_answer( # Use direct alias
-                user_context_for_current_turn=ack_ctx,
-                target_language_name=session.current_language_name,
-                dialect_context_hint=session.last_detected_dialect_info,
-                memory_messages=session.get_lc_memory_messages(),
-                system_prompt_template_str="Respond in {{target_language_name}}."
-            ) or f"Language set to {session.current_language_name}."
+            return get_message("language_switched", session.current_language, session.last_detected_dialect_info)
     elif detected_lang_code != session.current_language and not session.get_expectation():
         session.set_language(detected_lang_code, detected_dialect_req_type)
 
@@ -102,10 +275,10 @@ async def process_user_turn(session: ChatSession, user_input_raw: str) -> str:
     # 2. Handle simple commands
     # ... (This section for /loadpdf, /clearpdf remains the same) ...
     if user_input_raw.lower().startswith("/loadpdf "): 
-        return await call_groq_llm_final_answer("To upload a PDF, use the attachment button.", session.current_language_name, session.last_detected_dialect_info, session.get_lc_memory_messages()) or "Use attachment button for PDF."
+        return get_message("pdf_upload_hint", session.current_language, session.last_detected_dialect_info)
     if user_input_raw.lower() == "/clearpdf":
         # ... (clear PDF logic) ...
-        return await call_groq_llm_final_answer(f"PDF context cleared.", session.current_language_name, session.last_detected_dialect_info, session.get_lc_memory_messages()) or "PDF context cleared."
+        return get_message("pdf_context_cleared", session.current_language, session.last_detected_dialect_info)
 
 
     # 3. Check for session reset/closing remarks
@@ -120,28 +293,31 @@ async def process_user_turn(session: ChatSession, user_input_raw: str) -> str:
         log.info(f"CORE_PROCESS: Session reset/closing due to: '{user_input_raw[:50]}...'")
         # Simplified example for brevity
         session.end_session(reason=f"user_reset_or_closing: {user_input_raw.lower()}")
-        return await call_groq_llm_final_answer("Okay, session ended. How can I help you next?", session.current_language_name, session.last_detected_dialect_info, []) or "Session ended."
+        return get_message("session_ended", session.current_language, session.last_detected_dialect_info)
 
 
     # 4. Main Handler Routing 
     intermediate_response_content: str | None = None 
+    kb = _kb_snapshot # Pin one snapshot for the whole turn; a concurrent reload does not affect it
     current_expectation = session.get_expectation()
     
     if current_expectation or session.in_troubleshooting_flow or session.active_tv_model:
         log.debug(f"CORE_PROCESS: Routing to handle_ongoing_session_turn. Expectation: {current_expectation}, Flow: {session.in_troubleshooting_flow}, ActiveModel: {session.active_tv_model}")
         intermediate_response_content = await handle_ongoing_session_turn(
             session=session, user_input_raw=user_input_raw,
-            data_store=data_store, index_store=index_store,
-            text_to_original_data_idx_map_store=text_to_original_data_idx_map_store,
-            components_data_store=components_data_store, image_base_path=IMAGE_BASE_PATH_USER_MSG
+            data_store=kb.data, index_store=kb.index,
+            text_to_original_data_idx_map_store=kb.text_to_original_data_idx_map,
+            components_data_store=kb.components_data, image_base_path=IMAGE_BASE_PATH_USER_MSG,
+            model_catalog=kb.model_catalog
         )
     else: 
         log.debug(f"CORE_PROCESS: Routing to handle_initial_query.")
         intermediate_response_content = await handle_initial_query(
             session=session, user_input_raw=user_input_raw,
-            data_store=data_store, index_store=index_store,
-            text_to_original_data_idx_map_store=text_to_original_data_idx_map_store,
-            components_data_store=components_data_store, image_base_path=IMAGE_BASE_PATH_USER_MSG
+            data_store=kb.data, index_store=kb.index,
+            text_to_original_data_idx_map_store=kb.text_to_original_data_idx_map,
+            components_data_store=kb.components_data, image_base_path=IMAGE_BASE_PATH_USER_MSG,
+            model_catalog=kb.model_catalog, speculative_intent=speculative_intent
         )
 
     # 5. Process INTENT_MARKERs and NEW_PROBLEM_SUGGESTION (if any) from intermediate_response_content
@@ -153,11 +329,6 @@ async def process_user_turn(session: ChatSession, user_input_raw: str) -> str:
             english_gk_answer_with_marker = intermediate_response_content.split("\n", 1)
             english_gk_answer = english_gk_answer_with_marker[1] if len(english_gk_answer_with_marker) > 1 else "I can look that up."
             
-            localized_gk_answer = english_gk_answer 
-            if session.current_language != "en":
-                translated = await translate_text_lc(english_gk_answer, "English", session.current_language_name, session.last_detected_dialect_info, "Answer to a general question.")
-                if translated and not translated.startswith("Error:"): localized_gk_answer = translated
-            
             offer_to_resume_en = ""
             if session.in_troubleshooting_flow and session.active_tv_model and session.current_problem_description:
                 offer_to_resume_en = (f"\n\nNow, back to our troubleshooting for TV model '{session.active_tv_model}' "
@@ -167,11 +338,10 @@ async def process_user_turn(session: ChatSession, user_input_raw: str) -> str:
             else:
                 offer_to_resume_en = "\n\nIs there anything else I can help you with today?"
 
-            localized_offer_to_resume = offer_to_resume_en
-            if session.current_language != "en":
-                 translated_offer = await translate_text_lc(offer_to_resume_en, "English", session.current_language_name, session.last_detected_dialect_info, "Offer to continue or ask for other help.")
-                 if translated_offer and not translated_offer.startswith("Error:"): localized_offer_to_resume = translated_offer
-            
+            localized_gk_answer, localized_offer_to_resume = await _localize_segments(
+                session, [english_gk_answer, offer_to_resume_en],
+                "Answer to a general question, followed by an offer to continue or ask for other help."
+            )
             final_assistant_response = localized_gk_answer + localized_offer_to_resume
             # Session state (problem, model) is NOT cleared here.
 
@@ -180,19 +350,11 @@ async def process_user_turn(session: ChatSession, user_input_raw: str) -> str:
             ack_message_en_with_marker = intermediate_response_content.split("\n", 1)
             ack_message_en = ack_message_en_with_marker[1] if len(ack_message_en_with_marker) > 1 else "Great to hear it's resolved!"
             
-            localized_ack = ack_message_en
-            if session.current_language != "en":
-                # ... (translate ack_message_en to localized_ack) ...
-                translated = await translate_text_lc(ack_message_en, "English", session.current_language_name, session.last_detected_dialect_info, "Acknowledgement of problem solved.")
-                if translated and not translated.startswith("Error:"): localized_ack = translated
-
             ask_next_en = "\nWhat would you like to do next? Do you have another problem, or a general question?"
-            localized_ask_next = ask_next_en
-            if session.current_language != "en":
-                # ... (translate ask_next_en to localized_ask_next) ...
-                translated_ask = await translate_text_lc(ask_next_en, "English", session.current_language_name, session.last_detected_dialect_info, "Asking user for next action.")
-                if translated_ask and not translated_ask.startswith("Error:"): localized_ask_next = translated_ask
-            
+            localized_ack, localized_ask_next = await _localize_segments(
+                session, [ack_message_en, ask_next_en],
+                "Acknowledgement of problem solved, followed by asking the user for their next action."
+            )
             final_assistant_response = localized_ack + localized_ask_next
             session.clear_active_problem() 
             session.in_troubleshooting_flow = False 
@@ -232,17 +394,19 @@ async def process_user_turn(session: ChatSession, user_input_raw: str) -> str:
             
             if session.current_language == "ar" and \
                session.last_detected_dialect_info and "darija" in session.last_detected_dialect_info.lower():
-                darija_translation = await translate_english_to_darija_via_service(intermediate_response_content)
+                with trace_stage("localize_response_darija"):
+                    darija_translation = await translate_english_to_darija_via_service(intermediate_response_content)
                 if darija_translation: final_assistant_response = darija_translation
                 else: log.warning("CORE_PROCESS: Eng-to-Darija microservice failed. Using Groq LLM.")
 
             if not final_assistant_response: 
-                localized_response = await translate_text_lc(
-                    text_to_translate=intermediate_response_content,
-                    source_language_name="English", target_language_name=session.current_language_name,
-                    dialect_context_hint=session.last_detected_dialect_info,
-                    context_hint_for_translation="Chatbot response."
-                )
+                with trace_stage("localize_response"), final_answer_stream():
+                    localized_response = await translate_text_lc(
+                        text_to_translate=intermediate_response_content,
+                        source_language_name="English", target_language_name=session.current_language_name,
+                        dialect_context_hint=session.last_detected_dialect_info,
+                        context_hint_for_translation="Chatbot response."
+                    )
                 if localized_response and not localized_response.startswith("Error:"):
                     final_assistant_response = localized_response
                 else:
@@ -252,19 +416,8 @@ async def process_user_turn(session: ChatSession, user_input_raw: str) -> str:
     
     # 7. Final Fallback
     if not final_assistant_response:
-         log.warning(f"CORE_PROCESS: No response after all processing for input '{user_input_raw[:50]}...'. Using LLM fallback.")
-         fallback_context_english = "I'm not sure how to respond to that. Could you please rephrase your query, or let me know if you need help with a TV problem or have a general question?"
-         final_assistant_response = await call_groq_llm_final_answer(
-             user_context_for_current_turn=fallback_context_english,
-             target_language_name=session.current_language_name,
-             dialect_context_hint=session.last_detected_dialect_info,
-             memory_messages=session.get_lc_memory_messages(),
-             system_prompt_template_str="You are a helpful AI assistant. Respond in {{target_language_name}} based on the English fallback context. {{dialect_context_hint}}"
-         )
-         if not final_assistant_response or final_assistant_response.startswith("Error:"):
-            log.error(f"CORE_PROCESS: LLM call for FINAL FALLBACK failed. Error: {final_assistant_response}")
-            # Hardcoded fallback if LLM also fails for this.
-            final_assistant_response = {"English": "I am currently unable to respond. Please try again later."}.get(session.current_language_name, "I am currently unable to respond. Please try again later.")
+         log.warning(f"CORE_PROCESS: No response after all processing for input '{user_input_raw[:50]}...'. Using catalog fallback.")
+         final_assistant_response = get_message("fallback_rephrase", session.current_language, session.last_detected_dialect_info)
 
 
     return str(final_assistant_response)
\ No newline at end of file
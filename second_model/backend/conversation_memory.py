@@ -0,0 +1,174 @@
+# backend/conversation_memory.py
+"""
+Token-bounded conversation memory for LLM prompts.
+
+ChatSession keeps the raw messages; every call site asks for them with a budget name
+(session.get_lc_memory_messages("classify"), ...), and select_memory_messages() returns the
+rolling summary of older turns (as a SystemMessage) plus as many of the most recent messages as
+fit the budget, newest first. A single long message (a Markdown step explanation) is truncated to
+at most half the budget so it cannot crowd out the rest of the conversation.
+
+Once the raw messages grow past MEMORY_COMPACT_TRIGGER_TOKENS or MEMORY_COMPACT_TRIGGER_MESSAGES,
+all but the MEMORY_KEEP_RECENT_MESSAGES newest are folded into the summary by one background
+LLM call (previous summary + the folded messages), and removed from the session. Compaction runs
+on a single worker thread with its own event loop, so it never delays a turn; until it finishes,
+prompts are still bounded by the budget. MEMORY_MAX_RAW_MESSAGES caps the raw list if the
+summarizer keeps failing.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+log = logging.getLogger(__name__)
+
+# Tokens of memory (summary + messages) each call site may put in its prompt.
+DEFAULT_MEMORY_TOKEN_BUDGETS = {
+    "classify": 300,       # Intent / follow-up classification
+    "chat": 1200,          # General answers and session follow-ups
+    "explain_steps": 800,  # The step explanation prompt already carries the retrieved steps
+    "media": 500,          # Component/image answers
+    "default": 800,
+}
+MEMORY_TOKEN_BUDGETS = {**DEFAULT_MEMORY_TOKEN_BUDGETS, **json.loads(os.getenv("MEMORY_TOKEN_BUDGETS", "{}") or "{}")}
+MEMORY_SUMMARY_ENABLED = os.getenv("MEMORY_SUMMARY_ENABLED", "true").lower() == "true"
+MEMORY_COMPACT_TRIGGER_TOKENS = int(os.getenv("MEMORY_COMPACT_TRIGGER_TOKENS", "2000"))
+MEMORY_COMPACT_TRIGGER_MESSAGES = int(os.getenv("MEMORY_COMPACT_TRIGGER_MESSAGES", "14"))
+MEMORY_KEEP_RECENT_MESSAGES = int(os.getenv("MEMORY_KEEP_RECENT_MESSAGES", "6"))
+MEMORY_SUMMARY_MAX_TOKENS = int(os.getenv("MEMORY_SUMMARY_MAX_TOKENS", "250"))
+MEMORY_MAX_RAW_MESSAGES = int(os.getenv("MEMORY_MAX_RAW_MESSAGES", "40"))
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+_CHARS_PER_TOKEN = 4 # Same rough estimate as llm_scheduler.estimate_tokens
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text: str | None) -> int:
+    return len(text or "") // _CHARS_PER_TOKEN
+
+
+def message_tokens(message: BaseMessage) -> int:
+    return count_tokens(message.content if isinstance(message.content, str) else str(message.content)) + _MESSAGE_OVERHEAD_TOKENS
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max(0, max_tokens) * _CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + " …"
+
+
+def memory_budget(budget_name: str | None) -> int:
+    return int(MEMORY_TOKEN_BUDGETS.get(budget_name or "default", MEMORY_TOKEN_BUDGETS["default"]))
+
+
+def select_memory_messages(messages: list[BaseMessage], summary: str | None, budget_tokens: int) -> list[BaseMessage]:
+    """The rolling summary plus the newest messages that fit in `budget_tokens`, in conversation order."""
+    selected: list[BaseMessage] = []
+    used = 0
+    if summary:
+        summary = _truncate(summary, budget_tokens // 2)
+        used = count_tokens(SUMMARY_PREFIX + summary) + _MESSAGE_OVERHEAD_TOKENS
+    per_message_cap = max(budget_tokens // 2, 1)
+    for message in reversed(messages):
+        tokens = message_tokens(message)
+        if tokens > per_message_cap:
+            message = message.model_copy(update={"content": _truncate(str(message.content), per_message_cap - _MESSAGE_OVERHEAD_TOKENS)})
+            tokens = message_tokens(message)
+        if used + tokens > budget_tokens:
+            break
+        selected.append(message)
+        used += tokens
+    selected.reverse()
+    if summary:
+        selected.insert(0, SystemMessage(content=SUMMARY_PREFIX + summary))
+    return selected
+
+
+def needs_compaction(messages: list[BaseMessage]) -> bool:
+    if len(messages) <= MEMORY_KEEP_RECENT_MESSAGES:
+        return False
+    return (len(messages) > MEMORY_COMPACT_TRIGGER_MESSAGES or
+            sum(message_tokens(message) for message in messages) > MEMORY_COMPACT_TRIGGER_TOKENS)
+
+
+class MemoryCompactor:
+    """Folds old session messages into the session's rolling summary on a background thread."""
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+        self._lock = threading.Lock()
+        self.scheduled = 0
+        self.compactions = 0
+        self.failures = 0
+        self.discarded = 0
+        self.folded_messages = 0
+        self.capped_messages = 0
+
+    def maybe_schedule(self, session) -> bool:
+        """Schedules a compaction of `session` if its raw memory is over the trigger. Returns True if one was scheduled."""
+        with session.memory_lock:
+            messages = session.memory.chat_memory.messages
+            overflow = len(messages) - MEMORY_MAX_RAW_MESSAGES
+            if overflow > 0:
+                del messages[:overflow] # Summarizer disabled or failing: drop the oldest rather than grow forever
+                with self._lock:
+                    self.capped_messages += overflow
+            if not MEMORY_SUMMARY_ENABLED or session.memory_compaction_pending or not needs_compaction(messages):
+                return False
+            to_fold = list(messages[:-MEMORY_KEEP_RECENT_MESSAGES])
+            previous_summary = session.memory_summary
+            generation = session.memory_generation
+            session.memory_compaction_pending = True
+        with self._lock:
+            self.scheduled += 1
+        self._executor.submit(self._compact, session, to_fold, previous_summary, generation)
+        return True
+
+    def _compact(self, session, to_fold: list[BaseMessage], previous_summary: str | None, generation: int) -> None:
+        from groq_api import summarize_conversation_lc # Deferred: keeps importing session_manager free of the LLM stack
+
+        summary = None
+        try:
+            summary = asyncio.run(summarize_conversation_lc(previous_summary, to_fold, MEMORY_SUMMARY_MAX_TOKENS))
+        except Exception as e:
+            log.warning(f"CONVERSATION_MEMORY: Summarization failed: {e}", exc_info=True)
+        with session.memory_lock:
+            session.memory_compaction_pending = False
+            messages = session.memory.chat_memory.messages
+            still_current = (session.memory_generation == generation and len(messages) >= len(to_fold) and
+                             all(a is b for a, b in zip(messages, to_fold)))
+            if summary and still_current:
+                session.memory_summary = _truncate(summary, MEMORY_SUMMARY_MAX_TOKENS)
+                del messages[:len(to_fold)]
+        with self._lock:
+            if not summary:
+                self.failures += 1
+            elif not still_current:
+                self.discarded += 1 # Memory was cleared (or otherwise rewritten) while we were summarizing
+            else:
+                self.compactions += 1
+                self.folded_messages += len(to_fold)
+        if summary and still_current:
+            log.info(f"CONVERSATION_MEMORY: Folded {len(to_fold)} messages into the rolling summary "
+                     f"({count_tokens(session.memory_summary)} tokens).")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": MEMORY_SUMMARY_ENABLED,
+                "budgets": dict(MEMORY_TOKEN_BUDGETS),
+                "compact_trigger_tokens": MEMORY_COMPACT_TRIGGER_TOKENS,
+                "compact_trigger_messages": MEMORY_COMPACT_TRIGGER_MESSAGES,
+                "keep_recent_messages": MEMORY_KEEP_RECENT_MESSAGES,
+                "scheduled": self.scheduled,
+                "compactions": self.compactions,
+                "failures": self.failures,
+                "discarded": self.discarded,
+                "folded_messages": self.folded_messages,
+                "capped_messages": self.capped_messages,
+            }
+
+
+memory_compactor = MemoryCompactor()
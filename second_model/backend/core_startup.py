@@ -0,0 +1,129 @@
+# backend/core_startup.py
+"""
+Startup sequence for the chatbot backend, timed phase by phase.
+
+Nothing expensive happens at import time any more: the sentence encoder, the knowledge base, the
+language keywords and the LLM clients are all loaded here. In "background" mode (the default) the
+sequence runs in a daemon thread, so the web server answers /healthz immediately and /readyz
+turns 200 only once every critical phase has finished, including a dummy encode and FAISS search
+so the first real query does not pay for lazy initialization either.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+CORE_STARTUP_MODE = os.getenv("CORE_STARTUP_MODE", "background").strip().lower() # "background" or "blocking"
+
+_state = {"status": "not_started", "started_at": None, "ready_at": None, "error": None}
+_phases: list[dict] = []
+_state_lock = threading.Lock()
+_run_lock = threading.Lock()
+_startup_thread: threading.Thread | None = None
+
+
+def record_phase(name: str, seconds: float, ok: bool = True, error: str | None = None) -> None:
+    with _state_lock:
+        _phases.append({"name": name, "seconds": round(seconds, 4), "ok": ok, "error": error})
+
+
+@contextmanager
+def _timed_phase(name: str, critical: bool = True):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        record_phase(name, time.perf_counter() - start, ok=False, error=str(e))
+        if critical:
+            raise
+        log.warning(f"CORE_STARTUP: Non-critical phase '{name}' failed: {e}", exc_info=True)
+    else:
+        seconds = time.perf_counter() - start
+        record_phase(name, seconds)
+        log.info(f"CORE_STARTUP: Phase '{name}' done in {seconds:.3f}s.")
+
+
+def _set_state(**fields) -> None:
+    with _state_lock:
+        _state.update(fields)
+
+
+def run_startup() -> bool:
+    """
+    Runs the full startup sequence once; later calls return the outcome of the first run
+    (waiting for it if it is still in progress). Returns True when the backend is ready.
+    """
+    with _run_lock:
+        if _state["status"] in ("ready", "failed"):
+            return _state["status"] == "ready"
+        # Imported here so that importing this module stays cheap.
+        import vector_search
+        from chatbot_core import get_knowledge_base_snapshot, initialize_chatbot_core
+        from groq_api import warm_up_llm_clients
+        from intent_classifier import LOCAL_INTENT_CLASSIFIER_ENABLED, local_intent_classifier
+        from language_handler import load_language_keywords, warm_up_langdetect
+
+        _set_state(status="starting", started_at=time.time())
+        log.info(f"CORE_STARTUP: Starting ({CORE_STARTUP_MODE} mode).")
+        try:
+            with _timed_phase("encoder_model"):
+                vector_search.get_sentence_model()
+            with _timed_phase("knowledge_base"):
+                if not initialize_chatbot_core():
+                    raise RuntimeError("Chatbot core initialization failed (see log for the failing step).")
+            with _timed_phase("warmup_encode"):
+                warmup_vector = vector_search.encode_queries(["TV not powering on"])
+                if warmup_vector is None:
+                    raise RuntimeError("Warm-up encode returned no embedding.")
+            with _timed_phase("warmup_faiss_search", critical=False):
+                index = get_knowledge_base_snapshot().index
+                index.search(vector_search.prepare_query_embeddings(np.asarray(warmup_vector, dtype='float32'), index), 1)
+            if LOCAL_INTENT_CLASSIFIER_ENABLED:
+                with _timed_phase("intent_classifier", critical=False):
+                    if not local_intent_classifier.build():
+                        raise RuntimeError("Local intent classifier could not be built; intents will come from the LLM.")
+            with _timed_phase("language_keywords", critical=False):
+                if not load_language_keywords():
+                    raise RuntimeError("language_keywords.json could not be loaded.")
+            with _timed_phase("warmup_langdetect", critical=False):
+                warm_up_langdetect()
+            with _timed_phase("llm_clients", critical=False):
+                failed_roles = [role for role, ok in warm_up_llm_clients().items() if not ok]
+                if failed_roles:
+                    raise RuntimeError(f"Could not create LLM clients: {', '.join(failed_roles)}")
+        except Exception as e:
+            _set_state(status="failed", error=str(e))
+            log.critical(f"CORE_STARTUP: Startup FAILED: {e}", exc_info=True)
+            return False
+
+        _set_state(status="ready", ready_at=time.time())
+        log.info(f"CORE_STARTUP: Ready. Phase timings: "
+                 + ", ".join(f"{phase['name']}={phase['seconds']:.3f}s" for phase in get_startup_report()["phases"]))
+        return True
+
+
+def start_background_startup() -> threading.Thread:
+    """Runs run_startup() in a daemon thread (once per process)."""
+    global _startup_thread
+    with _state_lock:
+        if _startup_thread is None:
+            _startup_thread = threading.Thread(target=run_startup, name="core-startup", daemon=True)
+            _startup_thread.start()
+        return _startup_thread
+
+
+def is_ready() -> bool:
+    return _state["status"] == "ready"
+
+
+def get_startup_report() -> dict:
+    with _state_lock:
+        report = dict(_state)
+        report["phases"] = [dict(phase) for phase in _phases]
+    report["total_seconds"] = round(sum(phase["seconds"] for phase in report["phases"]), 4)
+    return report
@@ -0,0 +1,140 @@
+# backend/embedding_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "86400"))
+QUERY_EMBEDDING_CACHE_DB = os.getenv("QUERY_EMBEDDING_CACHE_DB") # Optional SQLite file for the on-disk tier
+
+
+def normalize_query_text(text: str, lowercase: bool) -> str:
+    """Collapses whitespace, and case too when the encoder's tokenizer lowercases anyway."""
+    normalized = " ".join((text or "").split())
+    return normalized.casefold() if lowercase else normalized
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings keyed by (model name, normalized text).
+
+    Entries expire after `ttl_seconds`. When `disk_path` is set, evicted or expired-from-memory
+    lookups fall through to a SQLite table, so repeat queries survive restarts and are shared by
+    workers on the same host. Safe to use from several threads.
+    """
+    def __init__(self, max_entries: int = QUERY_EMBEDDING_CACHE_SIZE, ttl_seconds: float = QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+                 disk_path: str | None = QUERY_EMBEDDING_CACHE_DB):
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db: sqlite3.Connection | None = None
+        if disk_path:
+            try:
+                self._db = sqlite3.connect(disk_path, check_same_thread=False, timeout=5.0)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                    "key TEXT PRIMARY KEY, created_at REAL NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+                )
+                self._db.commit()
+                log.info(f"EMBEDDING_CACHE: On-disk tier enabled at {disk_path}")
+            except sqlite3.Error as e:
+                log.error(f"EMBEDDING_CACHE: Could not open on-disk tier at {disk_path}: {e}. Using memory only.")
+                self._db = None
+
+    @staticmethod
+    def make_key(model_name: str, normalized_text: str) -> str:
+        return hashlib.sha256(f"{model_name}\x00{normalized_text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> np.ndarray | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, vector = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+
+            vector = self._get_from_disk(key, now)
+            if vector is not None:
+                self.disk_hits += 1
+                self._put_locked(key, vector, now)
+                return vector
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        vector = np.asarray(vector, dtype='float32')
+        vector.setflags(write=False) # Shared between callers; nobody may modify it in place
+        now = time.time()
+        with self._lock:
+            self._put_locked(key, vector, now)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO query_embeddings (key, created_at, dim, vector) VALUES (?, ?, ?, ?)",
+                        (key, now, int(vector.shape[-1]), vector.tobytes()),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    log.warning(f"EMBEDDING_CACHE: Failed to write to on-disk tier: {e}")
+
+    def _put_locked(self, key: str, vector: np.ndarray, created_at: float) -> None:
+        if self.max_entries == 0:
+            return
+        self._entries[key] = (created_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_from_disk(self, key: str, now: float) -> np.ndarray | None:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT created_at, vector FROM query_embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.warning(f"EMBEDDING_CACHE: Failed to read from on-disk tier: {e}")
+            return None
+        if not row or now - row[0] > self.ttl_seconds:
+            return None
+        vector = np.frombuffer(row[1], dtype='float32')
+        vector.setflags(write=False)
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "disk_tier": self._db is not None,
+            }
@@ -0,0 +1,184 @@
+# backend/follow_up_classifier.py
+"""
+Fast path for replies to the bot's own questions ("Do you want more details?", "What is your
+TV model?"). Most of those replies are a bare yes/no or a model number in one of the four
+languages the bot speaks, so a local lexicon classifier answers them instantly with a confidence
+score; only replies it is not sure about (mixed, longer or unknown wording) go to
+classify_follow_up_intent_lc(). Fast-path and fallback counts are kept for the admin status
+endpoint.
+
+The yes/no/filler lexicons live in language_keywords.json (follow_up_affirmative,
+follow_up_negative, follow_up_fillers), merged across languages: a reply is matched whatever
+language the session is in, since users switch mid-conversation.
+"""
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+from groq_api import AFFIRMATIVE_WORDS_API, NEGATIVE_WORDS_API, classify_follow_up_intent_lc
+from language_handler import get_localized_keywords
+from turn_trace import trace_stage
+from utils import extract_tv_model_from_query
+
+log = logging.getLogger(__name__)
+
+FOLLOW_UP_FAST_PATH_ENABLED = os.getenv("FOLLOW_UP_FAST_PATH_ENABLED", "true").lower() == "true"
+FOLLOW_UP_FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FOLLOW_UP_FAST_PATH_MIN_CONFIDENCE", "0.85"))
+MAX_FAST_PATH_TOKENS = 6 # Longer replies usually carry more than a yes/no
+KEYWORD_LANGUAGES = ("en", "fr", "ar", "darija")
+
+_ARABIC_DIACRITICS_RE = re.compile(r"[\u064B-\u0652\u0670\u0640]") # Harakat, dagger alef, tatweel
+_PUNCTUATION_RE = re.compile(r"[^\w\s']+")
+
+
+@dataclass(frozen=True)
+class FollowUpClassification:
+    intent: str             # Same categories as classify_follow_up_intent_lc()
+    model: str | None
+    confidence: float
+    reason: str
+
+
+def normalize_reply(text: str) -> list[str]:
+    """Casefolded tokens with Arabic diacritics/tatweel removed, alef variants unified and punctuation dropped."""
+    text = _ARABIC_DIACRITICS_RE.sub("", (text or "").casefold())
+    text = text.translate(str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ى": "ي", "’": "'", "‘": "'"}))
+    return _PUNCTUATION_RE.sub(" ", text.replace("_", " ")).split()
+
+
+class _Lexicon:
+    def __init__(self):
+        def phrases(group: str, extra: list) -> set[tuple]:
+            words = list(extra)
+            for lang_code in KEYWORD_LANGUAGES:
+                words.extend(get_localized_keywords(group, lang_code))
+            return {tuple(tokens) for tokens in map(normalize_reply, words) if tokens}
+
+        affirmative = phrases("follow_up_affirmative", AFFIRMATIVE_WORDS_API)
+        negative = phrases("follow_up_negative", NEGATIVE_WORDS_API)
+        ambiguous = affirmative & negative # e.g. a word that means "yes" in one language and "no" in another
+        self.phrases = {"affirmative": affirmative - ambiguous, "negative": negative - ambiguous}
+        self.fillers = phrases("follow_up_fillers", [])
+        self.max_phrase_len = max((len(phrase) for group in (*self.phrases.values(), self.fillers) for phrase in group), default=1)
+        log.info(f"FOLLOW_UP_FAST_PATH: Lexicon loaded ({len(self.phrases['affirmative'])} affirmative, "
+                 f"{len(self.phrases['negative'])} negative, {len(self.fillers)} filler phrases; {len(ambiguous)} ambiguous dropped).")
+
+    def label_tokens(self, tokens: list[str]) -> set[str] | None:
+        """
+        Covers `tokens` greedily with the longest known phrases. Returns the set of labels used
+        ("affirmative"/"negative"), or None if some token is not in the lexicon.
+        """
+        labels = set()
+        i = 0
+        while i < len(tokens):
+            for length in range(min(self.max_phrase_len, len(tokens) - i), 0, -1):
+                candidate = tuple(tokens[i:i + length])
+                label = next((name for name, group in self.phrases.items() if candidate in group), None)
+                if label is None and candidate in self.fillers:
+                    label = "filler"
+                if label is not None:
+                    if label != "filler":
+                        labels.add(label)
+                    i += length
+                    break
+            else:
+                return None
+        return labels
+
+
+_lexicon: _Lexicon | None = None
+_lexicon_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {"fast_path": {}, "llm_fallback": 0, "low_confidence": 0}
+
+
+def _get_lexicon() -> _Lexicon:
+    global _lexicon
+    if _lexicon is None:
+        with _lexicon_lock:
+            if _lexicon is None:
+                _lexicon = _Lexicon()
+    return _lexicon
+
+
+def classify_follow_up_locally(user_query: str, known_models=(), model_catalog=None) -> FollowUpClassification | None:
+    """
+    Classifies an obvious follow-up reply without the LLM. Returns None when the reply is not
+    covered by the rules at all; callers should still check `confidence`.
+    """
+    tokens = normalize_reply(user_query)
+    if not tokens:
+        return None
+
+    words = user_query.split() # Model names contain '.'/'-', so count them before punctuation splitting
+    if len(words) <= 4:
+        model = extract_tv_model_from_query(user_query)
+        if model:
+            model = model.strip().upper()
+            if (model_catalog is not None and model in model_catalog) or model in (known_models or ()):
+                return FollowUpClassification("provided_model", model, 0.97, "known_model")
+            # A lone model-shaped token is almost certainly the model we asked for; inside a phrase it may not be
+            return FollowUpClassification("provided_model", model, 0.9 if len(words) == 1 else 0.7, "model_pattern")
+
+    if len(tokens) > MAX_FAST_PATH_TOKENS:
+        return None
+    lexicon = _get_lexicon()
+    for intent, group in lexicon.phrases.items():
+        if tuple(tokens) in group:
+            return FollowUpClassification(intent, None, 0.97, "exact_phrase")
+    labels = lexicon.label_tokens(tokens)
+    if labels is None:
+        return None
+    if len(labels) == 1:
+        return FollowUpClassification(labels.pop(), None, 0.9, "phrase_cover")
+    # Only fillers ("thanks") or both yes and no words ("no... ok yes"): let the LLM read the context
+    return FollowUpClassification("unclear_or_other", None, 0.5, "mixed" if labels else "filler_only")
+
+
+async def classify_follow_up_reply(user_query: str, bot_s_previous_question_context: str, session, model_catalog=None) -> tuple[str, str | None]:
+    """
+    Drop-in for classify_follow_up_intent_lc() on a session: answers confident cases locally and
+    falls back to the LLM for the rest. Returns (intent, model).
+    """
+    with trace_stage("follow_up_intent"):
+        if FOLLOW_UP_FAST_PATH_ENABLED:
+            result = classify_follow_up_locally(user_query, session.recognized_tv_models, model_catalog)
+            if result is not None and result.confidence >= FOLLOW_UP_FAST_PATH_MIN_CONFIDENCE:
+                with _stats_lock:
+                    _stats["fast_path"][result.intent] = _stats["fast_path"].get(result.intent, 0) + 1
+                log.info(f"FOLLOW_UP_FAST_PATH: '{user_query[:50]}' -> {result.intent} "
+                         f"(model={result.model}, confidence={result.confidence:.2f}, {result.reason}).")
+                return result.intent, result.model
+            with _stats_lock:
+                _stats["llm_fallback"] += 1
+                if result is not None:
+                    _stats["low_confidence"] += 1
+            if result is not None:
+                log.debug(f"FOLLOW_UP_FAST_PATH: Low confidence ({result.confidence:.2f}, {result.reason}) for '{user_query[:50]}'; asking the LLM.")
+
+        return await classify_follow_up_intent_lc(
+            user_query=user_query,
+            bot_s_previous_question_context=bot_s_previous_question_context,
+            target_language_name=session.current_language_name,
+            dialect_context_hint=session.last_detected_dialect_info,
+            memory_messages=session.get_lc_memory_messages("classify")
+        )
+
+
+def get_follow_up_stats() -> dict:
+    with _stats_lock:
+        fast_path_total = sum(_stats["fast_path"].values())
+        total = fast_path_total + _stats["llm_fallback"]
+        return {
+            "enabled": FOLLOW_UP_FAST_PATH_ENABLED,
+            "min_confidence": FOLLOW_UP_FAST_PATH_MIN_CONFIDENCE,
+            "classified": total,
+            "fast_path_hits": fast_path_total,
+            "fast_path_by_intent": dict(sorted(_stats["fast_path"].items())),
+            "llm_fallbacks": _stats["llm_fallback"],
+            "low_confidence_fallbacks": _stats["low_confidence"],
+            "fast_path_rate": fast_path_total / total if total else 0.0,
+        }
@@ -3,6 +3,8 @@ import httpx # For potential future direct API calls, though not used in current
 import logging
 import os
 import json
+import threading
+import time
 from dotenv import load_dotenv
 
 # Langchain imports
@@ -10,15 +12,21 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser # JsonOutputParser is also available if needed
 from pydantic import BaseModel, Field # <--- UPDATED FOR PYDANTIC V2
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage 
-from langchain_groq import ChatGroq
 
+import asyncio
 from typing import List, Dict, Any, Union 
 
+from translation_cache import make_translation_key, translation_cache
+from turn_events import invoke_chain
+from llm_scheduler import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, estimate_tokens, llm_scheduler
+from llm_providers import get_llm_provider
+from llm_metrics import LLMCall, LLMUsageCallback, llm_metrics
+
 load_dotenv()
 log = logging.getLogger(__name__)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
-if not GROQ_API_KEY:
+if not GROQ_API_KEY and get_llm_provider().name == "groq":
     log.warning("GROQ_API_KEY not set. LLM calls will likely fail.")
 
 # --- Reusable Langchain LLM Instances ---
@@ -26,14 +34,89 @@ DEFAULT_GROQ_CHAT_MODEL = "llama-3.1-8b-instant"
 DEFAULT_GROQ_TRANSLATE_MODEL = "llama-3.1-8b-instant"
 DEFAULT_GROQ_CLASSIFY_MODEL = "llama-3.1-8b-instant"
 
-try:
-    chat_llm = ChatGroq(temperature=0.5, model_name=DEFAULT_GROQ_CHAT_MODEL, groq_api_key=GROQ_API_KEY)
-    translate_llm = ChatGroq(temperature=0.05, model_name=DEFAULT_GROQ_TRANSLATE_MODEL, groq_api_key=GROQ_API_KEY)
-    classify_llm = ChatGroq(temperature=0.0, model_name=DEFAULT_GROQ_CLASSIFY_MODEL, groq_api_key=GROQ_API_KEY)
-    hyde_llm = ChatGroq(temperature=0.05, model_name=DEFAULT_GROQ_CHAT_MODEL, groq_api_key=GROQ_API_KEY)
-except Exception as e:
-    log.critical(f"Failed to initialize ChatGroq instances: {e}. Check API key and model names.", exc_info=True)
-    chat_llm = translate_llm = classify_llm = hyde_llm = None
+# role -> (temperature, model name). Clients are created by the LLM_PROVIDER (llm_providers.py) on first
+# use (or by the startup warm-up), so importing this module does not pay for the provider's HTTP clients.
+LLM_ROLE_SETTINGS = {
+    "chat": (0.5, DEFAULT_GROQ_CHAT_MODEL),
+    "translate": (0.05, DEFAULT_GROQ_TRANSLATE_MODEL),
+    "classify": (0.0, DEFAULT_GROQ_CLASSIFY_MODEL),
+    "hyde": (0.05, DEFAULT_GROQ_CHAT_MODEL),
+    "summarize": (0.0, DEFAULT_GROQ_CHAT_MODEL),
+}
+# role -> (scheduler priority, expected output tokens for the tokens/min budget). See llm_scheduler.py.
+LLM_ROLE_SCHEDULING = {
+    "classify": (PRIORITY_HIGH, 150),
+    "translate": (PRIORITY_NORMAL, 400),
+    "hyde": (PRIORITY_NORMAL, 60),
+    "chat": (PRIORITY_LOW, 1024),
+    "summarize": (PRIORITY_LOW, 300), # Background memory compaction, never on a turn's critical path
+}
+_llm_instances: dict = {}
+_llm_init_lock = threading.Lock()
+
+def get_llm(role: str):
+    """Returns the shared chat model for `role`, creating it on first use. None if it cannot be created."""
+    llm = _llm_instances.get(role)
+    if llm is not None:
+        return llm
+    with _llm_init_lock:
+        if role in _llm_instances:
+            return _llm_instances[role]
+        temperature, model_name = LLM_ROLE_SETTINGS[role]
+        provider = get_llm_provider()
+        try:
+            llm = provider.create_chat_model(role, temperature, model_name)
+        except Exception as e:
+            log.critical(f"Failed to initialize {provider.name} LLM instance '{role}': {e}. Check API key and model names.", exc_info=True)
+            llm = None
+        _llm_instances[role] = llm
+        return llm
+
+async def _scheduled(role: str, prompt: ChatPromptTemplate, inputs: Dict[str, Any], invoke, call_site: str | None = None):
+    """
+    Runs invoke(inputs, config) once llm_scheduler admits a call of this role's size on its model.
+    The call is timed and its token usage recorded under `call_site` (default: the role), see llm_metrics.py.
+    """
+    priority, expected_output_tokens = LLM_ROLE_SCHEDULING[role]
+    model_name = LLM_ROLE_SETTINGS[role][1]
+    try:
+        prompt_text = prompt.format(**inputs)
+    except Exception:
+        prompt_text = str(inputs)
+    usage = LLMUsageCallback()
+    config = {"callbacks": [usage], "run_name": call_site or role}
+    attempt_started_at = None
+
+    async def _call():
+        nonlocal attempt_started_at
+        attempt_started_at = time.perf_counter()
+        return await invoke(inputs, config)
+
+    started_at = time.perf_counter()
+    result = None
+    ok = cancelled = False
+    try:
+        result = await llm_scheduler.run(model_name, priority, _call, estimate_tokens(prompt_text, expected_output_tokens))
+        ok = True
+        return result
+    except asyncio.CancelledError:
+        cancelled = True # Abandoned (e.g. a discarded speculative classification): not a failed call
+        raise
+    finally:
+        if not cancelled:
+            ended_at = time.perf_counter()
+            llm_metrics.record(LLMCall(
+                call_site=call_site or role, role=role, model=model_name,
+                total_s=ended_at - started_at,
+                llm_s=ended_at - attempt_started_at if attempt_started_at is not None else 0.0,
+                prompt_tokens=usage.prompt_tokens if usage.reported else estimate_tokens(prompt_text, 0),
+                completion_tokens=usage.completion_tokens if usage.reported else (estimate_tokens(result, 0) if result is not None else 0),
+                tokens_estimated=not usage.reported, ok=ok,
+            ))
+
+def warm_up_llm_clients() -> dict:
+    """Creates every role's chat model up front. Returns role -> created successfully."""
+    return {role: get_llm(role) is not None for role in LLM_ROLE_SETTINGS}
 
 
 AFFIRMATIVE_WORDS_API = ["yes", "yeah", "yep", "yup", "sure", "ok", "okay", "alright", "affirmative", "indeed", "certainly", "please do", "go ahead", "absolutely", "fine"]
@@ -45,6 +128,7 @@ async def translate_text_lc(
     dialect_context_hint: str | None = None,
     context_hint_for_translation: str | None = None
 ) -> str | None:
+    translate_llm = get_llm("translate")
     if not translate_llm:
         log.error("Translate LLM not initialized. Cannot perform translation.")
         return "Error: Translation service unavailable."
@@ -56,10 +140,8 @@ async def translate_text_lc(
     if context_hint_for_translation:
         system_prompt_parts.append(f"The text to translate is related to: {context_hint_for_translation}.")
 
-    effective_source_lang_desc = source_language_name
-    if source_language_name == "Arabic" and dialect_context_hint and \
-       any(d_indicator in dialect_context_hint.lower() for d_indicator in ["darija", "dziribert", "heuristic"]):
-        effective_source_lang_desc = "Algerian Darija (an Arabic dialect)"
+    effective_source_lang_desc = _effective_source_language(source_language_name, dialect_context_hint)
+    if effective_source_lang_desc != source_language_name:
         system_prompt_parts.append(f"The source text is specifically in {effective_source_lang_desc}.")
 
     system_prompt_parts.append(f"Your task is to translate the following text accurately and naturally from {effective_source_lang_desc} to {target_language_name}.")
@@ -72,22 +154,146 @@ async def translate_text_lc(
         ("human", "Text to translate:\n\"\"\"\n{text_to_translate}\n\"\"\"")
     ])
     chain = prompt | translate_llm | StrOutputParser()
-    try:
-        translated_text = await chain.ainvoke({
-            "text_to_translate": text_to_translate
-        })
-        if translated_text:
-            if translated_text.startswith('"') and translated_text.endswith('"') and len(translated_text) > 1:
-                translated_text = translated_text[1:-1]
-            if translated_text.startswith("'") and translated_text.endswith("'") and len(translated_text) > 1:
-                translated_text = translated_text[1:-1]
-            log.info(f"LC Translation to {target_language_name} successful: '{translated_text[:70]}...'")
-            return translated_text.strip()
-        log.warning(f"LC Translation to {target_language_name} resulted in empty or None output for input: '{text_to_translate[:50]}...'")
-        return None
-    except Exception as e:
-        log.error(f"LC Translation failed for '{text_to_translate[:50]}...': {e}", exc_info=True)
-        return f"Error: Translation LLM call failed."
+
+    async def _translate() -> str | None:
+        try:
+            translated_text = await _scheduled("translate", prompt, {
+                "text_to_translate": text_to_translate
+            }, lambda inputs, config: invoke_chain(chain, inputs, config), _translation_call_site(target_language_name))
+            if translated_text:
+                if translated_text.startswith('"') and translated_text.endswith('"') and len(translated_text) > 1:
+                    translated_text = translated_text[1:-1]
+                if translated_text.startswith("'") and translated_text.endswith("'") and len(translated_text) > 1:
+                    translated_text = translated_text[1:-1]
+                log.info(f"LC Translation to {target_language_name} successful: '{translated_text[:70]}...'")
+                return translated_text.strip()
+            log.warning(f"LC Translation to {target_language_name} resulted in empty or None output for input: '{text_to_translate[:50]}...'")
+            return None
+        except Exception as e:
+            log.error(f"LC Translation failed for '{text_to_translate[:50]}...': {e}", exc_info=True)
+            return f"Error: Translation LLM call failed."
+
+    cache_key = _translation_cache_key(text_to_translate, source_language_name, target_language_name,
+                                       dialect_context_hint, context_hint_for_translation)
+    return await translation_cache.get_or_compute(cache_key, _translate, _is_cacheable_translation)
+
+
+def _effective_source_language(source_language_name: str, dialect_context_hint: str | None) -> str:
+    if source_language_name == "Arabic" and dialect_context_hint and \
+       any(d_indicator in dialect_context_hint.lower() for d_indicator in ["darija", "dziribert", "heuristic"]):
+        return "Algerian Darija (an Arabic dialect)"
+    return source_language_name
+
+
+def _translation_cache_key(text: str, source_language_name: str, target_language_name: str,
+                           dialect_context_hint: str | None, context_hint_for_translation: str | None) -> str:
+    # The dialect hint only reaches the prompt through the effective source language, so that is what
+    # the key uses; hints that do not change the prompt share one entry.
+    effective_source_lang_desc = _effective_source_language(source_language_name, dialect_context_hint)
+    return make_translation_key(
+        text, source_language_name, target_language_name,
+        effective_source_lang_desc if effective_source_lang_desc != source_language_name else "",
+        context_hint_for_translation, DEFAULT_GROQ_TRANSLATE_MODEL,
+    )
+
+
+def _translation_call_site(target_language_name: str, batched: bool = False) -> str:
+    site = "translate_to_english" if target_language_name == "English" else "translate_back"
+    return f"{site}_batch" if batched else site
+
+
+def _is_cacheable_translation(result: str | None) -> bool:
+    return bool(result) and not result.startswith("Error:")
+
+
+class TranslatedSegment(BaseModel):
+    id: int = Field(description="The id of the input segment this translation belongs to.")
+    translation: str = Field(description="The translated text of that segment only.")
+
+
+class SegmentTranslationsOutput(BaseModel):
+    segments: List[TranslatedSegment] = Field(description="Exactly one entry per input segment, same ids.")
+
+
+async def translate_segments_lc(
+    segments: List[str], source_language_name: str, target_language_name: str,
+    dialect_context_hint: str | None = None,
+    context_hint_for_translation: str | None = None
+) -> List[str | None]:
+    """
+    Translates several independent segments with one LLM call and returns them aligned with the input.
+    Leading/trailing whitespace of each segment is kept as-is. Cached segments are not re-sent; if the
+    batched call fails or its output does not line up with the input, the remaining segments are
+    translated concurrently through translate_text_lc(). Failed segments come back as "Error: ..." like there.
+    """
+    results: List[str | None] = [None] * len(segments)
+    pending: Dict[int, tuple[str, str, str]] = {} # segment id -> (leading ws, text, trailing ws)
+    for i, segment in enumerate(segments):
+        text = (segment or "").strip()
+        if not text:
+            results[i] = segment or ""
+            continue
+        leading = segment[:len(segment) - len(segment.lstrip())]
+        trailing = segment[len(segment.rstrip()):]
+        cached = translation_cache.get(_translation_cache_key(
+            text, source_language_name, target_language_name, dialect_context_hint, context_hint_for_translation))
+        if cached is not None:
+            results[i] = f"{leading}{cached}{trailing}"
+        else:
+            pending[i] = (leading, text, trailing)
+    if not pending:
+        return results
+
+    translated: Dict[int, str] = {}
+    translate_llm = get_llm("translate")
+    if len(pending) > 1 and translate_llm:
+        try:
+            structured_llm = translate_llm.with_structured_output(SegmentTranslationsOutput)
+            effective_source_lang_desc = _effective_source_language(source_language_name, dialect_context_hint)
+            system_prompt_parts = ["You are an expert multilingual translator."]
+            if context_hint_for_translation:
+                system_prompt_parts.append(f"The texts to translate are related to: {context_hint_for_translation}.")
+            system_prompt_parts.append(
+                f"You will receive a JSON list of independent segments, each with an id. Translate every segment "
+                f"accurately and naturally from {effective_source_lang_desc} to {target_language_name}, "
+                f"preserving meaning, tone and any Markdown. Do not merge, split, reorder or drop segments. "
+                f"Return one entry per input id, containing only the translated text of that segment."
+            )
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", " ".join(system_prompt_parts)),
+                ("human", "Segments:\n{segments_json}")
+            ])
+            chain = prompt | structured_llm
+            data: SegmentTranslationsOutput = await _scheduled("translate", prompt, {
+                "segments_json": json.dumps([{"id": i, "text": text} for i, (_, text, _) in pending.items()], ensure_ascii=False)
+            }, chain.ainvoke, _translation_call_site(target_language_name, batched=True))
+            by_id = {item.id: item.translation.strip() for item in data.segments if item.translation and item.translation.strip()}
+            if set(by_id) == set(pending):
+                translated = by_id
+                log.info(f"LC Segment translation to {target_language_name}: {len(pending)} segments in one call.")
+            else:
+                log.warning(f"LC Segment translation to {target_language_name} returned ids {sorted(by_id)} for "
+                            f"{sorted(pending)}. Falling back to per-segment calls.")
+        except Exception as e:
+            log.error(f"LC Segment translation failed for {len(pending)} segments: {e}. Falling back to per-segment calls.", exc_info=True)
+
+    if translated:
+        for i, text in translated.items():
+            translation_cache.put(_translation_cache_key(
+                pending[i][1], source_language_name, target_language_name, dialect_context_hint, context_hint_for_translation), text)
+    else:
+        ids = list(pending)
+        per_segment = await asyncio.gather(*(
+            translate_text_lc(pending[i][1], source_language_name, target_language_name,
+                              dialect_context_hint, context_hint_for_translation)
+            for i in ids
+        ))
+        translated = dict(zip(ids, per_segment))
+
+    for i, (leading, _, trailing) in pending.items():
+        text = translated.get(i)
+        results[i] = f"{leading}{text}{trailing}" if _is_cacheable_translation(text) else text
+    return results
 
 
 async def call_groq_llm_final_answer_lc(
@@ -95,7 +301,9 @@ async def call_groq_llm_final_answer_lc(
     dialect_context_hint: str | None = None,
     memory_messages: List[BaseMessage] | None = None, # Updated type hint
     system_prompt_template_str: str | None = None,
+    call_site: str = "final_answer", # Metrics label, see llm_metrics.py
 ) -> str | None:
+    chat_llm = get_llm("chat")
     if not chat_llm:
         log.error("Chat LLM not initialized. Cannot generate final answer.")
         return "Error: Chat service unavailable."
@@ -141,7 +349,7 @@ async def call_groq_llm_final_answer_lc(
         input_dict["history"] = memory_messages
 
     try:
-        response = await chain.ainvoke(input_dict)
+        response = await _scheduled("chat", prompt, input_dict, lambda inputs, config: invoke_chain(chain, inputs, config), call_site)
         log.info(f"LC Final Answer (target: {target_language_name}, input: '{user_context_for_current_turn[:50]}...'): '{str(response)[:100]}...'")
         return response
     except Exception as e:
@@ -150,6 +358,7 @@ async def call_groq_llm_final_answer_lc(
 
 
 async def generate_hypothetical_document_lc(user_query_english: str) -> str | None:
+    hyde_llm = get_llm("hyde")
     if not hyde_llm:
         log.error("HyDE LLM not initialized. Cannot generate hypothetical document.")
         return "Error: HyDE service unavailable."
@@ -163,7 +372,7 @@ async def generate_hypothetical_document_lc(user_query_english: str) -> str | No
     ])
     chain = prompt | hyde_llm | StrOutputParser()
     try:
-        response = await chain.ainvoke({"user_query_english": user_query_english})
+        response = await _scheduled("hyde", prompt, {"user_query_english": user_query_english}, chain.ainvoke, "hyde")
         if response:
             response = response.replace('"', '').replace("'", '').replace("Title:", "").strip()
             log.info(f"LC HyDE generation successful: '{response}' for query '{user_query_english[:50]}...'")
@@ -174,6 +383,42 @@ async def generate_hypothetical_document_lc(user_query_english: str) -> str | No
         return f"Error: HyDE LLM call failed."
 
 
+async def summarize_conversation_lc(
+    previous_summary: str | None, messages: List[BaseMessage], max_summary_tokens: int = 250
+) -> str | None:
+    """Folds `messages` into the rolling conversation summary (see conversation_memory.py). None on failure."""
+    summarize_llm = get_llm("summarize")
+    if not summarize_llm:
+        log.error("Summarize LLM not initialized. Cannot compact conversation memory.")
+        return None
+    transcript = "\n".join(
+        f"{'User' if msg.type == 'human' else 'Assistant'}: {msg.content}" for msg in messages if msg.type in ("human", "ai")
+    )
+    if not transcript:
+        return previous_summary
+    system_prompt = (
+        "You maintain a running summary of a conversation between a user and a TV troubleshooting assistant. "
+        "Update the existing summary with the new messages. Keep facts the assistant will need later: TV models, "
+        "the problems described, steps already suggested and their outcome, the user's language and preferences. "
+        "Drop greetings and formatting. Write plain English prose, at most {max_words} words. "
+        "Reply with the updated summary only."
+    )
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        ("human", "Existing summary:\n{previous_summary}\n\nNew messages:\n{transcript}\n\nUpdated summary:")
+    ])
+    chain = prompt | summarize_llm | StrOutputParser()
+    inputs = {"max_words": int(max_summary_tokens * 0.75), "previous_summary": previous_summary or "(none yet)", "transcript": transcript}
+    try:
+        response = await _scheduled("summarize", prompt, inputs, chain.ainvoke, "summarize_memory")
+        response = (response or "").strip()
+        log.info(f"LC Summarize: {len(messages)} messages -> {len(response)} chars.")
+        return response or None
+    except Exception as e:
+        log.error(f"LC Summarize LLM call failed: {e}", exc_info=True)
+        return None
+
+
 class MainIntentOutput(BaseModel):
     intent: str = Field(description=(
         "Classify the user's primary intent. Categories: "
@@ -194,6 +439,7 @@ async def classify_main_intent_and_extract_model_lc(
     dialect_context_hint: str | None = None,
     chat_history_summary_for_intent: str | None = None 
 ) -> MainIntentOutput | None:
+    classify_llm = get_llm("classify")
     if not classify_llm:
         log.error("Classify LLM not initialized. Cannot classify main intent.")
         return None # Or return MainIntentOutput(intent='other_unclear', extracted_model_if_any=None)
@@ -222,7 +468,7 @@ async def classify_main_intent_and_extract_model_lc(
     chain = prompt | structured_llm_intent
 
     try:
-        response_data: MainIntentOutput = await chain.ainvoke({"query": user_query})
+        response_data: MainIntentOutput = await _scheduled("classify", prompt, {"query": user_query}, chain.ainvoke, "classify_main_intent")
         log.info(f"LC Main Intent: Intent='{response_data.intent}', Model='{response_data.extracted_model_if_any}' for query: '{user_query[:50]}...'")
         
         if response_data.extracted_model_if_any:
@@ -251,6 +497,7 @@ async def classify_follow_up_intent_lc(
     dialect_context_hint: str | None = None,
     memory_messages: List[BaseMessage] | None = None, # Updated type hint
 ) -> tuple[str, str | None]: 
+    classify_llm = get_llm("classify")
     if not classify_llm:
         log.error("Classify LLM (follow-up) not initialized.")
         return "unclear_or_other", None
@@ -289,7 +536,7 @@ Respond ONLY with a valid JSON object matching the defined schema.
         input_dict["history"] = memory_messages
     
     try:
-        data: FollowUpIntentOutput = await chain.ainvoke(input_dict)
+        data: FollowUpIntentOutput = await _scheduled("classify", prompt, input_dict, chain.ainvoke, "classify_follow_up")
         intent_cat = data.intent
         extracted_mod_candidate = data.extracted_model
 
@@ -6,6 +6,7 @@ try:
     from groq_api import call_groq_llm_final_answer_lc as call_groq_llm_final_answer
     from session_manager import ChatSession
     from utils import extract_tv_model_from_query # <--- CHANGE THIS IMPORT
+    from catalog_index import ModelCatalog
 except ImportError as e:
     print(f"CRITICAL IMPORT ERROR in image_handler.py: {e}. Application will likely fail.", file=sys.stderr)
     raise
@@ -28,7 +29,7 @@ async def format_component_info_for_llm(
                     f"but active session model is '{session.active_tv_model}'. Using active session model for display.")
         model_name_for_display = session.active_tv_model
 
-    lc_memory_messages = session.get_lc_memory_messages()
+    lc_memory_messages = session.get_lc_memory_messages("media")
 
     if not tv_model_data or "key_components" not in tv_model_data or not tv_model_data.get("key_components"):
         log.warning(f"IMAGE_HANDLER_FORMAT: No key component info for model {model_name_for_display}")
@@ -39,6 +40,7 @@ async def format_component_info_for_llm(
             target_language_name=target_language_name,
             dialect_context_hint=dialect_hint,
             memory_messages=lc_memory_messages,
+            call_site="media_answer",
         ) 
 
     components = tv_model_data.get("key_components", [])
@@ -81,7 +83,8 @@ async def format_component_info_for_llm(
         target_language_name=target_language_name,
         dialect_context_hint=dialect_hint,
         memory_messages=lc_memory_messages, 
-        system_prompt_template_str=system_prompt_template
+        system_prompt_template_str=system_prompt_template,
+        call_site="media_answer"
     )
 
 
@@ -90,12 +93,13 @@ async def handle_image_component_query(
     session: ChatSession,
     data_store, 
     components_data_store, 
-    image_base_path: str
+    image_base_path: str,
+    model_catalog: ModelCatalog, # The knowledge base snapshot's catalog; never rebuilt per request
 ) -> str | None: 
     target_lang_name = session.current_language_name
     dialect_hint = session.last_detected_dialect_info
     active_model_for_this_request = session.active_tv_model 
-    lc_memory_messages = session.get_lc_memory_messages()
+    lc_memory_messages = session.get_lc_memory_messages("media")
 
     model_mentioned_in_query = extract_tv_model_from_query(user_query)
     if model_mentioned_in_query and model_mentioned_in_query != active_model_for_this_request:
@@ -131,16 +135,16 @@ async def handle_image_component_query(
         general_model_images_to_use = session.current_model_general_images
     else: 
         if data_store and active_model_for_this_request:
-            model_entry_for_images = next((item for item in data_store if item.get("model","").upper() == active_model_for_this_request.upper() and item.get("images")), None)
-            if model_entry_for_images and model_entry_for_images.get("images"):
-                general_model_images_to_use = model_entry_for_images.get("images")
+            model_general_images = model_catalog.general_images(active_model_for_this_request)
+            if model_general_images:
+                general_model_images_to_use = model_general_images
                 if session.active_tv_model == active_model_for_this_request:
                     session.current_model_general_images = general_model_images_to_use
                 log.info(f"IMAGE_HANDLER: Loaded general images for model '{active_model_for_this_request}'.")
             else:
                 log.warning(f"IMAGE_HANDLER: Could not find general images for model '{active_model_for_this_request}' in data_store.")
 
-    model_specific_component_data = next((item for item in (components_data_store or []) if item.get("tv_model","").upper() == active_model_for_this_request.upper()), None)
+    model_specific_component_data = model_catalog.component_entry(active_model_for_this_request)
 
     image_definitions = [
         {"type_en": "Motherboard Image", "keywords_en": ["motherboard image", "main board image", "logic board image", "carte mere image"], "data_key": "motherboard", "source": "general"},
@@ -259,7 +263,8 @@ async def handle_image_component_query(
             target_language_name=target_lang_name,
             dialect_context_hint=dialect_hint,
             memory_messages=lc_memory_messages, 
-            system_prompt_template_str=system_prompt_template
+            system_prompt_template_str=system_prompt_template,
+            call_site="media_answer"
         )
 
     elif is_asking_for_list_explicitly and model_specific_component_data :
@@ -294,5 +299,6 @@ async def handle_image_component_query(
             target_language_name=target_lang_name, 
             dialect_context_hint=dialect_hint,
             memory_messages=lc_memory_messages, 
-            system_prompt_template_str=system_prompt_clarify
+            system_prompt_template_str=system_prompt_clarify,
+            call_site="media_clarification"
         )
\ No newline at end of file
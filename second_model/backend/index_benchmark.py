@@ -0,0 +1,210 @@
+# backend/index_benchmark.py
+"""
+Recall@k, query-latency and memory report for the RAG index backends in vector_search.py.
+
+Every backend is compared against exact cosine search over the same embeddings. Issue titles
+are indexed; step descriptions from data.json serve as realistic, differently-worded queries.
+Compressed backends (sq8, pq, pca) are reported twice: raw, and with the exact float32 re-rank
+that vector_search applies in production (RAG_RERANK_FACTOR x k candidates). "index MB" is the
+serialized size of the index a worker keeps in memory; the float32 embeddings used for re-ranking
+are memory-mapped from the index artifact and shared by all workers.
+
+Usage:
+    python index_benchmark.py [--k 5] [--nprobe 1,4,8,16] [--ef-search 16,32,64,128] [--rerank-factor 4] [--scale 50]
+
+--scale N replicates the catalog N times with small random perturbations, to preview how the
+sublinear backends behave once the catalog holds thousands of issues.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+import vector_search
+from vector_search import (
+    create_index_from_embeddings,
+    apply_search_params,
+    backend_is_compressed,
+    exact_rerank,
+    index_build_params,
+    load_data,
+    prepare_embeddings_for_backend,
+    prepare_query_embeddings,
+)
+
+log = logging.getLogger(__name__)
+
+
+def _percentile_ms(samples_seconds: list, percentile: float) -> float:
+    return float(np.percentile(np.asarray(samples_seconds) * 1000.0, percentile)) if samples_seconds else 0.0
+
+
+def _exact_neighbours(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    exact = faiss.IndexFlatIP(embeddings.shape[1])
+    exact.add(embeddings)
+    _, neighbours = exact.search(queries, k)
+    return neighbours
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    return int(faiss.serialize_index(index).nbytes)
+
+def evaluate_index(
+    index: faiss.Index,
+    queries: np.ndarray,
+    exact_neighbours: np.ndarray,
+    k: int,
+    rerank_embeddings: np.ndarray | None = None,
+    rerank_factor: int = 1,
+) -> dict:
+    """
+    Times one query at a time (as in production) and measures recall@k against exact search.
+    With rerank_embeddings, rerank_factor x k candidates are fetched and re-ranked exactly.
+    """
+    latencies = []
+    hits = 0
+    for i in range(queries.shape[0]):
+        query = prepare_query_embeddings(queries[i:i + 1], index)
+        start = time.perf_counter()
+        if rerank_embeddings is not None:
+            _, candidates = index.search(query, min(k * rerank_factor, index.ntotal))
+            _, rows = exact_rerank(rerank_embeddings, query, candidates, k, index.metric_type)
+        else:
+            _, rows = index.search(query, k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(int(r) for r in rows[0] if r >= 0) & set(int(r) for r in exact_neighbours[i]))
+    return {
+        "recall_at_k": hits / float(k * queries.shape[0]) if queries.shape[0] else 0.0,
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p99_ms": _percentile_ms(latencies, 99),
+    }
+
+
+def run_index_report(
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    k: int = 5,
+    nprobe_values: tuple = (1, 4, 8, 16),
+    ef_search_values: tuple = (16, 32, 64, 128),
+    rerank_factor: int = vector_search.RERANK_FACTOR,
+) -> list[dict]:
+    """Builds each backend over `embeddings` and returns one result row per (backend, search knob)."""
+    cosine_embeddings = prepare_embeddings_for_backend(embeddings, "flat_ip")
+    cosine_queries = prepare_embeddings_for_backend(queries, "flat_ip")
+    k = min(k, cosine_embeddings.shape[0])
+    exact_neighbours = _exact_neighbours(cosine_embeddings, cosine_queries, k)
+
+    rows = []
+    for backend in vector_search.SUPPORTED_INDEX_BACKENDS:
+        backend_embeddings = prepare_embeddings_for_backend(embeddings, backend)
+        build_params = index_build_params(backend_embeddings.shape[0], backend)
+        build_start = time.perf_counter()
+        index = create_index_from_embeddings(backend_embeddings, backend, build_params)
+        build_seconds = time.perf_counter() - build_start
+        memory_bytes = index_memory_bytes(index)
+
+        if backend == "ivf_flat":
+            knob_name, knob_values = "nprobe", [v for v in nprobe_values if v <= build_params["nlist"]] or [build_params["nlist"]]
+        elif backend == "hnsw":
+            knob_name, knob_values = "efSearch", list(ef_search_values)
+        elif backend_is_compressed(backend):
+            knob_name, knob_values = "rerank", [0, rerank_factor]
+        else:
+            knob_name, knob_values = None, [None]
+
+        for knob_value in knob_values:
+            if knob_name == "nprobe":
+                apply_search_params(index, nprobe=knob_value)
+            elif knob_name == "efSearch":
+                apply_search_params(index, ef_search=knob_value)
+            if knob_name == "rerank" and knob_value:
+                result = evaluate_index(index, queries, exact_neighbours, k, backend_embeddings, knob_value)
+            else:
+                result = evaluate_index(index, queries, exact_neighbours, k)
+            result.update({
+                "backend": backend,
+                "build_params": build_params,
+                "search_param": f"{knob_name}={knob_value}" if knob_name else "-",
+                "build_s": build_seconds,
+                "memory_bytes": memory_bytes,
+            })
+            rows.append(result)
+    return rows
+
+
+def format_report(rows: list[dict], k: int, num_vectors: int, num_queries: int) -> str:
+    lines = [
+        f"Index backend report: {num_vectors} vectors, {num_queries} queries, k={k} (recall vs exact cosine search)",
+        f"{'backend':<10} {'build params':<28} {'search':<14} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8} "
+        f"{'index MB':>9} {'B/vector':>9}",
+    ]
+    for row in rows:
+        build_params_str = ",".join(f"{key}={value}" for key, value in row["build_params"].items()) or "-"
+        lines.append(
+            f"{row['backend']:<10} {build_params_str:<28} {row['search_param']:<14} "
+            f"{row['recall_at_k']:>9.3f} {row['p50_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['build_s']:>8.3f} "
+            f"{row['memory_bytes'] / 1e6:>9.3f} {row['memory_bytes'] / max(num_vectors, 1):>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def _scale_embeddings(embeddings: np.ndarray, factor: int, noise: float = 0.05, seed: int = 0) -> np.ndarray:
+    if factor <= 1:
+        return embeddings
+    rng = np.random.default_rng(seed)
+    copies = [embeddings] + [
+        embeddings + rng.normal(0.0, noise, size=embeddings.shape).astype('float32') for _ in range(factor - 1)
+    ]
+    return np.ascontiguousarray(np.vstack(copies), dtype='float32')
+
+
+def _step_description_queries(data: list) -> list:
+    queries = []
+    for item in data:
+        for step in item.get("steps") or []:
+            description = step.get("description") if isinstance(step, dict) else None
+            if description and description.strip() and description.strip() not in queries:
+                queries.append(description.strip())
+    return queries
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare RAG index backends on data.json.")
+    parser.add_argument("--data", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), os.getenv("RAG_DATA_FILE", "data.json")))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", default="1,4,8,16")
+    parser.add_argument("--ef-search", default="16,32,64,128")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--max-queries", type=int, default=500)
+    parser.add_argument("--rerank-factor", type=int, default=vector_search.RERANK_FACTOR)
+    args = parser.parse_args(argv)
+
+    data = load_data(args.data)
+    if not data:
+        print(f"No data could be loaded from {args.data}.", file=sys.stderr)
+        return 1
+
+    issue_texts = [item["issue"] for item in data]
+    query_texts = _step_description_queries(data)[:args.max_queries] or issue_texts
+    encoder = vector_search.get_sentence_model()
+    embeddings = encoder.encode(issue_texts, show_progress_bar=False, convert_to_numpy=True).astype('float32')
+    queries = encoder.encode(query_texts, show_progress_bar=False, convert_to_numpy=True).astype('float32')
+    embeddings = _scale_embeddings(embeddings, args.scale)
+
+    rows = run_index_report(
+        embeddings, queries, k=args.k,
+        nprobe_values=tuple(int(v) for v in args.nprobe.split(",") if v.strip()),
+        ef_search_values=tuple(int(v) for v in args.ef_search.split(",") if v.strip()),
+        rerank_factor=max(1, args.rerank_factor),
+    )
+    print(format_report(rows, min(args.k, embeddings.shape[0]), embeddings.shape[0], queries.shape[0]))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+    sys.exit(main())
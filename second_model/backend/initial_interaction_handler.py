@@ -1,5 +1,7 @@
 # backend/initial_interaction_handler.py
+import asyncio
 import logging
+import os
 # import re # No longer needed here if extract_tv_model_from_query is moved
 import sys
 
@@ -12,11 +14,14 @@ try:
     # from language_handler import get_localized_keywords # If still needed for specific keyword checks
     from troubleshooting_handler import (
         handle_specific_tv_troubleshooting, 
-        handle_standard_tv_troubleshooting  
+        handle_standard_tv_troubleshooting
     )
     # from image_handler import handle_image_component_query # REMOVE THIS IMPORT
     from knowledge_handler import handle_general_knowledge_query
     from utils import extract_tv_model_from_query # <--- ADD THIS IMPORT
+    from turn_trace import trace_stage
+    from intent_classifier import LOCAL_INTENT_CLASSIFIER_ENABLED, IntentPrediction, local_intent_classifier
+    from retrieval_executor import retrieval_executor
 except ImportError as e:
     # Ensure sys is imported if you use sys.stderr here
     print(f"CRITICAL IMPORT ERROR in initial_interaction_handler.py: {e}. Application will likely fail.", file=sys.stderr)
@@ -24,33 +29,106 @@ except ImportError as e:
 
 log = logging.getLogger(__name__)
 
+# Start main-intent classification during language detection, whose result it only needs if the
+# session language does not change. An unused classification is cancelled.
+TURN_SPECULATION_ENABLED = os.getenv("TURN_SPECULATION_ENABLED", "true").lower() == "true"
+
 # extract_tv_model_from_query FUNCTION IS NOW MOVED TO utils.py
 
+def _intent_history_summary(session: ChatSession) -> str | None:
+    lc_memory_messages = session.get_lc_memory_messages("classify")
+    if not lc_memory_messages:
+        return None
+    summary_parts = []
+    for msg in lc_memory_messages[-2:]: 
+        role = "User" if msg.type == "human" else ("Earlier" if msg.type == "system" else "Assistant") # system = rolling summary
+        summary_parts.append(f"{role}: {msg.content[:50]}...")
+    return " ".join(summary_parts)
+
+async def _classify_initial_intent(
+    user_input_raw: str, language_code: str, language_name: str, dialect_info: str | None, history_summary: str | None,
+    model_catalog=None
+) -> tuple[MainIntentOutput | None, IntentPrediction | None, bool]:
+    """
+    (intent, local prediction, whether the local prediction was used). The local classifier's stats are
+    recorded by the caller, only for the classification the turn actually uses (not discarded speculation).
+    """
+    with trace_stage("classify_intent"):
+        prediction = None
+        if LOCAL_INTENT_CLASSIFIER_ENABLED and local_intent_classifier.supports_language(language_code):
+            # Confident nearest-example predictions skip the LLM call entirely (see intent_classifier.py)
+            try:
+                prediction = await retrieval_executor.run(local_intent_classifier.predict, user_input_raw, model_catalog)
+            except Exception as e:
+                log.warning(f"INITIAL_HANDLER: Local intent classifier failed: {e}. Asking the LLM.", exc_info=True)
+            if local_intent_classifier.is_confident(prediction):
+                log.info(f"INITIAL_HANDLER: Local intent '{prediction.intent}' (model={prediction.model}, "
+                         f"confidence={prediction.confidence:.2f}, similarity={prediction.top_similarity:.2f}) for '{user_input_raw[:50]}'.")
+                return MainIntentOutput(intent=prediction.intent, extracted_model_if_any=prediction.model), prediction, True
+        intent_result = await classify_main_intent_and_extract_model_lc(
+            user_query=user_input_raw,
+            target_language_name=language_name,
+            dialect_context_hint=dialect_info,
+            chat_history_summary_for_intent=history_summary
+        )
+        return intent_result, prediction, False
+
+class SpeculativeIntent:
+    """
+    Main-intent classification started with the session's current language while language detection
+    is still running. Its result is used only if detection leaves the session language unchanged.
+    """
+    def __init__(self, session: ChatSession, user_input_raw: str, model_catalog=None):
+        self.user_input_raw = user_input_raw
+        self.language_code = session.current_language
+        self.language_name = session.current_language_name
+        self.dialect_info = session.last_detected_dialect_info
+        self.task = asyncio.create_task(_classify_initial_intent(
+            user_input_raw, self.language_code, self.language_name, self.dialect_info, _intent_history_summary(session),
+            model_catalog))
+
+    def matches(self, session: ChatSession, user_input_raw: str) -> bool:
+        return (user_input_raw == self.user_input_raw and
+                session.current_language == self.language_code and
+                session.current_language_name == self.language_name and
+                session.last_detected_dialect_info == self.dialect_info)
+
+    def cancel(self) -> None:
+        if not self.task.done():
+            self.task.cancel()
+
+def start_speculative_intent(session: ChatSession, user_input_raw: str, model_catalog=None) -> SpeculativeIntent | None:
+    """Starts intent classification early if this turn is going to be routed to handle_initial_query()."""
+    if not TURN_SPECULATION_ENABLED or user_input_raw.startswith("/"):
+        return None
+    if session.get_expectation() or session.in_troubleshooting_flow or session.active_tv_model:
+        return None
+    return SpeculativeIntent(session, user_input_raw, model_catalog)
+
 async def handle_initial_query(
     session: ChatSession,
     user_input_raw: str, 
     data_store, index_store, text_to_original_data_idx_map_store,
-    components_data_store, image_base_path: str # image_base_path might not be needed here anymore
+    components_data_store, image_base_path: str, # image_base_path might not be needed here anymore
+    model_catalog,
+    speculative_intent: SpeculativeIntent | None = None,
 ) -> str | None: # Returns ENGLISH core response or localized Markdown
     log.info(f"INITIAL_HANDLER: Processing initial query: '{user_input_raw[:50]}...' Lang: {session.current_language_name}")
-    
     assistant_response_content: str | None = None 
 
-    lc_memory_messages = session.get_lc_memory_messages()
-    history_summary_for_intent = None
-    if lc_memory_messages:
-        summary_parts = []
-        for msg in lc_memory_messages[-2:]: 
-            role = "User" if msg.type == "human" else "Assistant"
-            summary_parts.append(f"{role}: {msg.content[:50]}...")
-        history_summary_for_intent = " ".join(summary_parts)
-
-    intent_result: MainIntentOutput | None = await classify_main_intent_and_extract_model_lc(
-        user_query=user_input_raw,
-        target_language_name=session.current_language_name,
-        dialect_context_hint=session.last_detected_dialect_info,
-        chat_history_summary_for_intent=history_summary_for_intent
-    )
+    if speculative_intent and speculative_intent.matches(session, user_input_raw):
+        intent_result, local_prediction, used_locally = await speculative_intent.task
+        log.debug("INITIAL_HANDLER: Using speculative intent classification.")
+    else:
+        if speculative_intent:
+            speculative_intent.cancel()
+            log.debug("INITIAL_HANDLER: Session language changed during detection; discarding speculative intent classification.")
+        intent_result, local_prediction, used_locally = await _classify_initial_intent(
+            user_input_raw, session.current_language, session.current_language_name, session.last_detected_dialect_info,
+            _intent_history_summary(session), model_catalog
+        )
+    if LOCAL_INTENT_CLASSIFIER_ENABLED:
+        local_intent_classifier.record(local_prediction, used_locally)
 
     if not intent_result: 
         log.error("INITIAL_HANDLER: Main intent classification failed critically. Falling back.")
@@ -91,7 +169,7 @@ async def handle_initial_query(
                 session=session, 
                 data_store=data_store, index_store=index_store,
                 text_to_original_data_idx_map_store=text_to_original_data_idx_map_store,
-                components_data_store=components_data_store
+                components_data_store=components_data_store, model_catalog=model_catalog
             )
         else: 
             log.warning(f"INITIAL_HANDLER: Intent was 'specific_tv_troubleshooting' but no model identified. Routing to Standard Troubleshooting and asking for model.")
@@ -112,7 +190,8 @@ async def handle_initial_query(
             from image_handler import handle_image_component_query 
             assistant_response_content = await handle_image_component_query(
                 user_query=user_input_raw, session=session, data_store=data_store,
-                components_data_store=components_data_store, image_base_path=image_base_path
+                components_data_store=components_data_store, image_base_path=image_base_path,
+                model_catalog=model_catalog
             )
             if assistant_response_content: 
                 session.start_troubleshooting_flow(f"Media request: {user_input_raw[:30]}", active_model_for_handler)
@@ -128,7 +207,8 @@ async def handle_initial_query(
 
     elif intent_category == 'general_question':
         log.info("INITIAL_HANDLER: Routing to General Knowledge Query.")
-        assistant_response_content = await handle_general_knowledge_query(user_input_raw, session)
+        # The only route whose questions are self-contained enough to share answers across sessions.
+        assistant_response_content = await handle_general_knowledge_query(user_input_raw, session, use_semantic_cache=True)
 
     elif intent_category == 'follow_up_clarification':
         log.warning("INITIAL_HANDLER: Intent 'follow_up_clarification' received without prior expectation. Treating as general query or asking to rephrase.")
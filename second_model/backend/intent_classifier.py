@@ -0,0 +1,235 @@
+# backend/intent_classifier.py
+"""
+Local main-intent classifier, tried before classify_main_intent_and_extract_model_lc().
+
+A k-nearest-neighbour vote over a labeled example set (intent_examples.json, or
+INTENT_EXAMPLES_FILE) embedded with the RAG sentence encoder. Model names are masked before
+embedding and the model is taken from the catalog matcher (ModelCatalog.find_in_text, then the
+regex heuristic in utils), so the vote only decides the intent family:
+
+    tv_troubleshooting -> specific_tv_troubleshooting if a model was found, else standard_tv_troubleshooting
+    media_request      -> media_request_model_specific if a model was found, else media_request_generic
+    general_question, follow_up_clarification, other_unclear -> themselves
+
+Predictions below LOCAL_INTENT_MIN_CONFIDENCE (similarity-weighted vote share) or whose nearest
+example is less similar than LOCAL_INTENT_MIN_SIMILARITY are left to the LLM, and so are turns in
+a language the encoder was not trained on (vector_search.encoder_supports_language): the default
+all-MiniLM-L6-v2 is English-only. Accuracy and the share of LLM calls saved are measured offline
+with intent_eval.py, per language.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+import faiss
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+LOCAL_INTENT_CLASSIFIER_ENABLED = os.getenv("LOCAL_INTENT_CLASSIFIER_ENABLED", "true").lower() == "true"
+LOCAL_INTENT_MIN_CONFIDENCE = float(os.getenv("LOCAL_INTENT_MIN_CONFIDENCE", "0.8"))
+LOCAL_INTENT_MIN_SIMILARITY = float(os.getenv("LOCAL_INTENT_MIN_SIMILARITY", "0.55")) # Cosine similarity of the nearest example
+LOCAL_INTENT_K = int(os.getenv("LOCAL_INTENT_K", "7"))
+INTENT_EXAMPLES_FILE = os.getenv("INTENT_EXAMPLES_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_examples.json"))
+
+INTENT_FAMILIES = {
+    "general_question": "general_question",
+    "standard_tv_troubleshooting": "tv_troubleshooting",
+    "specific_tv_troubleshooting": "tv_troubleshooting",
+    "media_request_model_specific": "media_request",
+    "media_request_generic": "media_request",
+    "follow_up_clarification": "follow_up_clarification",
+    "other_unclear": "other_unclear",
+}
+_MODEL_FAMILIES = ("tv_troubleshooting", "media_request") # Families whose intent depends on whether a model was named
+MODEL_PLACEHOLDER = "TV"
+
+
+@dataclass(frozen=True)
+class IntentPrediction:
+    intent: str             # One of the MainIntentOutput categories
+    model: str | None
+    confidence: float       # Similarity-weighted share of the k votes won by the intent's family
+    top_similarity: float   # Cosine similarity of the nearest example
+
+
+def load_intent_examples(path: str = INTENT_EXAMPLES_FILE) -> list[tuple[str, str]]:
+    """Reads {intent: [example, ...]} and returns (text, intent) pairs, skipping unknown intents."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    examples = []
+    for intent, texts in raw.items():
+        if intent not in INTENT_FAMILIES:
+            log.warning(f"INTENT_CLASSIFIER: Ignoring examples for unknown intent '{intent}' in {path}.")
+            continue
+        examples.extend((text.strip(), intent) for text in texts if isinstance(text, str) and text.strip())
+    return examples
+
+
+def match_model(text: str, model_catalog=None) -> str | None:
+    """Catalog models named in the text win; otherwise the regex heuristic used everywhere else."""
+    if model_catalog is not None:
+        model = model_catalog.find_in_text(text)
+        if model:
+            return model.strip().upper()
+    from utils import extract_tv_model_from_query
+
+    model = extract_tv_model_from_query(text)
+    return model.strip().upper() if model else None
+
+
+def mask_model(text: str, model: str | None) -> str:
+    return re.sub(re.escape(model), MODEL_PLACEHOLDER, text, flags=re.IGNORECASE) if model else text
+
+
+def resolve_intent(family: str, model: str | None) -> str:
+    if family == "tv_troubleshooting":
+        return "specific_tv_troubleshooting" if model else "standard_tv_troubleshooting"
+    if family == "media_request":
+        return "media_request_model_specific" if model else "media_request_generic"
+    return family
+
+
+class LocalIntentClassifier:
+    def __init__(self, examples: list[tuple[str, str]] | None = None, k: int = LOCAL_INTENT_K):
+        self.k = max(1, k)
+        self._examples = examples
+        self._index: faiss.Index | None = None
+        self._families: list[str] = []
+        self._build_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.local_by_intent: dict[str, int] = {}
+        self.deferred = 0
+        self.total_predict_s = 0.0
+
+    @staticmethod
+    def supports_language(language_code: str | None) -> bool:
+        from vector_search import encoder_supports_language # Deferred, as in _embed()
+
+        return encoder_supports_language(language_code)
+
+    @staticmethod
+    def _embed(texts: list[str], use_query_cache: bool) -> np.ndarray | None:
+        import vector_search # Deferred: importing vector_search pulls in the encoder stack
+
+        if use_query_cache:
+            embeddings = vector_search.encode_queries(texts)
+            if embeddings is None:
+                return None
+        else:
+            embeddings = vector_search.get_sentence_model().encode(texts, show_progress_bar=False, convert_to_numpy=True)
+        vectors = np.array(embeddings, dtype='float32') # Copy: encode_queries may return cached arrays
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def build(self) -> bool:
+        """Embeds the example set once (also done lazily by the first predict()). Returns True when ready."""
+        if self._index is not None:
+            return True
+        with self._build_lock:
+            if self._index is not None:
+                return True
+            examples = self._examples if self._examples is not None else load_intent_examples()
+            if not examples:
+                log.error("INTENT_CLASSIFIER: No labeled examples; every query will go to the LLM.")
+                return False
+            texts = [mask_model(text, match_model(text)) for text, _ in examples]
+            vectors = self._embed(texts, use_query_cache=False)
+            if vectors is None:
+                return False
+            index = faiss.IndexFlatIP(vectors.shape[1])
+            index.add(vectors)
+            self._families = [INTENT_FAMILIES[intent] for _, intent in examples]
+            self._index = index
+            log.info(f"INTENT_CLASSIFIER: Indexed {len(examples)} labeled examples "
+                     f"({len(set(self._families))} intent families, k={self.k}).")
+            return True
+
+    def _vote(self, scores, rows, skip_row: int | None = None) -> tuple[str | None, float, float]:
+        neighbours = [(float(score), int(row)) for score, row in zip(scores, rows) if row >= 0 and row != skip_row][:self.k]
+        if not neighbours:
+            return None, 0.0, 0.0
+        weights: dict[str, float] = {}
+        for score, row in neighbours:
+            weights[self._families[row]] = weights.get(self._families[row], 0.0) + max(score, 0.0)
+        total = sum(weights.values())
+        family = max(weights, key=weights.get)
+        return family, (weights[family] / total if total else 0.0), neighbours[0][0]
+
+    def predict(self, text: str, model_catalog=None) -> IntentPrediction | None:
+        """Nearest-example vote for `text`. Returns None if the classifier could not be built or the text is empty."""
+        if not text or not text.strip() or not self.build():
+            return None
+        started_at = time.perf_counter()
+        model = match_model(text, model_catalog)
+        vector = self._embed([mask_model(text.strip(), model)], use_query_cache=True)
+        if vector is None:
+            return None
+        scores, rows = self._index.search(vector, min(self.k, self._index.ntotal))
+        family, confidence, top_similarity = self._vote(scores[0], rows[0])
+        with self._stats_lock:
+            self.total_predict_s += time.perf_counter() - started_at
+        if family is None:
+            return None
+        if model and family not in _MODEL_FAMILIES:
+            # A model name in a question the vote calls general/unclear is exactly the kind of case the LLM should see
+            confidence = min(confidence, 0.5)
+        return IntentPrediction(resolve_intent(family, model), model if family in _MODEL_FAMILIES else None, confidence, top_similarity)
+
+    def leave_one_out(self) -> list[tuple[str, str, IntentPrediction | None]]:
+        """(text, expected intent, prediction) for every example, each classified without itself. Used by intent_eval.py."""
+        if not self.build():
+            return []
+        examples = self._examples if self._examples is not None else load_intent_examples()
+        texts = [text for text, _ in examples]
+        models = [match_model(text) for text in texts]
+        vectors = self._embed([mask_model(text, model) for text, model in zip(texts, models)], use_query_cache=False)
+        scores, rows = self._index.search(vectors, min(self.k + 1, self._index.ntotal))
+        results = []
+        for i, (text, expected) in enumerate(examples):
+            family, confidence, top_similarity = self._vote(scores[i], rows[i], skip_row=i)
+            if family is None:
+                results.append((text, expected, None))
+                continue
+            model = models[i] if family in _MODEL_FAMILIES else None
+            if models[i] and family not in _MODEL_FAMILIES:
+                confidence = min(confidence, 0.5)
+            results.append((text, expected, IntentPrediction(resolve_intent(family, models[i]), model, confidence, top_similarity)))
+        return results
+
+    def is_confident(self, prediction: IntentPrediction | None,
+                     min_confidence: float = LOCAL_INTENT_MIN_CONFIDENCE, min_similarity: float = LOCAL_INTENT_MIN_SIMILARITY) -> bool:
+        return prediction is not None and prediction.confidence >= min_confidence and prediction.top_similarity >= min_similarity
+
+    def record(self, prediction: IntentPrediction | None, used_locally: bool) -> None:
+        with self._stats_lock:
+            if used_locally:
+                self.local_by_intent[prediction.intent] = self.local_by_intent.get(prediction.intent, 0) + 1
+            else:
+                self.deferred += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            local = sum(self.local_by_intent.values())
+            total = local + self.deferred
+            return {
+                "enabled": LOCAL_INTENT_CLASSIFIER_ENABLED,
+                "ready": self._index is not None,
+                "examples": self._index.ntotal if self._index is not None else 0,
+                "k": self.k,
+                "min_confidence": LOCAL_INTENT_MIN_CONFIDENCE,
+                "min_similarity": LOCAL_INTENT_MIN_SIMILARITY,
+                "classified": total,
+                "local": local,
+                "local_by_intent": dict(sorted(self.local_by_intent.items())),
+                "deferred_to_llm": self.deferred,
+                "llm_calls_saved_rate": local / total if total else 0.0,
+                "avg_predict_ms": self.total_predict_s / total * 1000.0 if total else 0.0,
+            }
+
+
+local_intent_classifier = LocalIntentClassifier()
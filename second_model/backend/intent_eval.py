@@ -0,0 +1,207 @@
+# backend/intent_eval.py
+"""
+Offline evaluation of the local intent classifier (intent_classifier.py).
+
+Reports, for each confidence threshold, the share of queries answered locally (= main-intent
+LLM calls saved), the accuracy of those local answers, and per-intent accuracy at the
+configured threshold, overall and per query language (langdetect; Arabic script counts as
+"ar"). In production only languages the encoder supports are answered locally (see
+vector_search.encoder_supports_language). By default every labeled example is classified
+without itself (leave-one-out); --eval-file scores a separate held-out set in the same
+{intent: [texts]} format against a classifier built from the full example set.
+
+Usage:
+    python intent_eval.py [--eval-file held_out.json] [--thresholds 0.6,0.7,0.8,0.9] [--k 7] [--show-errors]
+    python intent_eval.py --compare-llm   # also asks classify_main_intent_and_extract_model_lc (needs GROQ_API_KEY)
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+from catalog_index import build_model_catalog
+from intent_classifier import (
+    INTENT_EXAMPLES_FILE,
+    LOCAL_INTENT_K,
+    LOCAL_INTENT_MIN_CONFIDENCE,
+    LOCAL_INTENT_MIN_SIMILARITY,
+    LocalIntentClassifier,
+    load_intent_examples,
+)
+
+log = logging.getLogger(__name__)
+
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+_ARABIC_SCRIPT = re.compile(r"[\u0600-\u06FF]")
+
+
+def query_language(text: str) -> str:
+    """Language code of a labeled query: "ar" for Arabic script (Darija included), else langdetect's guess."""
+    if _ARABIC_SCRIPT.search(text):
+        return "ar"
+    from langdetect import DetectorFactory, LangDetectException, detect
+
+    DetectorFactory.seed = 0
+    try:
+        return detect(text)
+    except LangDetectException:
+        return "unknown"
+
+
+def _held_out_predictions(classifier: LocalIntentClassifier, eval_examples: list, model_catalog) -> tuple[list, list]:
+    results, latencies = [], []
+    for text, expected in eval_examples:
+        started_at = time.perf_counter()
+        prediction = classifier.predict(text, model_catalog)
+        latencies.append(time.perf_counter() - started_at)
+        results.append((text, expected, prediction))
+    return results, latencies
+
+
+def threshold_report(results: list, thresholds: list[float], min_similarity: float, classifier: LocalIntentClassifier) -> list[dict]:
+    rows = []
+    for threshold in thresholds:
+        local = [(expected, prediction) for _, expected, prediction in results
+                 if classifier.is_confident(prediction, threshold, min_similarity)]
+        correct = sum(1 for expected, prediction in local if prediction.intent == expected)
+        rows.append({
+            "threshold": threshold,
+            "local": len(local),
+            "llm_calls_saved": len(local) / len(results) if results else 0.0,
+            "local_accuracy": correct / len(local) if local else 0.0,
+            "local_errors": len(local) - correct,
+        })
+    return rows
+
+
+def per_intent_report(results: list, threshold: float, min_similarity: float, classifier: LocalIntentClassifier) -> dict:
+    report: dict[str, dict] = {}
+    for _, expected, prediction in results:
+        row = report.setdefault(expected, {"examples": 0, "top1_correct": 0, "local": 0, "local_correct": 0})
+        row["examples"] += 1
+        correct = prediction is not None and prediction.intent == expected
+        row["top1_correct"] += int(correct)
+        if classifier.is_confident(prediction, threshold, min_similarity):
+            row["local"] += 1
+            row["local_correct"] += int(correct)
+    return dict(sorted(report.items()))
+
+
+def per_language_report(results: list, threshold: float, min_similarity: float, classifier: LocalIntentClassifier) -> dict:
+    report: dict[str, dict] = {}
+    for text, expected, prediction in results:
+        language = query_language(text)
+        row = report.setdefault(language, {"examples": 0, "top1_correct": 0, "local": 0, "local_correct": 0,
+                                           "served_locally": classifier.supports_language(language)})
+        row["examples"] += 1
+        correct = prediction is not None and prediction.intent == expected
+        row["top1_correct"] += int(correct)
+        if classifier.is_confident(prediction, threshold, min_similarity):
+            row["local"] += 1
+            row["local_correct"] += int(correct)
+    return dict(sorted(report.items()))
+
+
+async def _llm_agreement(results: list) -> dict:
+    from groq_api import classify_main_intent_and_extract_model_lc # Only this option needs the LLM
+
+    agree = llm_correct = answered = 0
+    for text, expected, prediction in results:
+        llm_result = await classify_main_intent_and_extract_model_lc(user_query=text, target_language_name="the user's language")
+        if llm_result is None:
+            continue
+        answered += 1
+        llm_correct += int(llm_result.intent == expected)
+        agree += int(prediction is not None and prediction.intent == llm_result.intent)
+    return {"answered": answered, "llm_accuracy": llm_correct / answered if answered else 0.0,
+            "local_llm_agreement": agree / answered if answered else 0.0}
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate the local intent classifier on labeled examples.")
+    parser.add_argument("--examples", default=INTENT_EXAMPLES_FILE, help="Labeled examples the classifier is built from.")
+    parser.add_argument("--eval-file", default=None, help="Held-out labeled set; leave-one-out over --examples when omitted.")
+    parser.add_argument("--thresholds", default="0.5,0.6,0.7,0.8,0.9,1.0")
+    parser.add_argument("--min-similarity", type=float, default=LOCAL_INTENT_MIN_SIMILARITY)
+    parser.add_argument("--k", type=int, default=LOCAL_INTENT_K)
+    parser.add_argument("--data", default=os.path.join(_BACKEND_DIR, os.getenv("RAG_DATA_FILE", "data.json")),
+                        help="RAG data used to build the model catalog for --eval-file.")
+    parser.add_argument("--components", default=os.path.join(_BACKEND_DIR, os.getenv("COMPONENTS_DATA_FILE", "key_components.json")))
+    parser.add_argument("--show-errors", action="store_true", help="List confident local predictions that were wrong.")
+    parser.add_argument("--compare-llm", action="store_true", help="Also classify every query with the LLM (needs GROQ_API_KEY).")
+    args = parser.parse_args(argv)
+
+    examples = load_intent_examples(args.examples)
+    if not examples:
+        print(f"No labeled examples could be loaded from {args.examples}.", file=sys.stderr)
+        return 1
+    classifier = LocalIntentClassifier(examples, k=args.k)
+    if not classifier.build():
+        print("The classifier could not be built (encoder unavailable?).", file=sys.stderr)
+        return 1
+
+    latencies = []
+    if args.eval_file:
+        from vector_search import load_data
+
+        eval_examples = load_intent_examples(args.eval_file)
+        model_catalog = build_model_catalog(load_data(args.data) or [], _load_components(args.components))
+        results, latencies = _held_out_predictions(classifier, eval_examples, model_catalog)
+        source = f"held-out set {args.eval_file}"
+    else:
+        results = classifier.leave_one_out()
+        source = f"leave-one-out over {args.examples}"
+
+    thresholds = [float(value) for value in args.thresholds.split(",") if value.strip()]
+    print(f"Local intent classifier: {len(results)} queries ({source}), k={args.k}, min similarity={args.min_similarity}")
+    top1 = sum(1 for _, expected, prediction in results if prediction is not None and prediction.intent == expected)
+    print(f"Top-1 accuracy (no threshold): {top1 / len(results) if results else 0.0:.3f}")
+    if latencies:
+        latencies.sort()
+        print(f"Predict latency: p50={latencies[len(latencies) // 2] * 1000:.1f} ms, max={latencies[-1] * 1000:.1f} ms")
+
+    print(f"\n{'threshold':>9} {'local':>6} {'LLM saved':>10} {'local acc':>10} {'errors':>7}")
+    for row in threshold_report(results, thresholds, args.min_similarity, classifier):
+        print(f"{row['threshold']:>9.2f} {row['local']:>6} {row['llm_calls_saved']:>10.1%} {row['local_accuracy']:>10.3f} {row['local_errors']:>7}")
+
+    print(f"\nPer intent at threshold {LOCAL_INTENT_MIN_CONFIDENCE}:")
+    print(f"{'intent':<30} {'n':>4} {'top1 acc':>9} {'local':>6} {'local acc':>10}")
+    for intent, row in per_intent_report(results, LOCAL_INTENT_MIN_CONFIDENCE, args.min_similarity, classifier).items():
+        print(f"{intent:<30} {row['examples']:>4} {row['top1_correct'] / row['examples']:>9.3f} {row['local']:>6} "
+              f"{row['local_correct'] / row['local'] if row['local'] else 0.0:>10.3f}")
+
+    print(f"\nPer language at threshold {LOCAL_INTENT_MIN_CONFIDENCE} ('served' = answered locally in production):")
+    print(f"{'language':<10} {'n':>4} {'top1 acc':>9} {'local':>6} {'local acc':>10} {'served':>7}")
+    for language, row in per_language_report(results, LOCAL_INTENT_MIN_CONFIDENCE, args.min_similarity, classifier).items():
+        print(f"{language:<10} {row['examples']:>4} {row['top1_correct'] / row['examples']:>9.3f} {row['local']:>6} "
+              f"{row['local_correct'] / row['local'] if row['local'] else 0.0:>10.3f} {'yes' if row['served_locally'] else 'no':>7}")
+
+    if args.show_errors:
+        print("\nConfident local errors:")
+        for text, expected, prediction in results:
+            if classifier.is_confident(prediction, LOCAL_INTENT_MIN_CONFIDENCE, args.min_similarity) and prediction.intent != expected:
+                print(f"  {text!r}: expected {expected}, got {prediction.intent} ({prediction.confidence:.2f})")
+
+    if args.compare_llm:
+        agreement = asyncio.run(_llm_agreement(results))
+        print(f"\nLLM: {agreement['answered']} answered, accuracy {agreement['llm_accuracy']:.3f}, "
+              f"local/LLM agreement {agreement['local_llm_agreement']:.3f}")
+    return 0
+
+
+def _load_components(path: str) -> list:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning(f"INTENT_EVAL: Could not read components file {path}: {e}")
+        return []
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
@@ -5,18 +5,42 @@ try:
     from groq_api import call_groq_llm_final_answer_lc as call_groq_llm_final_answer # Alias
     # DEFAULT_GROQ_CHAT_MODEL is imported in groq_api and used by call_groq_llm_final_answer
     from session_manager import ChatSession # Updated
+    from turn_events import final_answer_stream
+    from turn_trace import trace_stage
+    from message_catalog import catalog_variant
+    from retrieval_executor import retrieval_executor
+    from semantic_cache import SEMANTIC_CACHE_ENABLED, semantic_answer_cache
 except ImportError as e:
     print(f"CRITICAL IMPORT ERROR in knowledge_handler.py: {e}. Application will likely fail.")
     raise
 
 log = logging.getLogger(__name__)
 
-async def handle_general_knowledge_query(user_input: str, session: ChatSession) -> str | None:
+# Replies the callers treat as "no answer"; they are never stored in the shared semantic cache.
+_NON_ANSWER_MARKERS = ("I'm not sure how to respond", "I cannot answer")
+
+async def handle_general_knowledge_query(user_input: str, session: ChatSession, use_semantic_cache: bool = False) -> str | None:
     # This function's output is expected to be a fully formed Markdown string,
     # already localized by the LLM call.
     target_lang_name = session.current_language_name
     dialect_hint = session.last_detected_dialect_info
-    lc_memory_msgs = session.get_lc_memory_messages() # Get Langchain memory messages
+    lc_memory_msgs = session.get_lc_memory_messages("chat") # Get Langchain memory messages
+
+    # The semantic cache is shared by all sessions, so it is only used when the caller vouches for a
+    # self-contained question (initial general_question turns) and nothing session-specific would shape
+    # the answer: no chat memory, PDF or TV model, and a language the encoder was trained on.
+    cache_language_key = catalog_variant(session.current_language, dialect_hint)
+    use_cache = (SEMANTIC_CACHE_ENABLED and use_semantic_cache and not lc_memory_msgs and not session.pdf_context_text
+                 and not session.active_tv_model and semantic_answer_cache.supports_language(cache_language_key))
+    question_vector = None
+    if use_cache:
+        try:
+            with trace_stage("semantic_cache_lookup"):
+                cached_answer, question_vector = await retrieval_executor.run(semantic_answer_cache.lookup, user_input, cache_language_key)
+            if cached_answer:
+                return cached_answer
+        except Exception as e:
+            log.warning(f"KNOWLEDGE_HANDLER: Semantic cache lookup failed: {e}. Asking the LLM.", exc_info=True)
     pdf_context_str = session.get_pdf_context_for_llm() # Get formatted PDF context
 
     # Construct the main context for the LLM (in English, LLM will handle localization based on target_lang_name)
@@ -40,16 +64,24 @@ async def handle_general_knowledge_query(user_input: str, session: ChatSession)
     )
     
     # This call generates the final, localized, Markdown-formatted response
-    llm_response = await call_groq_llm_final_answer(
-        user_context_for_current_turn=full_llm_context_en, # English context for LLM
-        target_language_name=target_lang_name,
-        dialect_context_hint=dialect_hint,
-        memory_messages=lc_memory_msgs, # Pass the Langchain memory messages
-        system_prompt_template_str=system_prompt_template
-    )
+    # (streamed only in English: in other languages chatbot_core may still translate it)
+    with final_answer_stream(enabled=session.current_language == "en"):
+        llm_response = await call_groq_llm_final_answer(
+            user_context_for_current_turn=full_llm_context_en, # English context for LLM
+            target_language_name=target_lang_name,
+            dialect_context_hint=dialect_hint,
+            memory_messages=lc_memory_msgs, # Pass the Langchain memory messages
+            system_prompt_template_str=system_prompt_template,
+            call_site="knowledge_answer"
+        )
     
     if llm_response and not llm_response.startswith("Error:"):
         log.info(f"KNOWLEDGE_HANDLER: Successfully generated response for query '{user_input[:50]}...'")
+        if use_cache and not any(marker in llm_response for marker in _NON_ANSWER_MARKERS):
+            try:
+                await retrieval_executor.run(semantic_answer_cache.store, user_input, llm_response, cache_language_key, question_vector)
+            except Exception as e:
+                log.warning(f"KNOWLEDGE_HANDLER: Could not store answer in semantic cache: {e}")
         return llm_response
     else:
         log.error(f"KNOWLEDGE_HANDLER: LLM error or no response for general query '{user_input[:50]}...'. LLM raw output: {llm_response}")
@@ -60,5 +92,6 @@ async def handle_general_knowledge_query(user_input: str, session: ChatSession)
             user_context_for_current_turn=error_ctx_en,
             target_language_name=target_lang_name,
             dialect_context_hint=dialect_hint,
-            memory_messages=lc_memory_msgs # Pass memory for context even in error
+            memory_messages=lc_memory_msgs, # Pass memory for context even in error
+            call_site="knowledge_error"
         )
\ No newline at end of file
@@ -2,6 +2,7 @@ import logging
 import json
 import os
 import re
+import threading
 import httpx
 from langdetect import detect, DetectorFactory, LangDetectException
 
@@ -23,45 +24,68 @@ INTERNAL_LANG_CODES = list(SUPPORTED_LANGUAGES_MAP.keys())
 DEFAULT_LANGUAGE_CODE = "en"
 DEFAULT_LANGUAGE_NAME = SUPPORTED_LANGUAGES_MAP[DEFAULT_LANGUAGE_CODE]
 
+_EMPTY_KEYWORDS_DATA = {
+    "explicit_requests": {}, 
+    "darija_indicators_latin": [], 
+    "darija_indicators_arabic": [],
+    "problem_solved_keywords": {},
+    "session_reset_keywords": {},
+    "simple_closing_remarks": {},
+    "image_component_keywords": {},
+    "list_all_issues_keywords": {} # Added for completeness
+}
+
+# Populated by load_language_keywords() on first use (or by the startup warm-up), not at import time.
 _keywords_data = {}
-try:
-    if os.path.exists(KEYWORDS_FILE):
-        with open(KEYWORDS_FILE, 'r', encoding='utf-8') as f:
-            _keywords_data = json.load(f)
-        log.info(f"Successfully loaded keywords from {KEYWORDS_FILE}")
-    else:
-        log.error(f"CRITICAL: Keywords file '{KEYWORDS_FILE}' not found.")
-        _keywords_data = {
-            "explicit_requests": {}, 
-            "darija_indicators_latin": [], 
-            "darija_indicators_arabic": [],
-            "problem_solved_keywords": {},
-            "session_reset_keywords": {},
-            "simple_closing_remarks": {},
-            "image_component_keywords": {},
-            "list_all_issues_keywords": {} # Added for completeness
-        }
-except Exception as e:
-    log.error(f"CRITICAL: Error loading keywords: {e}", exc_info=True)
-    _keywords_data = {
-        "explicit_requests": {}, 
-        "darija_indicators_latin": [], 
-        "darija_indicators_arabic": [],
-        "problem_solved_keywords": {},
-        "session_reset_keywords": {},
-        "simple_closing_remarks": {},
-        "image_component_keywords": {},
-        "list_all_issues_keywords": {}
-    }
-
-DARIJA_EXPLICIT_REQUEST_KEYWORDS = _keywords_data.get("explicit_requests", {}).get("darija", [])
-FRENCH_REQUEST_KEYWORDS = _keywords_data.get("explicit_requests", {}).get("french", [])
-ARABIC_MSA_REQUEST_KEYWORDS = _keywords_data.get("explicit_requests", {}).get("arabic_msa", [])
-ENGLISH_REQUEST_KEYWORDS = _keywords_data.get("explicit_requests", {}).get("english", [])
-DARIJA_LATIN_INDICATORS = _keywords_data.get("darija_indicators_latin", [])
-DARIJA_ARABIC_INDICATORS = _keywords_data.get("darija_indicators_arabic", [])
-DARIJA_INDICATOR_THRESHOLD = _keywords_data.get("darija_indicator_threshold", 2)
+_keywords_loaded = False
+_keywords_lock = threading.Lock()
+DARIJA_EXPLICIT_REQUEST_KEYWORDS: list = []
+FRENCH_REQUEST_KEYWORDS: list = []
+ARABIC_MSA_REQUEST_KEYWORDS: list = []
+ENGLISH_REQUEST_KEYWORDS: list = []
+DARIJA_LATIN_INDICATORS: list = []
+DARIJA_ARABIC_INDICATORS: list = []
+DARIJA_INDICATOR_THRESHOLD = 2
+
+def load_language_keywords() -> bool:
+    """Reads language_keywords.json once. Returns True if the file was loaded."""
+    global _keywords_data, _keywords_loaded
+    global DARIJA_EXPLICIT_REQUEST_KEYWORDS, FRENCH_REQUEST_KEYWORDS, ARABIC_MSA_REQUEST_KEYWORDS, ENGLISH_REQUEST_KEYWORDS
+    global DARIJA_LATIN_INDICATORS, DARIJA_ARABIC_INDICATORS, DARIJA_INDICATOR_THRESHOLD
+    if _keywords_loaded:
+        return _keywords_data is not _EMPTY_KEYWORDS_DATA
+    with _keywords_lock:
+        if _keywords_loaded:
+            return _keywords_data is not _EMPTY_KEYWORDS_DATA
+        keywords_data = _EMPTY_KEYWORDS_DATA
+        try:
+            if os.path.exists(KEYWORDS_FILE):
+                with open(KEYWORDS_FILE, 'r', encoding='utf-8') as f:
+                    keywords_data = json.load(f)
+                log.info(f"Successfully loaded keywords from {KEYWORDS_FILE}")
+            else:
+                log.error(f"CRITICAL: Keywords file '{KEYWORDS_FILE}' not found.")
+        except Exception as e:
+            log.error(f"CRITICAL: Error loading keywords: {e}", exc_info=True)
+            keywords_data = _EMPTY_KEYWORDS_DATA
+
+        DARIJA_EXPLICIT_REQUEST_KEYWORDS = keywords_data.get("explicit_requests", {}).get("darija", [])
+        FRENCH_REQUEST_KEYWORDS = keywords_data.get("explicit_requests", {}).get("french", [])
+        ARABIC_MSA_REQUEST_KEYWORDS = keywords_data.get("explicit_requests", {}).get("arabic_msa", [])
+        ENGLISH_REQUEST_KEYWORDS = keywords_data.get("explicit_requests", {}).get("english", [])
+        DARIJA_LATIN_INDICATORS = keywords_data.get("darija_indicators_latin", [])
+        DARIJA_ARABIC_INDICATORS = keywords_data.get("darija_indicators_arabic", [])
+        DARIJA_INDICATOR_THRESHOLD = keywords_data.get("darija_indicator_threshold", 2)
+        _keywords_data = keywords_data
+        _keywords_loaded = True
+        return keywords_data is not _EMPTY_KEYWORDS_DATA
 
+def warm_up_langdetect() -> str | None:
+    """langdetect reads its ~50 language profiles on the first detect(); do that before traffic arrives."""
+    try:
+        return detect("The television does not turn on after the power cut.")
+    except LangDetectException:
+        return None
 
 async def _call_darija_detection_service(text: str) -> dict | None:
     if not DZIRIBERT_DETECTION_URL:
@@ -119,6 +143,7 @@ async def translate_english_to_darija_via_service(english_text: str) -> str | No
     return None
 
 async def detect_language_and_intent(text: str) -> tuple[str, str | None, dict | None]:
+    load_language_keywords()
     text_lower_for_latin_keywords = text.lower()
     final_detected_lang_code = DEFAULT_LANGUAGE_CODE
     specific_dialect_or_request_type = None
@@ -217,6 +242,7 @@ def get_language_name(lang_code: str) -> str:
     return SUPPORTED_LANGUAGES_MAP.get(lang_code, DEFAULT_LANGUAGE_NAME)
 
 def get_localized_keywords(key_group: str, lang_code: str) -> list:
+    load_language_keywords()
     if not _keywords_data or key_group not in _keywords_data:
         log.warning(f"Keyword group '{key_group}' not found in keywords data.")
         return []
@@ -0,0 +1,124 @@
+# backend/lexical_search.py
+import logging
+import re
+
+import numpy as np
+from scipy import sparse
+
+log = logging.getLogger(__name__)
+
+# Keeps board designators and part references intact: "PF1", "SD2", "12V", "PLF1/PLF2" -> "plf1", "plf2",
+# "EL.RT2864-FG48" -> "el.rt2864-fg48" (plus its "el", "rt2864", "fg48" parts).
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and any are as at be by check for from if in into is it its of on or the then to tv with "
+    "this that these those my not no does do".split()
+)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list:
+    tokens = []
+    for token in _TOKEN_PATTERN.findall((text or "").lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if "." in token or "-" in token:
+            tokens.extend(part for part in re.split(r"[.\-]", token) if part and part not in _STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    In-process BM25 over a fixed list of documents.
+
+    Per-(document, term) BM25 weights are precomputed into a sparse CSC matrix, so scoring a query is
+    a column slice plus a row sum; with a handful of query terms this costs microseconds even for
+    tens of thousands of documents. Document ids are row positions in the list given at build time.
+    """
+    def __init__(self, documents: list, k1: float = BM25_K1, b: float = BM25_B):
+        self.vocabulary: dict[str, int] = {}
+        rows, cols, term_freqs = [], [], []
+        doc_lengths = np.zeros(len(documents), dtype='float32')
+        for doc_id, document in enumerate(documents):
+            counts: dict[int, int] = {}
+            tokens = tokenize(document)
+            doc_lengths[doc_id] = len(tokens)
+            for token in tokens:
+                term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            for term_id, count in counts.items():
+                rows.append(doc_id)
+                cols.append(term_id)
+                term_freqs.append(count)
+
+        self.num_documents = len(documents)
+        if not term_freqs:
+            self.weights = sparse.csc_matrix((self.num_documents, 0), dtype='float32')
+            return
+
+        rows_np = np.asarray(rows, dtype='int64')
+        cols_np = np.asarray(cols, dtype='int64')
+        tf = np.asarray(term_freqs, dtype='float32')
+        doc_freq = np.bincount(cols_np, minlength=len(self.vocabulary)).astype('float32')
+        idf = np.log(1.0 + (self.num_documents - doc_freq + 0.5) / (doc_freq + 0.5))
+        avg_doc_length = float(doc_lengths.mean()) or 1.0
+        length_norm = k1 * (1.0 - b + b * doc_lengths[rows_np] / avg_doc_length)
+        values = idf[cols_np] * tf * (k1 + 1.0) / (tf + length_norm)
+        self.weights = sparse.csc_matrix(
+            (values.astype('float32'), (rows_np, cols_np)),
+            shape=(self.num_documents, len(self.vocabulary)),
+        )
+        log.info(f"LEXICAL_SEARCH: BM25 index built over {self.num_documents} documents, {len(self.vocabulary)} terms.")
+
+    def score(self, query_text: str) -> np.ndarray:
+        """Dense BM25 scores for every document (zeros when no query term is known)."""
+        term_ids = sorted({self.vocabulary[t] for t in tokenize(query_text) if t in self.vocabulary})
+        if not term_ids:
+            return np.zeros(self.num_documents, dtype='float32')
+        return np.asarray(self.weights[:, term_ids].sum(axis=1)).ravel()
+
+    def search(self, query_text: str, k: int, candidate_doc_ids: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (doc_ids, scores) of the top-k documents with a positive score, best first.
+        When candidate_doc_ids is given only those documents are considered.
+        """
+        scores = self.score(query_text)
+        if candidate_doc_ids is not None:
+            candidate_doc_ids = np.asarray(candidate_doc_ids, dtype='int64')
+            candidate_scores = scores[candidate_doc_ids]
+        else:
+            candidate_doc_ids = np.arange(self.num_documents, dtype='int64')
+            candidate_scores = scores
+        positive = candidate_scores > 0
+        candidate_doc_ids, candidate_scores = candidate_doc_ids[positive], candidate_scores[positive]
+        if candidate_scores.size == 0 or k <= 0:
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='float32')
+        k = min(k, candidate_scores.size)
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top], kind="stable")]
+        return candidate_doc_ids[top], candidate_scores[top]
+
+
+def issue_document_text(item: dict) -> str:
+    """Text indexed for one flattened issue: the issue title plus every step description."""
+    parts = [item.get("issue") or ""]
+    for step in item.get("steps") or []:
+        if isinstance(step, dict) and isinstance(step.get("description"), str):
+            parts.append(step["description"])
+    return "\n".join(parts)
+
+
+def build_issue_bm25_index(data: list, text_to_original_data_idx_map: list) -> BM25Index | None:
+    """BM25 over the flattened issues, with document ids equal to FAISS rows."""
+    try:
+        documents = [
+            issue_document_text(data[original_data_idx]) if 0 <= original_data_idx < len(data) and isinstance(data[original_data_idx], dict) else ""
+            for original_data_idx in text_to_original_data_idx_map
+        ]
+        return BM25Index(documents)
+    except Exception as e:
+        log.error(f"LEXICAL_SEARCH: Failed to build BM25 index: {e}", exc_info=True)
+        return None
+
@@ -0,0 +1,216 @@
+# backend/llm_metrics.py
+"""
+Per-call-site LLM latency and token accounting.
+
+Every call in groq_api.py goes through _scheduled() with a call-site name ("translate_to_english",
+"hyde", "classify_main_intent", "explain_steps", "translate_back", ...). Each call is timed
+twice: end to end (queue wait in llm_scheduler included, retries included) and from admission to
+the response (the provider's own latency). Prompt and completion tokens are read from the
+response metadata by LLMUsageCallback (usage_metadata, or llm_output["token_usage"] for older
+integrations); calls whose provider reports none (streamed Groq answers, the fake provider's
+structured outputs) fall back to the scheduler's estimate and are counted as estimated.
+
+Per site we keep a cumulative latency histogram (LLM_LATENCY_BUCKETS_MS), percentiles over the
+last LLM_METRICS_WINDOW calls, token totals and, if LLM_TOKEN_PRICES is set
+({"model": [USD per 1M input tokens, USD per 1M output tokens]}), an estimated cost. Calls made
+inside a turn are also attached to its TurnTrace. Exposed on /api/admin/llm_metrics (JSON, or
+Prometheus text with ?format=prometheus).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from turn_trace import current_turn_trace
+
+log = logging.getLogger(__name__)
+
+LLM_LATENCY_BUCKETS_MS = tuple(float(b) for b in os.getenv("LLM_LATENCY_BUCKETS_MS", "100,250,500,1000,2000,4000,8000,16000").split(",") if b.strip())
+LLM_METRICS_WINDOW = int(os.getenv("LLM_METRICS_WINDOW", "500"))
+LLM_TOKEN_PRICES = json.loads(os.getenv("LLM_TOKEN_PRICES", "{}") or "{}")
+
+
+@dataclass
+class LLMCall:
+    call_site: str
+    role: str
+    model: str
+    total_s: float          # Queue wait + provider time (+ retries)
+    llm_s: float            # Admission to response of the last attempt
+    prompt_tokens: int
+    completion_tokens: int
+    tokens_estimated: bool  # True if the provider reported no usage
+    ok: bool
+
+    @property
+    def queue_wait_s(self) -> float:
+        return max(0.0, self.total_s - self.llm_s)
+
+    def as_dict(self) -> dict:
+        return {
+            "call_site": self.call_site,
+            "model": self.model,
+            "total_ms": self.total_s * 1000.0,
+            "llm_ms": self.llm_s * 1000.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_estimated": self.tokens_estimated,
+            "ok": self.ok,
+        }
+
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """Collects token usage of one call from the LLM's end event (passed per call in the runnable config)."""
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.reported = False
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        prompt_tokens = completion_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0) or 0
+                    completion_tokens += usage.get("output_tokens", 0) or 0
+        if not (prompt_tokens or completion_tokens):
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = token_usage.get("prompt_tokens", 0) or 0
+            completion_tokens = token_usage.get("completion_tokens", 0) or 0
+        if prompt_tokens or completion_tokens:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.reported = True
+
+
+class _SiteStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.llm_s = 0.0
+        self.max_total_s = 0.0
+        self.buckets = [0] * (len(LLM_LATENCY_BUCKETS_MS) + 1) # Last one is +Inf
+        self.recent_total_s: deque = deque(maxlen=LLM_METRICS_WINDOW)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_calls = 0
+        self.cost_usd = 0.0
+        self.models: set[str] = set()
+
+
+def _percentile(ordered: list, percentile: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))]
+
+
+def estimate_cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prices = LLM_TOKEN_PRICES.get(model)
+    if not prices:
+        return 0.0
+    return (prompt_tokens * float(prices[0]) + completion_tokens * float(prices[1])) / 1_000_000
+
+
+class LLMMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sites: dict[str, _SiteStats] = {}
+        self.started_at = time.time()
+
+    def record(self, call: LLMCall) -> None:
+        with self._lock:
+            stats = self._sites.setdefault(call.call_site, _SiteStats())
+            stats.calls += 1
+            stats.errors += 0 if call.ok else 1
+            stats.total_s += call.total_s
+            stats.llm_s += call.llm_s
+            stats.max_total_s = max(stats.max_total_s, call.total_s)
+            total_ms = call.total_s * 1000.0
+            stats.buckets[next((i for i, bound in enumerate(LLM_LATENCY_BUCKETS_MS) if total_ms <= bound), len(LLM_LATENCY_BUCKETS_MS))] += 1
+            stats.recent_total_s.append(call.total_s)
+            stats.prompt_tokens += call.prompt_tokens
+            stats.completion_tokens += call.completion_tokens
+            stats.estimated_calls += 1 if call.tokens_estimated else 0
+            stats.cost_usd += estimate_cost_usd(call.model, call.prompt_tokens, call.completion_tokens)
+            stats.models.add(call.model)
+        trace = current_turn_trace()
+        if trace is not None:
+            trace.record_llm_call(call.as_dict())
+
+    def stats(self) -> dict:
+        with self._lock:
+            sites = {}
+            for name, stats in sorted(self._sites.items()):
+                calls = stats.calls or 1
+                recent = sorted(stats.recent_total_s)
+                cumulative = 0
+                histogram = {}
+                for bound, count in zip([*(f"{b:g}" for b in LLM_LATENCY_BUCKETS_MS), "+Inf"], stats.buckets):
+                    cumulative += count
+                    histogram[bound] = cumulative
+                sites[name] = {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "models": sorted(stats.models),
+                    "avg_total_ms": stats.total_s / calls * 1000.0,
+                    "avg_llm_ms": stats.llm_s / calls * 1000.0,
+                    "avg_queue_wait_ms": max(0.0, stats.total_s - stats.llm_s) / calls * 1000.0,
+                    "max_total_ms": stats.max_total_s * 1000.0,
+                    "p50_total_ms": _percentile(recent, 50) * 1000.0,
+                    "p95_total_ms": _percentile(recent, 95) * 1000.0,
+                    "p99_total_ms": _percentile(recent, 99) * 1000.0,
+                    "latency_histogram_ms": histogram, # Cumulative counts, "le" bucket -> calls
+                    "total_time_s": stats.total_s,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "completion_tokens": stats.completion_tokens,
+                    "avg_prompt_tokens": stats.prompt_tokens / calls,
+                    "avg_completion_tokens": stats.completion_tokens / calls,
+                    "estimated_token_calls": stats.estimated_calls,
+                    "cost_usd": stats.cost_usd,
+                }
+            total_time_s = sum(site["total_time_s"] for site in sites.values()) or 1.0
+            for site in sites.values():
+                site["time_share"] = site["total_time_s"] / total_time_s
+            return {
+                "since": self.started_at,
+                "calls": sum(site["calls"] for site in sites.values()),
+                "prompt_tokens": sum(site["prompt_tokens"] for site in sites.values()),
+                "completion_tokens": sum(site["completion_tokens"] for site in sites.values()),
+                "cost_usd": sum(site["cost_usd"] for site in sites.values()),
+                "sites": sites,
+            }
+
+    def prometheus(self) -> str:
+        """The same aggregates in the Prometheus text exposition format."""
+        lines = [
+            "# HELP llm_call_duration_seconds End-to-end LLM call latency (queue wait included) by call site.",
+            "# TYPE llm_call_duration_seconds histogram",
+        ]
+        report = self.stats()
+        for name, site in report["sites"].items():
+            for bound, count in site["latency_histogram_ms"].items():
+                le = bound if bound == "+Inf" else f"{float(bound) / 1000.0:g}"
+                lines.append(f'llm_call_duration_seconds_bucket{{call_site="{name}",le="{le}"}} {count}')
+            lines.append(f'llm_call_duration_seconds_sum{{call_site="{name}"}} {site["total_time_s"]:.6f}')
+            lines.append(f'llm_call_duration_seconds_count{{call_site="{name}"}} {site["calls"]}')
+        for metric, key, help_text in (
+            ("llm_call_errors_total", "errors", "Failed LLM calls by call site."),
+            ("llm_prompt_tokens_total", "prompt_tokens", "Prompt tokens by call site (estimated where the provider reports none)."),
+            ("llm_completion_tokens_total", "completion_tokens", "Completion tokens by call site (estimated where the provider reports none)."),
+            ("llm_cost_usd_total", "cost_usd", "Estimated cost by call site (LLM_TOKEN_PRICES)."),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, site in report["sites"].items():
+                lines.append(f'{metric}{{call_site="{name}"}} {site[key]:g}')
+        return "\n".join(lines) + "\n"
+
+
+llm_metrics = LLMMetrics()
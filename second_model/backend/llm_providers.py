@@ -0,0 +1,304 @@
+# backend/llm_providers.py
+"""
+LLM providers behind groq_api.get_llm(). Every *_lc function builds its chain on the LangChain
+chat model a provider returns for a role, so switching providers changes no call site.
+
+LLM_PROVIDER selects one of:
+    groq               langchain_groq.ChatGroq (default; needs GROQ_API_KEY).
+    openai_compatible  langchain_openai.ChatOpenAI against OPENAI_COMPATIBLE_BASE_URL, e.g. a local
+                       llama.cpp / vLLM / Ollama server. Optional dependency: pip install langchain-openai.
+    fake               In-process, deterministic stand-in for profiling and load tests: no network,
+                       no quota. Latency follows FAKE_LLM_LATENCY_MS, outputs are derived from the
+                       prompt (translations echo their input; MainIntentOutput and FollowUpIntentOutput
+                       come from local heuristics), and FAKE_LLM_ERROR_RATE injects 429s.
+
+Calls still go through llm_scheduler, whose limits are keyed by model name: leave GROQ_RPM_LIMIT /
+GROQ_TPM_LIMIT / GROQ_RATE_LIMITS unset (unlimited) when load-testing against a fake or local provider.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Iterator, AsyncIterator, List
+from dotenv import load_dotenv
+
+load_dotenv() # Imported by groq_api before its own load_dotenv()
+log = logging.getLogger(__name__)
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq").strip().lower()
+
+OPENAI_COMPATIBLE_BASE_URL = os.getenv("OPENAI_COMPATIBLE_BASE_URL", "http://localhost:8080/v1")
+OPENAI_COMPATIBLE_API_KEY = os.getenv("OPENAI_COMPATIBLE_API_KEY", "not-needed")
+OPENAI_COMPATIBLE_MODEL = os.getenv("OPENAI_COMPATIBLE_MODEL", "") # Empty = the role's Groq model name
+
+# Latency distributions: "fixed:MS", "uniform:MIN_MS:MAX_MS", "normal:MEAN_MS:STDDEV_MS" or
+# "lognormal:MEDIAN_MS:SIGMA". Per-role overrides as JSON, e.g. {"chat": "lognormal:900:0.4"}.
+FAKE_LLM_LATENCY_MS = os.getenv("FAKE_LLM_LATENCY_MS", "lognormal:250:0.5")
+FAKE_LLM_ROLE_LATENCY_MS = json.loads(os.getenv("FAKE_LLM_ROLE_LATENCY_MS", "{}") or "{}")
+FAKE_LLM_TOKEN_MS = float(os.getenv("FAKE_LLM_TOKEN_MS", "4")) # Per generated token (one streamed chunk per token)
+FAKE_LLM_OUTPUT_TOKENS = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "180")) # Length of chat answers
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+
+class LLMProvider:
+    name = ""
+
+    def create_chat_model(self, role: str, temperature: float, model_name: str):
+        """Returns a LangChain chat model for `role` (must support ainvoke/astream/with_structured_output)."""
+        raise NotImplementedError
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def create_chat_model(self, role: str, temperature: float, model_name: str):
+        from langchain_groq import ChatGroq
+
+        # Retries go back through llm_scheduler's queue instead of the client's own backoff loop.
+        return ChatGroq(temperature=temperature, model_name=model_name, groq_api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    name = "openai_compatible"
+
+    def create_chat_model(self, role: str, temperature: float, model_name: str):
+        try:
+            from langchain_openai import ChatOpenAI
+        except ImportError as e:
+            raise RuntimeError("LLM_PROVIDER=openai_compatible needs the optional 'langchain-openai' package.") from e
+        return ChatOpenAI(
+            model=OPENAI_COMPATIBLE_MODEL or model_name, temperature=temperature,
+            base_url=OPENAI_COMPATIBLE_BASE_URL, api_key=OPENAI_COMPATIBLE_API_KEY, max_retries=0,
+        )
+
+
+class FakeProvider(LLMProvider):
+    name = "fake"
+
+    def create_chat_model(self, role: str, temperature: float, model_name: str):
+        return _fake_chat_model_class()(
+            role=role, fake_model_name=model_name,
+            latency_spec=FAKE_LLM_ROLE_LATENCY_MS.get(role, FAKE_LLM_LATENCY_MS),
+        )
+
+
+LLM_PROVIDERS = {provider.name: provider for provider in (GroqProvider(), OpenAICompatibleProvider(), FakeProvider())}
+
+
+def get_llm_provider(name: str | None = None) -> LLMProvider:
+    provider_name = (name or LLM_PROVIDER).strip().lower()
+    provider = LLM_PROVIDERS.get(provider_name)
+    if provider is None:
+        log.error(f"LLM_PROVIDERS: Unknown LLM_PROVIDER '{provider_name}'. Using 'groq'.")
+        provider = LLM_PROVIDERS["groq"]
+    return provider
+
+
+# --- Deterministic fake -------------------------------------------------------------------------
+
+class FakeRateLimitError(Exception):
+    """Shaped like the provider's 429 so llm_scheduler treats it the same way."""
+    status_code = 429
+
+    def __init__(self, message: str = "Fake rate limit."):
+        super().__init__(message)
+        self.response = None
+
+
+_error_rng = random.Random(FAKE_LLM_SEED) # Separate stream, so a retried prompt is not doomed to fail again
+_error_rng_lock = threading.Lock()
+
+
+def _inject_error() -> bool:
+    if not FAKE_LLM_ERROR_RATE:
+        return False
+    with _error_rng_lock:
+        return _error_rng.random() < FAKE_LLM_ERROR_RATE
+
+
+def sample_latency_ms(spec: str, rng: random.Random) -> float:
+    kind, _, params = (spec or "fixed:0").partition(":")
+    values = [float(value) for value in params.split(":") if value.strip()] if params else []
+    try:
+        if kind == "fixed":
+            return max(0.0, values[0])
+        if kind == "uniform":
+            return rng.uniform(values[0], values[1])
+        if kind == "normal":
+            return max(0.0, rng.gauss(values[0], values[1]))
+        if kind == "lognormal":
+            return values[0] * math.exp(rng.gauss(0.0, values[1]))
+    except IndexError:
+        pass
+    log.warning(f"LLM_PROVIDERS: Invalid fake latency spec '{spec}'. Using 0 ms.")
+    return 0.0
+
+
+_FAKE_WORDS = ("check", "the", "power", "board", "cable", "screen", "signal", "remote", "settings", "then",
+               "restart", "television", "backlight", "fuse", "voltage", "connector", "menu", "input", "and", "verify")
+_MEDIA_WORDS = ("image", "picture", "photo", "diagram", "schema", "schéma", "show", "montre", "صورة", "تصويرة", "وريلي")
+_PROBLEM_WORDS = ("not", "no", "won't", "doesn't", "problem", "issue", "black", "broken", "lines", "flicker", "restart",
+                  "ne", "pas", "plus", "panne", "لا", "ما", "مشكل", "مشكلة")
+_QUOTED_RE = re.compile(r'"""\n?(.*?)\n?"""|"(.*?)"', re.DOTALL)
+
+
+def _last_human_text(messages) -> str:
+    for message in reversed(messages):
+        if getattr(message, "type", None) == "human":
+            return str(message.content)
+    return str(messages[-1].content) if messages else ""
+
+
+def _quoted_user_text(human_text: str, label: str) -> str:
+    """The quoted value following `label` in a prompt (e.g. 'User's latest query: "..."'), else the whole text."""
+    match = re.search(re.escape(label) + r'[^"]*"(.*)"', human_text, re.DOTALL)
+    return match.group(1) if match else human_text
+
+
+def _fake_main_intent(query: str) -> dict:
+    from utils import extract_tv_model_from_query
+
+    model = extract_tv_model_from_query(query)
+    words = query.casefold().split()
+    if any(word.strip("?!.,") in _MEDIA_WORDS for word in words):
+        return {"intent": "media_request_model_specific" if model else "media_request_generic", "extracted_model_if_any": model}
+    if any(word.strip("?!.,") in _PROBLEM_WORDS for word in words):
+        return {"intent": "specific_tv_troubleshooting" if model else "standard_tv_troubleshooting", "extracted_model_if_any": model}
+    if len(words) <= 2:
+        return {"intent": "follow_up_clarification", "extracted_model_if_any": None}
+    return {"intent": "general_question", "extracted_model_if_any": None}
+
+
+def _fake_follow_up(user_input: str) -> dict:
+    from follow_up_classifier import classify_follow_up_locally
+
+    result = classify_follow_up_locally(user_input)
+    if result is None or result.confidence < 0.85:
+        return {"intent": "unclear_or_other", "extracted_model": None}
+    return {"intent": result.intent, "extracted_model": result.model}
+
+
+def _fake_structured_output(schema, messages) -> Any:
+    human_text = _last_human_text(messages)
+    if schema.__name__ == "MainIntentOutput":
+        return schema(**_fake_main_intent(_quoted_user_text(human_text, "User's latest query:")))
+    if schema.__name__ == "FollowUpIntentOutput":
+        return schema(**_fake_follow_up(_quoted_user_text(human_text, "The user's current response")))
+    if schema.__name__ == "SegmentTranslationsOutput":
+        segments = json.loads(human_text.split("Segments:", 1)[-1].strip() or "[]")
+        return schema(segments=[{"id": segment["id"], "translation": segment["text"]} for segment in segments])
+    # Any other schema: its defaults, with empty strings for required text fields.
+    values = {name: "" for name, field in schema.model_fields.items() if field.is_required() and field.annotation is str}
+    return schema(**values)
+
+
+def _fake_text(role: str, messages, rng: random.Random) -> str:
+    human_text = _last_human_text(messages)
+    if role == "translate":
+        match = _QUOTED_RE.search(human_text)
+        return (match.group(1) or match.group(2)) if match else human_text
+    if role == "hyde":
+        return " ".join(_quoted_user_text(human_text, "User's TV problem").split()[:8]) or "TV troubleshooting"
+    if role == "summarize":
+        return " ".join(human_text.split()[:120])
+    words = [rng.choice(_FAKE_WORDS) for _ in range(max(1, FAKE_LLM_OUTPUT_TOKENS))]
+    lines = [" ".join(words[i:i + 12]).capitalize() + "." for i in range(0, len(words), 12)]
+    return "**Fake answer**\n\n" + "\n".join(f"{n}. {line}" for n, line in enumerate(lines, 1))
+
+
+_fake_chat_model_cls = None
+
+
+def _fake_chat_model_class():
+    """Defines FakeChatModel on first use, so importing this module does not import langchain_core."""
+    global _fake_chat_model_cls
+    if _fake_chat_model_cls is not None:
+        return _fake_chat_model_cls
+
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+    from langchain_core.runnables import RunnableLambda
+
+    class FakeChatModel(BaseChatModel):
+        role: str = "chat"
+        fake_model_name: str = "fake"
+        latency_spec: str = FAKE_LLM_LATENCY_MS
+
+        @property
+        def _llm_type(self) -> str:
+            return "deterministic-fake"
+
+        def _rng(self, messages: List[BaseMessage]) -> random.Random:
+            digest = hashlib.sha256(f"{FAKE_LLM_SEED}|{self.role}|".encode() + "\n".join(str(m.content) for m in messages).encode()).digest()
+            return random.Random(int.from_bytes(digest[:8], "big"))
+
+        def _plan(self, messages: List[BaseMessage]) -> tuple[str, float]:
+            """(response text, seconds before the first token). Raises FakeRateLimitError at FAKE_LLM_ERROR_RATE."""
+            if _inject_error():
+                raise FakeRateLimitError()
+            rng = self._rng(messages)
+            return _fake_text(self.role, messages, rng), sample_latency_ms(self.latency_spec, rng) / 1000.0
+
+        @staticmethod
+        def _chunks(text: str) -> list[str]:
+            return re.findall(r"\S+\s*|\s+", text)
+
+        def _message(self, messages: List[BaseMessage], text: str) -> AIMessage:
+            # Reported like a real provider, so llm_metrics sees the same token counts offline
+            input_tokens = sum(len(str(m.content)) for m in messages) // 4
+            output_tokens = len(self._chunks(text))
+            return AIMessage(content=text, usage_metadata={
+                "input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens})
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            text, first_token_s = self._plan(messages)
+            time.sleep(first_token_s + len(self._chunks(text)) * FAKE_LLM_TOKEN_MS / 1000.0)
+            return ChatResult(generations=[ChatGeneration(message=self._message(messages, text))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            text, first_token_s = self._plan(messages)
+            await asyncio.sleep(first_token_s + len(self._chunks(text)) * FAKE_LLM_TOKEN_MS / 1000.0)
+            return ChatResult(generations=[ChatGeneration(message=self._message(messages, text))])
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+            text, first_token_s = self._plan(messages)
+            time.sleep(first_token_s)
+            for chunk in self._chunks(text):
+                time.sleep(FAKE_LLM_TOKEN_MS / 1000.0)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+            text, first_token_s = self._plan(messages)
+            await asyncio.sleep(first_token_s)
+            for chunk in self._chunks(text):
+                await asyncio.sleep(FAKE_LLM_TOKEN_MS / 1000.0)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+        def with_structured_output(self, schema, **kwargs):
+            def _messages(prompt_value) -> list:
+                return prompt_value.to_messages() if hasattr(prompt_value, "to_messages") else list(prompt_value)
+
+            def _invoke(prompt_value):
+                messages = _messages(prompt_value)
+                _, first_token_s = self._plan(messages)
+                time.sleep(first_token_s)
+                return _fake_structured_output(schema, messages)
+
+            async def _ainvoke(prompt_value):
+                messages = _messages(prompt_value)
+                _, first_token_s = self._plan(messages)
+                await asyncio.sleep(first_token_s)
+                return _fake_structured_output(schema, messages)
+
+            return RunnableLambda(_invoke, afunc=_ainvoke)
+
+    _fake_chat_model_cls = FakeChatModel
+    return FakeChatModel
@@ -0,0 +1,311 @@
+# backend/llm_scheduler.py
+"""
+Admission control for Groq calls: one priority queue per model in front of two token buckets
+(requests/min and tokens/min), so bursts queue up to the provider's ceiling instead of turning
+into 429s and blind retries. Quotas differ per account tier and model, so no bucket limits
+anything until its limit is configured (GROQ_RPM_LIMIT / GROQ_TPM_LIMIT, or per model in
+GROQ_RATE_LIMITS); 429s are still paused on and retried either way.
+
+Calls are admitted in priority order (cheap classification before translation before long
+chat/explanation calls), FIFO within a priority. A call that cannot be admitted before its
+deadline fails with LLMQueueTimeout. Rate-limit (429) and transient (5xx/connection) errors
+pause the model's queue for the provider's retry-after and requeue the call, still under its
+original deadline; the ChatGroq clients themselves do not retry.
+
+Flask runs every async view on its own event loop, so the scheduler is thread-based: waiters
+hold concurrent.futures.Future objects that a dispatcher thread resolves, awaited through
+asyncio.wrap_future() on whichever loop is waiting. A waiter's future can be cancelled at any
+moment from its own loop (wrap_future propagates cancellation without our lock), so the dispatcher
+only resolves futures through _resolve(), which tolerates losing that race, and charges a lane's
+buckets only for tickets it actually resolved.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+log = logging.getLogger(__name__)
+
+def _optional_limit(value) -> float | None:
+    """A configured per-minute limit, or None (unlimited) when unset or empty."""
+    return float(value) if value not in (None, "") else None
+
+GROQ_RPM_LIMIT = _optional_limit(os.getenv("GROQ_RPM_LIMIT")) # Default for every model; unset = unlimited
+GROQ_TPM_LIMIT = _optional_limit(os.getenv("GROQ_TPM_LIMIT"))
+# Per-model limits, e.g. {"llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000}}
+GROQ_RATE_LIMITS = json.loads(os.getenv("GROQ_RATE_LIMITS", "{}") or "{}")
+LLM_QUEUE_DEADLINE_SECONDS = float(os.getenv("LLM_QUEUE_DEADLINE_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+DEFAULT_RETRY_AFTER_SECONDS = 2.0
+
+PRIORITY_HIGH = 0   # Short classification calls that gate the rest of the turn
+PRIORITY_NORMAL = 1 # Translation, HyDE
+PRIORITY_LOW = 2    # Long chat/explanation generations
+
+
+class LLMQueueTimeout(Exception):
+    """Raised when a call could not be admitted before its deadline."""
+
+
+class TokenBucket:
+    """Per-minute token bucket; per_minute=None makes it unlimited (always admits, never charged)."""
+    def __init__(self, per_minute: float | None):
+        self.unlimited = per_minute is None
+        self.capacity = 0.0 if self.unlimited else max(1.0, per_minute)
+        self.refill_per_second = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated_at) * self.refill_per_second)
+        self._updated_at = now
+
+    def seconds_until(self, amount: float, now: float) -> float:
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity) # A call bigger than the bucket waits for a full bucket, never forever
+        return 0.0 if self.level >= amount else (amount - self.level) / self.refill_per_second
+
+    def available(self, now: float) -> float | None:
+        if self.unlimited:
+            return None
+        self._refill(now)
+        return self.level
+
+    def take(self, amount: float, now: float) -> None:
+        if self.unlimited:
+            return
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float, now: float) -> None:
+        if self.unlimited:
+            return
+        self._refill(now)
+        self.level = min(self.capacity, self.level + min(amount, self.capacity))
+
+
+def estimate_tokens(inputs, expected_output_tokens: int) -> int:
+    """Rough token count of a call (about 4 characters per token for the prompt inputs, plus the expected output)."""
+    return len(str(inputs)) // 4 + expected_output_tokens
+
+
+class _Ticket:
+    __slots__ = ("priority", "seq", "tokens", "deadline", "enqueued_at", "future")
+
+    def __init__(self, priority: int, seq: int, tokens: int, deadline: float):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.future: Future = Future()
+
+    def __lt__(self, other: "_Ticket") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _ModelLane:
+    def __init__(self, model_name: str):
+        limits = GROQ_RATE_LIMITS.get(model_name, {})
+        self.requests = TokenBucket(_optional_limit(limits.get("rpm", GROQ_RPM_LIMIT)))
+        self.tokens = TokenBucket(_optional_limit(limits.get("tpm", GROQ_TPM_LIMIT)))
+        self.queue: list[_Ticket] = []
+        self.paused_until = 0.0
+        self.stats = {"admitted": 0, "expired": 0, "cancelled": 0, "refunded": 0, "rate_limited": 0, "transient_errors": 0,
+                      "max_queue_depth": 0, "total_wait_s": 0.0, "max_wait_s": 0.0}
+        self.wait_by_priority: dict[int, list] = {} # priority -> [count, total wait s]
+
+    def seconds_until_admissible(self, ticket: _Ticket, now: float) -> float:
+        return max(self.paused_until - now, self.requests.seconds_until(1, now), self.tokens.seconds_until(ticket.tokens, now))
+
+    def admit(self, ticket: _Ticket, now: float) -> None:
+        self.requests.take(1, now)
+        self.tokens.take(ticket.tokens, now)
+        wait_s = now - ticket.enqueued_at
+        self.stats["admitted"] += 1
+        self.stats["total_wait_s"] += wait_s
+        self.stats["max_wait_s"] = max(self.stats["max_wait_s"], wait_s)
+        by_priority = self.wait_by_priority.setdefault(ticket.priority, [0, 0.0])
+        by_priority[0] += 1
+        by_priority[1] += wait_s
+
+    def refund(self, ticket: _Ticket, now: float) -> None:
+        """Returns the capacity of a ticket that was admitted but whose waiter was cancelled before calling."""
+        self.requests.give_back(1, now)
+        self.tokens.give_back(ticket.tokens, now)
+        self.stats["refunded"] += 1
+
+
+def _resolve(future: Future, exception: Exception | None = None) -> bool:
+    """Resolves a waiter's future unless it was cancelled first. Returns True if this call resolved it."""
+    if future.done():
+        return False
+    try:
+        if exception is None:
+            future.set_result(None)
+        else:
+            future.set_exception(exception)
+    except InvalidStateError: # Cancelled by the waiter's loop between done() and set_*()
+        return False
+    return True
+
+
+class LLMScheduler:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._lanes: dict[str, _ModelLane] = {}
+        self._seq = itertools.count()
+        self._dispatcher: threading.Thread | None = None
+
+    def _lane(self, model_name: str) -> _ModelLane:
+        lane = self._lanes.get(model_name)
+        if lane is None:
+            lane = self._lanes[model_name] = _ModelLane(model_name)
+        return lane
+
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="llm-scheduler", daemon=True)
+            self._dispatcher.start()
+
+    def _submit(self, model_name: str, priority: int, tokens: int, deadline: float) -> _Ticket:
+        with self._cond:
+            lane = self._lane(model_name)
+            ticket = _Ticket(priority, next(self._seq), tokens, deadline)
+            now = time.monotonic()
+            if not lane.queue and lane.seconds_until_admissible(ticket, now) == 0.0:
+                lane.admit(ticket, now) # Fast path: nothing queued and capacity available
+                ticket.future.set_result(None)
+                return ticket
+            heapq.heappush(lane.queue, ticket)
+            lane.stats["max_queue_depth"] = max(lane.stats["max_queue_depth"], len(lane.queue))
+            self._ensure_dispatcher()
+            self._cond.notify()
+            return ticket
+
+    def _dispatch_once(self) -> float | None:
+        """Admits or expires every ticket that can be. Returns when to look again (None: when notified). Holds self._cond."""
+        next_wake = None
+        now = time.monotonic()
+        for model_name, lane in self._lanes.items():
+            while lane.queue:
+                ticket = lane.queue[0]
+                if ticket.future.done(): # Waiter was cancelled
+                    heapq.heappop(lane.queue)
+                    lane.stats["cancelled"] += 1
+                    continue
+                if now >= ticket.deadline:
+                    heapq.heappop(lane.queue)
+                    if _resolve(ticket.future, LLMQueueTimeout(
+                            f"Not admitted to '{model_name}' within {ticket.deadline - ticket.enqueued_at:.1f}s.")):
+                        lane.stats["expired"] += 1
+                    else:
+                        lane.stats["cancelled"] += 1
+                    continue
+                wait_s = lane.seconds_until_admissible(ticket, now)
+                if wait_s > 0.0:
+                    wake = now + min(wait_s, ticket.deadline - now)
+                    next_wake = wake if next_wake is None else min(next_wake, wake)
+                    break
+                heapq.heappop(lane.queue)
+                if _resolve(ticket.future):
+                    lane.admit(ticket, now)
+                else:
+                    lane.stats["cancelled"] += 1
+        return next_wake
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                try:
+                    next_wake = self._dispatch_once()
+                except Exception as e:
+                    # Never let the dispatcher die: every queued call would wait for it forever
+                    log.error(f"LLM_SCHEDULER: Dispatch pass failed: {e}", exc_info=True)
+                    next_wake = time.monotonic() + 0.1
+                self._cond.wait(timeout=None if next_wake is None else max(0.0, next_wake - time.monotonic()))
+
+    def _pause(self, model_name: str, seconds: float) -> None:
+        with self._cond:
+            lane = self._lane(model_name)
+            lane.paused_until = max(lane.paused_until, time.monotonic() + seconds)
+            self._cond.notify()
+
+    async def run(self, model_name: str, priority: int, call, estimated_tokens: int, deadline_seconds: float | None = None):
+        """
+        Waits for admission on `model_name`'s queue, then awaits `call()` (a coroutine function).
+        Retries rate-limit/transient provider errors through the queue while the deadline allows.
+        """
+        deadline = time.monotonic() + (LLM_QUEUE_DEADLINE_SECONDS if deadline_seconds is None else deadline_seconds)
+        attempt = 0
+        while True:
+            ticket = self._submit(model_name, priority, estimated_tokens, deadline)
+            try:
+                await asyncio.wrap_future(ticket.future)
+            except asyncio.CancelledError:
+                # wrap_future has usually cancelled ticket.future already; if the dispatcher admitted it first,
+                # give the capacity back since the call will never be made.
+                with self._cond:
+                    if not ticket.future.cancel() and not ticket.future.cancelled() and ticket.future.exception() is None:
+                        self._lane(model_name).refund(ticket, time.monotonic())
+                raise
+            try:
+                return await call()
+            except Exception as e:
+                retry_after = _retry_after_seconds(e)
+                if retry_after is None:
+                    raise
+                with self._cond:
+                    lane = self._lane(model_name)
+                    lane.stats["rate_limited" if getattr(e, "status_code", None) == 429 else "transient_errors"] += 1
+                if attempt >= LLM_MAX_RETRIES or time.monotonic() + retry_after >= deadline:
+                    raise
+                attempt += 1
+                log.warning(f"LLM_SCHEDULER: '{model_name}' returned {type(e).__name__}; pausing its queue {retry_after:.1f}s "
+                            f"and requeueing (attempt {attempt + 1}/{LLM_MAX_RETRIES + 1}).")
+                self._pause(model_name, retry_after)
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            result = {}
+            for model_name, lane in self._lanes.items():
+                admitted = lane.stats["admitted"] or 1
+                result[model_name] = {
+                    **{key: value for key, value in lane.stats.items() if not key.endswith("_s")},
+                    "queue_depth": sum(1 for ticket in lane.queue if not ticket.future.done()),
+                    "avg_wait_ms": lane.stats["total_wait_s"] / admitted * 1000.0,
+                    "max_wait_ms": lane.stats["max_wait_s"] * 1000.0,
+                    "avg_wait_ms_by_priority": {
+                        str(priority): total_s / count * 1000.0 for priority, (count, total_s) in sorted(lane.wait_by_priority.items())
+                    },
+                    "requests_available": None if lane.requests.unlimited else round(lane.requests.available(now), 2), # None = unlimited
+                    "tokens_available": None if lane.tokens.unlimited else round(lane.tokens.available(now), 1),
+                    "paused_for_s": max(0.0, lane.paused_until - now),
+                }
+            return result
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    """Seconds to wait before retrying a provider error, or None if it is not worth retrying."""
+    status_code = getattr(error, "status_code", None)
+    if status_code == 429:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            return max(0.1, float(headers.get("retry-after")))
+        except (TypeError, ValueError):
+            return DEFAULT_RETRY_AFTER_SECONDS
+    if (isinstance(status_code, int) and status_code >= 500) or type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return 1.0
+    return None
+
+
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,197 @@
+# backend/message_catalog.py
+"""
+Fixed system messages (acknowledgements, command replies, canned errors) in every language the
+bot speaks, served from memory instead of asking the chat LLM to reword an English sentence.
+
+Variants: "en", "fr", "ar" (Modern Standard Arabic) and "ar_darija" (Algerian Darija). The
+built-in texts below are hand-written; message_catalog.json next to this file (or
+MESSAGE_CATALOG_FILE) overrides them per message and variant when present. That file can be
+regenerated offline with:
+
+    python message_catalog.py --build [--force]
+
+which machine-translates the variants that are missing (all of them with --force) and keeps
+the built-in ones otherwise. Nothing here calls an LLM at request time.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+
+log = logging.getLogger(__name__)
+
+MESSAGE_CATALOG_FILE = os.getenv("MESSAGE_CATALOG_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "message_catalog.json"))
+
+CATALOG_VARIANTS = ("en", "fr", "ar", "ar_darija")
+DEFAULT_VARIANT = "en"
+
+# Target descriptions used by the offline build step only.
+_BUILD_TARGETS = {
+    "fr": ("French", None),
+    "ar": ("Modern Standard Arabic (Fusha)", "arabic_msa_request"),
+    "ar_darija": ("Algerian Darija (an Arabic dialect, written in Arabic script)", "darija_explicit_request"),
+}
+
+_BUILTIN_MESSAGES: dict[str, dict[str, str]] = {
+    "language_switched": {
+        "en": "Okay, I'll reply in English from now on. How can I help?",
+        "fr": "D'accord, je vais désormais vous répondre en français. Comment puis-je vous aider ?",
+        "ar": "حسنًا، سأرد عليك باللغة العربية من الآن فصاعدًا. كيف يمكنني مساعدتك؟",
+        "ar_darija": "واخا، من درك نهدر معاك بالدارجة. كيفاش نقدر نعاونك؟",
+    },
+    "pdf_upload_hint": {
+        "en": "To upload a PDF, use the attachment button.",
+        "fr": "Pour envoyer un PDF, utilisez le bouton de pièce jointe.",
+        "ar": "لتحميل ملف PDF، استخدم زر المرفقات.",
+        "ar_darija": "باش تبعث ملف PDF، استعمل الزر تاع المرفقات.",
+    },
+    "pdf_context_cleared": {
+        "en": "PDF context cleared.",
+        "fr": "Le contexte du PDF a été effacé.",
+        "ar": "تم مسح سياق ملف PDF.",
+        "ar_darija": "نحّيت المعلومات تاع ملف PDF.",
+    },
+    "session_ended": {
+        "en": "Okay, session ended. How can I help you next?",
+        "fr": "D'accord, la session est terminée. Comment puis-je vous aider maintenant ?",
+        "ar": "حسنًا، انتهت الجلسة. كيف يمكنني مساعدتك الآن؟",
+        "ar_darija": "واخا، كملنا هاد الجلسة. واش نقدر نعاونك درك؟",
+    },
+    "pdf_processing_disabled": {
+        "en": "The PDF document '{filename}' was received, but PDF processing is currently disabled. I cannot analyze its content at this time.",
+        "fr": "Le document PDF '{filename}' a bien été reçu, mais le traitement des PDF est actuellement désactivé. Je ne peux pas analyser son contenu pour le moment.",
+        "ar": "تم استلام مستند PDF '{filename}'، لكن معالجة ملفات PDF معطلة حاليًا. لا يمكنني تحليل محتواه في الوقت الحالي.",
+        "ar_darija": "وصلني ملف PDF '{filename}'، بصح المعالجة تاع PDF راهي مطفية درك. ما نقدرش نقرا واش كاين فيه حاليا.",
+    },
+    "file_received": {
+        "en": "The file '{filename}' was received. I can acknowledge non-PDF files but cannot process their content in depth.",
+        "fr": "Le fichier '{filename}' a bien été reçu. Je peux accuser réception des fichiers non PDF, mais je ne peux pas analyser leur contenu en détail.",
+        "ar": "تم استلام الملف '{filename}'. يمكنني تأكيد استلام الملفات غير PDF، لكن لا يمكنني معالجة محتواها بشكل معمق.",
+        "ar_darija": "وصلني الملف '{filename}'. نقدر نأكدلك بلي وصلني، بصح ما نقدرش نحلل واش كاين فيه بالتفصيل.",
+    },
+    "file_upload_error": {
+        "en": "An error occurred while handling the uploaded file '{filename}'. Please try again.",
+        "fr": "Une erreur s'est produite lors du traitement du fichier envoyé '{filename}'. Veuillez réessayer.",
+        "ar": "حدث خطأ أثناء معالجة الملف المرفوع '{filename}'. يرجى المحاولة مرة أخرى.",
+        "ar_darija": "صرات مشكلة كي كنت نعالج الملف '{filename}' اللي بعثتو. عاود جرب من فضلك.",
+    },
+    "empty_input": {
+        "en": "It seems your message was empty or only contained a file I couldn't turn into a query. How can I help you today?",
+        "fr": "Il semble que votre message était vide ou ne contenait qu'un fichier que je n'ai pas pu exploiter. Comment puis-je vous aider aujourd'hui ?",
+        "ar": "يبدو أن رسالتك كانت فارغة أو احتوت فقط على ملف لم أتمكن من تحويله إلى استفسار. كيف يمكنني مساعدتك اليوم؟",
+        "ar_darija": "باين بلي الميساج تاعك كان فارغ ولا فيه غير ملف ما قدرتش نفهم منو سؤال. كيفاش نقدر نعاونك اليوم؟",
+    },
+    "empty_core_reply": {
+        "en": "I'm having trouble formulating a response. Please try rephrasing.",
+        "fr": "J'ai du mal à formuler une réponse. Pourriez-vous reformuler votre demande ?",
+        "ar": "أواجه صعوبة في صياغة رد. يرجى إعادة صياغة طلبك.",
+        "ar_darija": "ما قدرتش نلقى جواب مليح. عاود قولها بطريقة أخرى من فضلك.",
+    },
+    "core_error": {
+        "en": "An unexpected error occurred processing your request ('{input_preview}'). Please try again.",
+        "fr": "Une erreur inattendue s'est produite lors du traitement de votre demande ('{input_preview}'). Veuillez réessayer.",
+        "ar": "حدث خطأ غير متوقع أثناء معالجة طلبك ('{input_preview}'). يرجى المحاولة مرة أخرى.",
+        "ar_darija": "صرات مشكلة ما كانتش متوقعة كي كنت نعالج الطلب تاعك ('{input_preview}'). عاود جرب من فضلك.",
+    },
+    "fallback_rephrase": {
+        "en": "I'm not sure how to respond to that. Could you please rephrase your query, or let me know if you need help with a TV problem or have a general question?",
+        "fr": "Je ne suis pas sûr de savoir comment répondre à cela. Pourriez-vous reformuler votre demande, ou me dire si vous avez besoin d'aide pour un problème de téléviseur ou si vous avez une question générale ?",
+        "ar": "لست متأكدًا من كيفية الرد على ذلك. هل يمكنك إعادة صياغة طلبك، أو إخباري إن كنت تحتاج إلى مساعدة في مشكلة تلفاز أو لديك سؤال عام؟",
+        "ar_darija": "ما فهمتش مليح واش نجاوبك. تقدر تعاود تقولها بطريقة أخرى، ولا قولي إذا عندك مشكل في التلفزيون ولا سؤال عام؟",
+    },
+}
+
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+_messages: dict[str, dict[str, str]] = {}
+
+
+def _load_catalog(path: str = MESSAGE_CATALOG_FILE) -> dict[str, dict[str, str]]:
+    messages = {message_id: dict(variants) for message_id, variants in _BUILTIN_MESSAGES.items()}
+    if not os.path.exists(path):
+        return messages
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for message_id, variants in overrides.items():
+            if isinstance(variants, dict):
+                messages.setdefault(message_id, {}).update(
+                    {variant: text for variant, text in variants.items() if variant in CATALOG_VARIANTS and isinstance(text, str) and text}
+                )
+        log.info(f"MESSAGE_CATALOG: Loaded overrides for {len(overrides)} messages from {path}.")
+    except (OSError, ValueError) as e:
+        log.error(f"MESSAGE_CATALOG: Could not read {path}: {e}. Using built-in messages only.")
+    return messages
+
+
+def catalog_variant(language_code: str | None, dialect_info: str | None = None) -> str:
+    """Maps a session's language code and dialect info to a catalog variant."""
+    if language_code == "ar":
+        return "ar_darija" if dialect_info and "darija" in dialect_info.lower() else "ar"
+    return language_code if language_code in CATALOG_VARIANTS else DEFAULT_VARIANT
+
+
+def get_message(message_id: str, language_code: str | None, dialect_info: str | None = None, **params) -> str:
+    """
+    Returns the message in the session's language (English if that variant is missing), with
+    {placeholders} filled from `params`.
+    """
+    variants = _messages.get(message_id)
+    if not variants:
+        log.error(f"MESSAGE_CATALOG: Unknown message id '{message_id}'.")
+        return ""
+    template = variants.get(catalog_variant(language_code, dialect_info)) or variants[DEFAULT_VARIANT]
+    if not params:
+        return template
+    try:
+        return template.format(**params)
+    except (KeyError, IndexError, ValueError) as e:
+        log.warning(f"MESSAGE_CATALOG: Could not fill message '{message_id}': {e}")
+        return template
+
+
+async def _build_catalog(force: bool) -> dict[str, dict[str, str]]:
+    from groq_api import translate_text_lc # Only the offline build needs the LLM
+
+    built = {message_id: dict(variants) for message_id, variants in _messages.items()}
+    for message_id, variants in built.items():
+        english = variants[DEFAULT_VARIANT]
+        placeholders = set(_PLACEHOLDER_RE.findall(english))
+        for variant, (target_name, dialect_hint) in _BUILD_TARGETS.items():
+            if variants.get(variant) and not force:
+                continue
+            translated = await translate_text_lc(
+                english, "English", target_name, dialect_hint,
+                "Short chatbot system message. Keep every {placeholder} exactly as written."
+            )
+            if not translated or translated.startswith("Error:") or set(_PLACEHOLDER_RE.findall(translated)) != placeholders:
+                log.warning(f"MESSAGE_CATALOG: Build kept the existing '{variant}' text for '{message_id}' (translation unusable: {translated!r}).")
+                continue
+            variants[variant] = translated
+            log.info(f"MESSAGE_CATALOG: Built '{message_id}' [{variant}].")
+    return built
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Write the localized system-message catalog to a JSON file.")
+    parser.add_argument("--build", action="store_true", help="Machine-translate missing variants (needs GROQ_API_KEY).")
+    parser.add_argument("--force", action="store_true", help="With --build, re-translate every non-English variant.")
+    parser.add_argument("--output", default=MESSAGE_CATALOG_FILE, help="Catalog file to write.")
+    args = parser.parse_args(argv)
+
+    messages = asyncio.run(_build_catalog(args.force)) if args.build else _messages
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(messages, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(messages)} messages x {len(CATALOG_VARIANTS)} variants to {args.output}")
+    return 0
+
+
+_messages = _load_catalog()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,277 @@
+# backend/onnx_encoder.py
+"""
+Optional ONNX Runtime execution path for the sentence-transformers encoder.
+
+With SENTENCE_ENCODER_BACKEND=onnx the model is exported once to ONNX (transformer + pooling +
+normalization in one graph), dynamically quantized to int8 and served by onnxruntime with a fixed
+intra-op thread count. The export is cached under ONNX_MODEL_DIR and reused by every later start,
+which then never loads the PyTorch weights. Right after each export the ONNX embeddings are
+compared with the PyTorch ones; if they drift apart the export is rejected and PyTorch is used.
+
+Re-run the parity check on an existing export with:
+    python onnx_encoder.py --check [--model all-MiniLM-L6-v2]
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+SENTENCE_ENCODER_BACKEND = os.getenv("SENTENCE_ENCODER_BACKEND", "torch").strip().lower() # "torch" or "onnx"
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx_models"))
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() in ("1", "true", "yes")
+# One worker serves one query at a time; a few threads per session beats oversubscribing every core.
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", str(min(4, os.cpu_count() or 1))))
+ONNX_PARITY_MIN_COSINE = float(os.getenv("ONNX_PARITY_MIN_COSINE", "0.98"))
+ONNX_OPSET = 14
+
+_META_FILE = "encoder_meta.json"
+_FP32_MODEL_FILE = "model.onnx"
+_INT8_MODEL_FILE = "model.int8.onnx"
+
+PARITY_SENTENCES = [
+    "TV not powering on",
+    "No picture but sound is working",
+    "Red standby light blinks and the TV does not start",
+    "Check fuse F1 and the 12V line on the power board",
+    "La télé ne s'allume pas",
+    "Remote control not responding",
+    "Horizontal lines on the screen after the backlight turns on",
+    "Replace the T-CON board if the panel shows half screen",
+]
+
+
+def _export_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+def _pooling_config(st_model) -> tuple[str, bool]:
+    """Returns (pooling mode, normalize) of a sentence-transformers pipeline."""
+    from sentence_transformers.models import Normalize, Pooling
+
+    pooling_mode, normalize = "mean", False
+    for module in st_model:
+        if isinstance(module, Pooling):
+            pooling_mode = module.get_pooling_mode_str()
+        elif isinstance(module, Normalize):
+            normalize = True
+    if pooling_mode not in ("mean", "cls"):
+        raise ValueError(f"Unsupported pooling mode '{pooling_mode}' for ONNX export.")
+    return pooling_mode, normalize
+
+
+def export_onnx_encoder(model_name: str, st_model=None) -> str:
+    """
+    Exports `model_name` to ONNX (plus int8 when ONNX_QUANTIZE), saves its tokenizer next to it and
+    runs the parity check. Returns the export directory.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = st_model or SentenceTransformer(model_name, device="cpu")
+    st_model.eval()
+    export_dir = _export_dir(model_name)
+    os.makedirs(export_dir, exist_ok=True)
+    pooling_mode, normalize = _pooling_config(st_model)
+    transformer = st_model[0].auto_model
+
+    class _PooledEncoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            token_embeddings = self.transformer(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            )[0]
+            if pooling_mode == "cls":
+                embeddings = token_embeddings[:, 0]
+            else:
+                mask = attention_mask.unsqueeze(-1).to(token_embeddings.dtype)
+                embeddings = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            if normalize:
+                embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+            return embeddings
+
+    sample = st_model.tokenizer(["export sample"], padding=True, truncation=True, return_tensors="pt")
+    token_type_ids = sample.get("token_type_ids", torch.zeros_like(sample["input_ids"]))
+    fp32_path = os.path.join(export_dir, _FP32_MODEL_FILE)
+    log.info(f"ONNX_ENCODER: Exporting '{model_name}' to {fp32_path} (pooling={pooling_mode}, normalize={normalize}).")
+    with torch.no_grad():
+        torch.onnx.export(
+            _PooledEncoder(),
+            (sample["input_ids"], sample["attention_mask"], token_type_ids),
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["sentence_embedding"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "token_type_ids": {0: "batch", 1: "sequence"},
+                "sentence_embedding": {0: "batch"},
+            },
+            opset_version=ONNX_OPSET,
+        )
+
+    model_file = _FP32_MODEL_FILE
+    if ONNX_QUANTIZE:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        log.info("ONNX_ENCODER: Applying dynamic int8 quantization.")
+        quantize_dynamic(fp32_path, os.path.join(export_dir, _INT8_MODEL_FILE), weight_type=QuantType.QInt8)
+        model_file = _INT8_MODEL_FILE
+
+    st_model.tokenizer.save_pretrained(export_dir)
+    meta = {
+        "model_name": model_name,
+        "model_file": model_file,
+        "quantized": ONNX_QUANTIZE,
+        "dimension": int(st_model.get_sentence_embedding_dimension()),
+        "max_seq_length": int(st_model.max_seq_length),
+        "pooling": pooling_mode,
+        "normalize": normalize,
+    }
+    with open(os.path.join(export_dir, _META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    parity = check_parity(model_name, st_model)
+    meta["parity"] = parity
+    with open(os.path.join(export_dir, _META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return export_dir
+
+
+class OnnxSentenceEncoder:
+    """
+    Drop-in replacement for the parts of SentenceTransformer that vector_search uses:
+    encode(), get_sentence_embedding_dimension() and tokenizer.
+    """
+    def __init__(self, export_dir: str, intra_op_threads: int = ONNX_INTRA_OP_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(export_dir, _META_FILE), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        self.max_seq_length = self.meta["max_seq_length"]
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = max(1, intra_op_threads)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        model_path = os.path.join(export_dir, self.meta["model_file"])
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        log.info(f"ONNX_ENCODER: Loaded {model_path} with {options.intra_op_num_threads} intra-op thread(s).")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return int(self.meta["dimension"])
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single_input = isinstance(sentences, str)
+        sentences = [sentences] if single_input else list(sentences)
+        if not sentences:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype='float32')
+
+        # Sort by length so each batch pads to similar lengths, as sentence-transformers does.
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        outputs = np.zeros((len(sentences), self.get_sentence_embedding_dimension()), dtype='float32')
+        for start in range(0, len(sentences), batch_size):
+            batch_positions = order[start:start + batch_size]
+            features = self.tokenizer(
+                [sentences[i] for i in batch_positions], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors="np",
+            )
+            feeds = {name: features[name].astype('int64') for name in ("input_ids", "attention_mask") if name in self._input_names}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = features.get("token_type_ids", np.zeros_like(features["input_ids"])).astype('int64')
+            outputs[batch_positions] = self.session.run(None, feeds)[0]
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(outputs, axis=1, keepdims=True)
+            outputs = outputs / np.clip(norms, 1e-12, None)
+        return outputs[0] if single_input else outputs
+
+
+def check_parity(model_name: str, st_model=None, sentences: list | None = None) -> dict:
+    """Cosine similarity between PyTorch and ONNX embeddings of the same sentences."""
+    from sentence_transformers import SentenceTransformer
+
+    sentences = sentences or PARITY_SENTENCES
+    st_model = st_model or SentenceTransformer(model_name, device="cpu")
+    torch_embeddings = st_model.encode(sentences, convert_to_numpy=True, normalize_embeddings=True)
+    onnx_embeddings = OnnxSentenceEncoder(_export_dir(model_name)).encode(sentences, normalize_embeddings=True)
+    cosines = (torch_embeddings * onnx_embeddings).sum(axis=1)
+    result = {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "threshold": ONNX_PARITY_MIN_COSINE,
+        "passed": bool(cosines.min() >= ONNX_PARITY_MIN_COSINE),
+    }
+    log.info(f"ONNX_ENCODER: Parity for '{model_name}': min cosine {result['min_cosine']:.4f}, "
+             f"mean {result['mean_cosine']:.4f} (threshold {ONNX_PARITY_MIN_COSINE}).")
+    return result
+
+
+def load_sentence_encoder(model_name: str, intra_op_threads: int | None = None):
+    """
+    Returns the encoder selected by SENTENCE_ENCODER_BACKEND. Any failure on the ONNX path
+    (missing packages, export error, failed parity) falls back to the PyTorch model.
+    intra_op_threads overrides ONNX_INTRA_OP_THREADS for the ONNX session (encode worker processes).
+    """
+    if SENTENCE_ENCODER_BACKEND == "onnx":
+        try:
+            export_dir = _export_dir(model_name)
+            meta_path = os.path.join(export_dir, _META_FILE)
+            meta = None
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            if not meta or meta.get("quantized") != ONNX_QUANTIZE or "parity" not in meta:
+                export_onnx_encoder(model_name)
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            if meta["parity"]["passed"]:
+                return OnnxSentenceEncoder(export_dir, ONNX_INTRA_OP_THREADS if intra_op_threads is None else intra_op_threads)
+            log.error(f"ONNX_ENCODER: ONNX export of '{model_name}' failed the parity check "
+                      f"(min cosine {meta['parity']['min_cosine']:.4f}). Using PyTorch instead.")
+        except Exception as e:
+            log.error(f"ONNX_ENCODER: ONNX encoder unavailable for '{model_name}': {e}. Using PyTorch instead.", exc_info=True)
+    elif SENTENCE_ENCODER_BACKEND != "torch":
+        log.warning(f"ONNX_ENCODER: Unknown SENTENCE_ENCODER_BACKEND '{SENTENCE_ENCODER_BACKEND}'. Using PyTorch.")
+
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+
+def encoder_id(model_name: str, encoder) -> str:
+    """Identifies the embedding space: ONNX int8 vectors are close to, but not identical with, PyTorch ones."""
+    if isinstance(encoder, OnnxSentenceEncoder):
+        return f"{model_name}@onnx{'-int8' if encoder.meta.get('quantized') else ''}"
+    return model_name
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export or check the ONNX sentence encoder.")
+    parser.add_argument("--model", default=os.getenv("SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2"))
+    parser.add_argument("--check", action="store_true", help="Only run the parity check against an existing export.")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        result = check_parity(args.model)
+    else:
+        with open(os.path.join(export_onnx_encoder(args.model), _META_FILE), "r", encoding="utf-8") as f:
+            result = json.load(f)["parity"]
+    print(json.dumps(result, indent=2))
+    return 0 if result["passed"] else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# backend/parallel_encoder.py
+"""
+Corpus encoding for index builds: length-sorted chunks, optionally sharded across a pool of
+worker processes that each hold their own warm copy of the encoder.
+
+Small catalogs are encoded in-process (spawning workers and loading the model N times costs
+more than it saves). Above RAG_PARALLEL_ENCODE_MIN_TEXTS texts, chunks go to
+RAG_ENCODE_WORKERS processes with the machine's cores split evenly between them. Results are
+written into one preallocated float32 array as chunks finish, with progress and throughput logged.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+RAG_ENCODE_WORKERS = max(1, int(os.getenv("RAG_ENCODE_WORKERS", str(os.cpu_count() or 1))))
+RAG_ENCODE_BATCH_SIZE = max(1, int(os.getenv("RAG_ENCODE_BATCH_SIZE", "64")))
+RAG_ENCODE_CHUNK_SIZE = max(1, int(os.getenv("RAG_ENCODE_CHUNK_SIZE", "1024")))
+RAG_PARALLEL_ENCODE_MIN_TEXTS = int(os.getenv("RAG_PARALLEL_ENCODE_MIN_TEXTS", "4000"))
+PROGRESS_LOG_INTERVAL_SECONDS = 5.0
+
+_worker_encoder = None
+
+
+def _init_worker(model_name: str, threads_per_worker: int) -> None:
+    # So N workers do not each grab every core. onnx_encoder is usually imported already (spawn re-imports the
+    # main module), so its ONNX_INTRA_OP_THREADS default is fixed: the thread count is passed explicitly below.
+    os.environ["OMP_NUM_THREADS"] = str(threads_per_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    from onnx_encoder import load_sentence_encoder
+
+    global _worker_encoder
+    _worker_encoder = load_sentence_encoder(model_name, intra_op_threads=threads_per_worker)
+
+
+def _encode_chunk(positions: np.ndarray, texts: list, batch_size: int) -> tuple[np.ndarray, np.ndarray]:
+    embeddings = _worker_encoder.encode(texts, batch_size=batch_size, show_progress_bar=False, convert_to_numpy=True)
+    return positions, np.asarray(embeddings, dtype='float32')
+
+
+class _ProgressLog:
+    def __init__(self, total: int, label: str):
+        self.total = total
+        self.label = label
+        self.done = 0
+        self.started_at = time.perf_counter()
+        self._last_logged_at = self.started_at
+
+    def advance(self, count: int) -> None:
+        self.done += count
+        now = time.perf_counter()
+        if now - self._last_logged_at >= PROGRESS_LOG_INTERVAL_SECONDS or self.done >= self.total:
+            self._last_logged_at = now
+            elapsed = now - self.started_at
+            rate = self.done / elapsed if elapsed > 0 else 0.0
+            eta = (self.total - self.done) / rate if rate > 0 else 0.0
+            log.info(f"PARALLEL_ENCODER: {self.label}: {self.done}/{self.total} texts "
+                     f"({100.0 * self.done / max(self.total, 1):.1f}%), {rate:.1f} texts/s, ETA {eta:.1f}s.")
+
+
+def _length_sorted_chunks(texts: list, chunk_size: int) -> list[np.ndarray]:
+    # Similar lengths in one batch means little padding; positions map results back to input order.
+    order = np.argsort(np.fromiter((len(t) for t in texts), dtype='int64', count=len(texts)), kind="stable")
+    return [order[i:i + chunk_size] for i in range(0, len(order), chunk_size)]
+
+
+def encode_corpus(texts: list, encoder, model_name: str, dimension: int) -> np.ndarray:
+    """Encodes `texts` into a float32 (len(texts), dimension) array, in input order."""
+    num_texts = len(texts)
+    output = np.empty((num_texts, dimension), dtype='float32')
+    if num_texts == 0:
+        return output
+
+    chunks = _length_sorted_chunks(texts, RAG_ENCODE_CHUNK_SIZE)
+    workers = min(RAG_ENCODE_WORKERS, len(chunks))
+    progress = _ProgressLog(num_texts, f"Encoding with '{model_name}'")
+    remaining_chunks = chunks
+
+    if num_texts >= RAG_PARALLEL_ENCODE_MIN_TEXTS and workers > 1:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+        log.info(f"PARALLEL_ENCODER: Encoding {num_texts} texts in {len(chunks)} chunks on {workers} worker processes "
+                 f"({threads_per_worker} thread(s) each, batch size {RAG_ENCODE_BATCH_SIZE}).")
+        finished_chunk_ids = set()
+        try:
+            # "spawn": forking a process that already initialized torch/OpenMP thread pools can deadlock.
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, threads_per_worker),
+            ) as pool:
+                futures = {
+                    pool.submit(_encode_chunk, positions, [texts[i] for i in positions], RAG_ENCODE_BATCH_SIZE): chunk_id
+                    for chunk_id, positions in enumerate(chunks)
+                }
+                for future in as_completed(futures):
+                    positions, embeddings = future.result()
+                    output[positions] = embeddings
+                    finished_chunk_ids.add(futures[future])
+                    progress.advance(len(positions))
+            remaining_chunks = []
+        except Exception as e:
+            remaining_chunks = [positions for chunk_id, positions in enumerate(chunks) if chunk_id not in finished_chunk_ids]
+            log.error(f"PARALLEL_ENCODER: Worker pool failed ({e}). Encoding the {len(remaining_chunks)} remaining chunk(s) in-process.",
+                      exc_info=True)
+
+    for positions in remaining_chunks:
+        embeddings = encoder.encode([texts[i] for i in positions], batch_size=RAG_ENCODE_BATCH_SIZE,
+                                    show_progress_bar=False, convert_to_numpy=True)
+        output[positions] = np.asarray(embeddings, dtype='float32')
+        progress.advance(len(positions))
+
+    elapsed = time.perf_counter() - progress.started_at
+    log.info(f"PARALLEL_ENCODER: Encoded {num_texts} texts in {elapsed:.2f}s ({num_texts / max(elapsed, 1e-9):.1f} texts/s).")
+    return output
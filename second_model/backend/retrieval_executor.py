@@ -0,0 +1,104 @@
+# backend/retrieval_executor.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+# Retrieval calls (query encoding + FAISS/BM25) running at once. torch, onnxruntime and FAISS
+# release the GIL in their kernels, so threads overlap well; more workers than cores only adds
+# contention with the encoder's own intra-op threads.
+RAG_RETRIEVAL_CONCURRENCY = max(1, int(os.getenv("RAG_RETRIEVAL_CONCURRENCY", "2")))
+# Queue depth above which a warning is logged (requests are still queued, never dropped).
+RAG_RETRIEVAL_QUEUE_WARN_DEPTH = int(os.getenv("RAG_RETRIEVAL_QUEUE_WARN_DEPTH", "8"))
+
+
+class RetrievalExecutor:
+    """
+    Bounded thread pool for CPU-heavy retrieval work, awaitable from any event loop.
+
+    Flask runs each async view in its own event loop, so the pool is shared process-wide and
+    results are handed back through asyncio.wrap_future() on whichever loop is awaiting.
+    Counters track queue depth, in-flight work and wait/run times for the status endpoint.
+    """
+    def __init__(self, max_workers: int = RAG_RETRIEVAL_CONCURRENCY, queue_warn_depth: int = RAG_RETRIEVAL_QUEUE_WARN_DEPTH):
+        self.max_workers = max_workers
+        self.queue_warn_depth = queue_warn_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-retrieval")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.total_wait_s = 0.0
+        self.total_run_s = 0.0
+        self.max_wait_s = 0.0
+
+    def _run_tracked(self, submitted_at: float, fn, args, kwargs):
+        started_at = time.perf_counter()
+        wait_s = started_at - submitted_at
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.total_wait_s += wait_s
+            self.max_wait_s = max(self.max_wait_s, wait_s)
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            run_s = time.perf_counter() - started_at
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.failed += int(failed)
+                self.total_run_s += run_s
+            log.debug(f"RETRIEVAL_EXECUTOR: {getattr(fn, '__name__', fn)} waited {wait_s * 1000:.1f} ms, ran {run_s * 1000:.1f} ms.")
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs fn(*args, **kwargs) on the pool and awaits its result without blocking the event loop."""
+        with self._lock:
+            self.queued += 1
+            self.submitted += 1
+            queue_depth = self.queued
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+        if queue_depth > self.queue_warn_depth:
+            log.warning(f"RETRIEVAL_EXECUTOR: {queue_depth} retrieval calls queued behind {self.max_workers} worker(s).")
+        future = self._executor.submit(self._run_tracked, time.perf_counter(), fn, args, kwargs)
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future) -> None:
+        # Cancelling the awaiting task cancels a still-queued pool future; _run_tracked never runs for it.
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+                self.cancelled += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed or 1
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "max_queue_depth": self.max_queue_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "avg_wait_ms": self.total_wait_s / finished * 1000.0,
+                "max_wait_ms": self.max_wait_s * 1000.0,
+                "avg_run_ms": self.total_run_s / finished * 1000.0,
+            }
+
+
+retrieval_executor = RetrievalExecutor()
@@ -0,0 +1,143 @@
+# backend/semantic_cache.py
+"""
+Semantic answer cache for general-knowledge questions.
+
+Questions are embedded with the RAG sentence encoder (vector_search.encode_queries, so repeats
+also hit the query-embedding cache) and matched by cosine similarity against a small in-memory
+FAISS index of previously answered questions. There is one index per reply language/dialect,
+since the stored answers are already localized. Entries expire after a TTL and each language
+keeps at most SEMANTIC_CACHE_MAX_ENTRIES, evicting the least recently used.
+
+The 0.92 threshold was chosen on English questions; languages the encoder is not trained on
+(vector_search.encoder_supports_language) get no cache at all rather than an unvalidated one.
+"""
+import logging
+import os
+import threading
+import time
+
+import faiss
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")) # Cosine similarity
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(24 * 3600)))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500")) # Per language
+
+
+class _LanguageIndex:
+    def __init__(self, dimension: int):
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        self.entries: dict[int, dict] = {} # id -> {"question", "answer", "created_at", "last_used_at", "hits"}
+
+    def remove(self, ids: list[int]) -> None:
+        if ids:
+            self.index.remove_ids(np.asarray(ids, dtype='int64'))
+            for entry_id in ids:
+                self.entries.pop(entry_id, None)
+
+
+class SemanticAnswerCache:
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._languages: dict[str, _LanguageIndex] = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def supports_language(language_key: str) -> bool:
+        from vector_search import encoder_supports_language # Deferred, as in _embed()
+
+        return encoder_supports_language(language_key)
+
+    @staticmethod
+    def _embed(question: str) -> np.ndarray | None:
+        from vector_search import encode_queries # Deferred: importing vector_search pulls in the encoder stack
+
+        embeddings = encode_queries([question])
+        if embeddings is None:
+            return None
+        vector = np.array(embeddings[:1], dtype='float32') # Copy: encode_queries may return cached arrays
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, question: str, language_key: str) -> tuple[str | None, np.ndarray | None]:
+        """Returns (cached answer or None, question embedding). Pass the embedding back to store() on a miss."""
+        vector = self._embed(question)
+        if vector is None:
+            return None, None
+        now = time.time()
+        with self._lock:
+            language_index = self._languages.get(language_key)
+            if language_index is None or language_index.index.ntotal == 0:
+                self.misses += 1
+                return None, vector
+            scores, ids = language_index.index.search(vector, 1)
+            entry_id, score = int(ids[0][0]), float(scores[0][0])
+            entry = language_index.entries.get(entry_id)
+            if entry is not None and now - entry["created_at"] > self.ttl_seconds:
+                language_index.remove([entry_id])
+                entry = None
+            if entry is None or score < self.threshold:
+                self.misses += 1
+                return None, vector
+            entry["last_used_at"] = now
+            entry["hits"] += 1
+            self.hits += 1
+        log.info(f"SEMANTIC_CACHE: Hit ({score:.3f}) [{language_key}] '{question[:50]}' ~ '{entry['question'][:50]}'")
+        return entry["answer"], vector
+
+    def store(self, question: str, answer: str, language_key: str, vector: np.ndarray | None = None) -> None:
+        if vector is None:
+            vector = self._embed(question)
+            if vector is None:
+                return
+        now = time.time()
+        with self._lock:
+            language_index = self._languages.get(language_key)
+            if language_index is None:
+                language_index = self._languages[language_key] = _LanguageIndex(vector.shape[1])
+            expired = [entry_id for entry_id, entry in language_index.entries.items() if now - entry["created_at"] > self.ttl_seconds]
+            language_index.remove(expired)
+            overflow = len(language_index.entries) + 1 - self.max_entries
+            if overflow > 0:
+                least_recent = sorted(language_index.entries, key=lambda entry_id: language_index.entries[entry_id]["last_used_at"])[:overflow]
+                language_index.remove(least_recent)
+                self.evictions += len(least_recent)
+            entry_id = self._next_id
+            self._next_id += 1
+            language_index.index.add_with_ids(vector, np.asarray([entry_id], dtype='int64'))
+            language_index.entries[entry_id] = {"question": question, "answer": answer, "created_at": now, "last_used_at": now, "hits": 0}
+            self.stores += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._languages.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": SEMANTIC_CACHE_ENABLED,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "max_entries_per_language": self.max_entries,
+                "entries": {language_key: len(language_index.entries) for language_key, language_index in self._languages.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+semantic_answer_cache = SemanticAnswerCache()
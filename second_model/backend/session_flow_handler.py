@@ -5,10 +5,10 @@ import sys
 
 try:
     from groq_api import (
-        classify_follow_up_intent_lc, 
         # FollowUpIntentOutput, # Not directly used as a type hint here, tuple is used
         call_groq_llm_final_answer_lc 
     )
+    from follow_up_classifier import classify_follow_up_reply
     from session_manager import ChatSession
     # from language_handler import get_localized_keywords # Not used in this version of the handler
     from troubleshooting_handler import (
@@ -29,7 +29,8 @@ log = logging.getLogger(__name__)
 async def _handle_bot_expectation_response(
     session: ChatSession, user_input_raw: str,
     data_store, index_store, text_to_original_data_idx_map_store, 
-    components_data_store, image_base_path: str
+    components_data_store, image_base_path: str,
+    model_catalog,
 ) -> str | None: # Returns ENGLISH core response or localized Markdown
     expectation = session.get_expectation()
     if not expectation: 
@@ -57,12 +58,12 @@ async def _handle_bot_expectation_response(
     elif expectation_type == "model_switch_confirmation" and expectation_details.get("target_model"):
         bot_q_context = f"I asked if you want to switch our focus to TV model '{expectation_details['target_model']}' based on your mention of it."
 
-    intent_cat, extracted_model_from_intent = await classify_follow_up_intent_lc(
+    # Obvious yes/no/model replies are classified locally; the rest falls back to classify_follow_up_intent_lc
+    intent_cat, extracted_model_from_intent = await classify_follow_up_reply(
         user_query=user_input_raw,
         bot_s_previous_question_context=bot_q_context,
-        target_language_name=session.current_language_name,
-        dialect_context_hint=session.last_detected_dialect_info,
-        memory_messages=session.get_lc_memory_messages()
+        session=session,
+        model_catalog=model_catalog
     )
     
     final_model_to_use = extracted_model_from_intent
@@ -88,14 +89,15 @@ async def _handle_bot_expectation_response(
                 user_problem_original_lang=original_problem_context, session=session,
                 data_store=data_store, index_store=index_store,
                 text_to_original_data_idx_map_store=text_to_original_data_idx_map_store,
-                components_data_store=components_data_store
+                components_data_store=components_data_store, model_catalog=model_catalog
             )
         elif expectation_type == "model_for_media_request" and original_media_query:
             session.set_active_model(final_model_to_use, "media_request_model_provided")
             # handle_image_component_query can return localized Markdown or English
             english_core_response = await handle_image_component_query(
                 user_query=original_media_query, session=session, data_store=data_store,
-                components_data_store=components_data_store, image_base_path=image_base_path
+                components_data_store=components_data_store, image_base_path=image_base_path,
+                model_catalog=model_catalog
             )
         else: 
             if session.active_tv_model != final_model_to_use: 
@@ -122,7 +124,7 @@ async def _handle_bot_expectation_response(
                 user_problem_original_lang=session.current_problem_description, session=session,
                 data_store=data_store, index_store=index_store,
                 text_to_original_data_idx_map_store=text_to_original_data_idx_map_store,
-                components_data_store=components_data_store
+                components_data_store=components_data_store, model_catalog=model_catalog
             )
         elif model_switch_target:
             session.set_active_model(model_switch_target, "user_confirmed_switch")
@@ -187,14 +189,16 @@ async def handle_ongoing_session_turn(
     session: ChatSession,
     user_input_raw: str,
     data_store, index_store, text_to_original_data_idx_map_store,
-    components_data_store, image_base_path: str
+    components_data_store, image_base_path: str,
+    model_catalog,
 ) -> str | None: 
 
     # 1. Handle direct responses to bot's questions (if any expectation is set)
     if session.get_expectation():
         return await _handle_bot_expectation_response(
             session, user_input_raw, data_store, index_store,
-            text_to_original_data_idx_map_store, components_data_store, image_base_path
+            text_to_original_data_idx_map_store, components_data_store, image_base_path,
+            model_catalog=model_catalog
         )
 
     # 2. If no specific expectation, process as a general follow-up in an active session
@@ -278,7 +282,8 @@ async def handle_ongoing_session_turn(
             media_response = await handle_image_component_query(
                 user_query=user_input_raw, 
                 session=session, data_store=data_store,
-                components_data_store=components_data_store, image_base_path=image_base_path
+                components_data_store=components_data_store, image_base_path=image_base_path,
+                model_catalog=model_catalog
             )
             assistant_response_content = media_response 
         else:
@@ -1,6 +1,7 @@
 # backend/session_manager.py
 import logging
 import datetime
+import threading
 from typing import List, Dict, Any, Union
 
 # Langchain imports
@@ -17,6 +18,7 @@ except ImportError:
     SUPPORTED_LANGUAGES_MAP = {"en": "English", "fr": "French", "ar": "Arabic"}
     def get_language_name(code): return SUPPORTED_LANGUAGES_MAP.get(code, "English")
 
+from conversation_memory import memory_budget, memory_compactor, select_memory_messages
 
 log = logging.getLogger(__name__)
 MAX_HISTORY_TURNS_UI = 15
@@ -51,6 +53,11 @@ class ChatSession:
             memory_key="history", # Must match MessagesPlaceholder in ChatPromptTemplate
             return_messages=True  # Returns list of BaseMessage objects
         )
+        # Older turns are folded into memory_summary in the background (see conversation_memory.py)
+        self.memory_summary: str | None = None
+        self.memory_lock = threading.Lock()
+        self.memory_compaction_pending: bool = False
+        self.memory_generation: int = 0 # Bumped on clear, so an in-flight compaction is discarded
 
         # PDF Context
         self.pdf_context_text: str | None = None
@@ -75,10 +82,13 @@ class ChatSession:
             self.history_for_ui = self.history_for_ui[-(MAX_HISTORY_TURNS_UI * 2 + 5):]
 
         # Add to Langchain memory
-        if role == "user":
-            self.memory.chat_memory.add_user_message(content_stripped)
-        elif role == "assistant":
-            self.memory.chat_memory.add_ai_message(content_stripped)
+        with self.memory_lock:
+            if role == "user":
+                self.memory.chat_memory.add_user_message(content_stripped)
+            elif role == "assistant":
+                self.memory.chat_memory.add_ai_message(content_stripped)
+        if role == "assistant":
+            memory_compactor.maybe_schedule(self)
         # System messages can be added if they are crucial for LLM context
         # For example, a system message about a PDF being loaded could be:
         # elif role == "system" and "PDF context set" in content_stripped: # Example condition
@@ -90,9 +100,13 @@ class ChatSession:
                   f"(UI items: {len(self.history_for_ui)}, "
                   f"LLM Mem messages: {len(self.memory.chat_memory.messages)})")
 
-    def get_lc_memory_messages(self) -> List[BaseMessage]:
-        """Returns the list of BaseMessage objects from Langchain memory."""
-        return self.memory.chat_memory.messages
+    def get_lc_memory_messages(self, budget_name: str = "default") -> List[BaseMessage]:
+        """
+        Returns the rolling summary plus the most recent Langchain memory messages that fit the
+        token budget of `budget_name` (see MEMORY_TOKEN_BUDGETS in conversation_memory.py).
+        """
+        with self.memory_lock:
+            return select_memory_messages(list(self.memory.chat_memory.messages), self.memory_summary, memory_budget(budget_name))
 
     def get_ui_history(self) -> list[dict]:
         """Returns history formatted for UI (list of dicts)."""
@@ -100,7 +114,10 @@ class ChatSession:
 
     def clear_lc_memory(self):
         """Clears the Langchain conversational memory."""
-        self.memory.clear()
+        with self.memory_lock:
+            self.memory.clear()
+            self.memory_summary = None
+            self.memory_generation += 1
         log.info("Langchain conversational memory cleared.")
 
     def set_language(self, lang_code: str, dialect_info: str | None = None):
@@ -264,5 +281,6 @@ class ChatSession:
             "pdf_context_active": bool(self.pdf_context_text),
             "pdf_filename": self.pdf_context_source_filename,
             "general_images_for_active_model": bool(self.current_model_general_images),
-            "lc_memory_message_count": len(self.memory.chat_memory.messages) if self.memory else 0
+            "lc_memory_message_count": len(self.memory.chat_memory.messages) if self.memory else 0,
+            "lc_memory_summarized": bool(self.memory_summary)
         }
\ No newline at end of file
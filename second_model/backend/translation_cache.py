@@ -0,0 +1,201 @@
+# backend/translation_cache.py
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError
+
+log = logging.getLogger(__name__)
+
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "4096"))
+TRANSLATION_CACHE_TTL_SECONDS = float(os.getenv("TRANSLATION_CACHE_TTL_SECONDS", str(7 * 86400)))
+TRANSLATION_CACHE_DB = os.getenv("TRANSLATION_CACHE_DB") # Optional SQLite file shared by workers on one host
+
+
+def make_translation_key(text: str, source_language: str, target_language: str, dialect: str, context_hint: str, model_name: str) -> str:
+    """Content address of one translation: every input that shapes the prompt, plus the model answering it."""
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    fields = "\x00".join([text_hash, source_language or "", target_language or "", dialect or "", context_hint or "", model_name or ""])
+    return hashlib.sha256(fields.encode("utf-8")).hexdigest()
+
+
+class _ComputationCancelled(Exception):
+    """Handed to callers coalesced onto a computation whose owning task was cancelled."""
+
+
+def _resolve(future: Future, result=None, exception: BaseException | None = None) -> None:
+    """Resolves an in-flight future, tolerating one that was already cancelled or resolved."""
+    if future.done():
+        return
+    try:
+        if exception is None:
+            future.set_result(result)
+        else:
+            future.set_exception(exception)
+    except InvalidStateError:
+        pass
+
+
+class TranslationCache:
+    """
+    LRU + TTL cache of translated strings with an optional SQLite tier, and single-flight
+    coalescing: while a translation for a key is being computed, further requests for the same
+    key await that computation instead of starting another LLM call. The in-flight futures are
+    concurrent.futures ones, so callers on different event loops (one per Flask request) can
+    share them. Only successful translations are stored.
+    """
+    def __init__(self, max_entries: int = TRANSLATION_CACHE_SIZE, ttl_seconds: float = TRANSLATION_CACHE_TTL_SECONDS,
+                 disk_path: str | None = TRANSLATION_CACHE_DB):
+        self.max_entries = max(0, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._db: sqlite3.Connection | None = None
+        if disk_path:
+            try:
+                self._db = sqlite3.connect(disk_path, check_same_thread=False, timeout=5.0)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, created_at REAL NOT NULL, value TEXT NOT NULL)"
+                )
+                self._db.commit()
+                log.info(f"TRANSLATION_CACHE: On-disk tier enabled at {disk_path}")
+            except sqlite3.Error as e:
+                log.error(f"TRANSLATION_CACHE: Could not open on-disk tier at {disk_path}: {e}. Using memory only.")
+                self._db = None
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            value = self._get_locked(key, now)
+            if value is None:
+                self.misses += 1
+            return value
+
+    def _get_locked(self, key: str, now: float) -> str | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if now - created_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        value = self._get_from_disk(key, now)
+        if value is not None:
+            self.disk_hits += 1
+            self._put_locked(key, value, now)
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._put_locked(key, value, now)
+            if self._db is not None:
+                try:
+                    self._db.execute("INSERT OR REPLACE INTO translations (key, created_at, value) VALUES (?, ?, ?)", (key, now, value))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    log.warning(f"TRANSLATION_CACHE: Failed to write to on-disk tier: {e}")
+
+    def _put_locked(self, key: str, value: str, created_at: float) -> None:
+        if self.max_entries == 0:
+            return
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_from_disk(self, key: str, now: float) -> str | None:
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT created_at, value FROM translations WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            log.warning(f"TRANSLATION_CACHE: Failed to read from on-disk tier: {e}")
+            return None
+        if not row or now - row[0] > self.ttl_seconds:
+            return None
+        return row[1]
+
+    async def get_or_compute(self, key: str, compute, is_cacheable) -> str | None:
+        """
+        Returns the cached value for `key`, or awaits `compute()` (a coroutine function) once for all
+        concurrent callers of the same key. The result is stored only if is_cacheable(result).
+        """
+        while True:
+            now = time.time()
+            is_owner = False
+            with self._lock:
+                value = self._get_locked(key, now)
+                if value is not None:
+                    return value
+                in_flight = self._in_flight.get(key)
+                if in_flight is not None:
+                    self.coalesced += 1
+                else:
+                    self.misses += 1
+                    in_flight = Future()
+                    self._in_flight[key] = in_flight
+                    is_owner = True
+            if is_owner:
+                break
+            try:
+                # Shielded: cancelling one waiter must not cancel the computation shared with the owner and other waiters
+                return await asyncio.shield(asyncio.wrap_future(in_flight))
+            except _ComputationCancelled:
+                continue # The owner's task was cancelled (e.g. its request was abandoned); compute it ourselves
+
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            _resolve(in_flight, exception=_ComputationCancelled())
+            raise
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            _resolve(in_flight, exception=e)
+            raise
+        if is_cacheable(result):
+            self.put(key, result)
+        with self._lock:
+            self._in_flight.pop(key, None)
+        _resolve(in_flight, result)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._in_flight),
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits + self.coalesced) / lookups if lookups else 0.0,
+                "disk_tier": self._db is not None,
+            }
+
+
+translation_cache = TranslationCache()
@@ -9,20 +9,45 @@ try:
         generate_hypothetical_document_lc as generate_hypothetical_document,
         translate_text_lc as translate_input_for_rag,
     )
-    from vector_search import search_relevant_guides 
+    from vector_search import search_relevant_guides_multi_async
     from session_manager import ChatSession 
     from knowledge_handler import handle_general_knowledge_query 
+    from catalog_index import ModelCatalog
+    from turn_trace import trace_stage
+    from turn_events import final_answer_stream
 except ImportError as e:
     print(f"CRITICAL IMPORT ERROR in troubleshooting_handler.py: {e}. Application will likely fail.", file=sys.stderr)
     raise 
 
 log = logging.getLogger(__name__)
 
+async def translate_problem_for_rag(user_problem_original_lang: str, session: ChatSession) -> str:
+    """English version of the user's problem for HyDE/RAG; the original text if the session is English or translation fails."""
+    if session.current_language == "en":
+        log.debug(f"TS_HANDLER_SPECIFIC: Using original problem for RAG (already English): '{user_problem_original_lang[:80]}'")
+        return user_problem_original_lang
+    log.debug(f"TS_HANDLER_SPECIFIC: Translating problem to English for RAG. Original: '{user_problem_original_lang[:80]}'")
+    with trace_stage("translate_problem"):
+        translated_problem = await translate_input_for_rag(
+            text_to_translate=user_problem_original_lang,
+            source_language_name=session.current_language_name,
+            target_language_name="English",
+            dialect_context_hint=session.last_detected_dialect_info,
+            context_hint_for_translation="TV problem description for troubleshooting lookup"
+        )
+    if translated_problem and not translated_problem.startswith("Error:"):
+        log.info(f"TS_HANDLER_SPECIFIC: Translated problem for RAG/HyDE: '{translated_problem[:80]}'")
+        return translated_problem
+    log.warning(f"TS_HANDLER_SPECIFIC: English translation of problem failed or empty. LLM response: {translated_problem}. "
+                f"Using original language input for RAG: '{user_problem_original_lang[:80]}'")
+    return user_problem_original_lang
+
 async def handle_specific_tv_troubleshooting(
     user_problem_original_lang: str, 
     session: ChatSession, 
     data_store, index_store, text_to_original_data_idx_map_store,
     components_data_store, 
+    model_catalog: ModelCatalog, # The knowledge base snapshot's catalog; never rebuilt per request
 ) -> str | None: 
     active_model = session.active_tv_model 
     if not active_model:
@@ -37,56 +62,44 @@ async def handle_specific_tv_troubleshooting(
         log.error("TS_HANDLER_SPECIFIC: RAG index or data_store is not available.")
         return "System error: The troubleshooting knowledge base is currently unavailable. Please try again later."
 
-    problem_for_rag_en = user_problem_original_lang
-    if session.current_language != "en":
-        log.debug(f"TS_HANDLER_SPECIFIC: Translating problem to English for RAG. Original: '{user_problem_original_lang[:80]}'")
-        translated_problem = await translate_input_for_rag(
-            text_to_translate=user_problem_original_lang,
-            source_language_name=session.current_language_name,
-            target_language_name="English",
-            dialect_context_hint=session.last_detected_dialect_info,
-            context_hint_for_translation="TV problem description for troubleshooting lookup"
-        )
-        if translated_problem and not translated_problem.startswith("Error:"):
-            problem_for_rag_en = translated_problem
-            log.info(f"TS_HANDLER_SPECIFIC: Translated problem for RAG/HyDE: '{problem_for_rag_en[:80]}'")
-        else:
-            log.warning(f"TS_HANDLER_SPECIFIC: English translation of problem failed or empty. LLM response: {translated_problem}. "
-                        f"Using original language input for RAG: '{user_problem_original_lang[:80]}'")
-    else:
-        log.debug(f"TS_HANDLER_SPECIFIC: Using original problem for RAG (already English): '{problem_for_rag_en[:80]}'")
+    problem_for_rag_en = await translate_problem_for_rag(user_problem_original_lang, session)
             
-    hypothetical_query_en = await generate_hypothetical_document(problem_for_rag_en)
-    search_query_text_en = problem_for_rag_en 
+    with trace_stage("hyde"):
+        hypothetical_query_en = await generate_hypothetical_document(problem_for_rag_en)
+    # Search with every usable phrasing at once: a bad HyDE title is outvoted by the user's own words.
+    search_query_variants_en = []
     if hypothetical_query_en and not hypothetical_query_en.startswith("Error:"):
-        search_query_text_en = hypothetical_query_en
-        log.info(f"TS_HANDLER_SPECIFIC: Using HyDE-generated query for RAG: '{search_query_text_en[:80]}'")
+        search_query_variants_en.append(hypothetical_query_en)
+        log.info(f"TS_HANDLER_SPECIFIC: Using HyDE-generated query for RAG: '{hypothetical_query_en[:80]}'")
     else:
         log.info(f"TS_HANDLER_SPECIFIC: HyDE failed or returned empty/error. "
-                 f"Using translated/original problem as RAG query: '{search_query_text_en[:80]}'")
+                 f"Using translated/original problem as RAG query: '{problem_for_rag_en[:80]}'")
+    search_query_variants_en.append(problem_for_rag_en)
 
     NUMBER_OF_SEMANTIC_CANDIDATES_TO_CHECK = 5 
-    log.debug(f"TS_HANDLER_SPECIFIC: Calling search_relevant_guides with: "
-              f"query_text='{search_query_text_en[:80]}', target_model='{active_model}', "
+    log.debug(f"TS_HANDLER_SPECIFIC: Calling search_relevant_guides_multi_async with: "
+              f"query_variants={[q[:80] for q in search_query_variants_en]}, target_model='{active_model}', "
               f"k_results={NUMBER_OF_SEMANTIC_CANDIDATES_TO_CHECK}")
     
-    rag_result_guide_dict = search_relevant_guides(
-        query_text=search_query_text_en, 
-        target_model=active_model, 
-        data=data_store,
-        index=index_store, 
-        text_to_original_data_idx_map=text_to_original_data_idx_map_store,
-        k_results=NUMBER_OF_SEMANTIC_CANDIDATES_TO_CHECK
-    )
+    with trace_stage("rag_search"):
+        rag_ranked_guides = await search_relevant_guides_multi_async(
+            query_texts=search_query_variants_en, 
+            target_model=active_model, 
+            data=data_store,
+            index=index_store, 
+            text_to_original_data_idx_map=text_to_original_data_idx_map_store,
+            k_results=NUMBER_OF_SEMANTIC_CANDIDATES_TO_CHECK
+        )
+    rag_result_guide_dict = rag_ranked_guides[0][0] if rag_ranked_guides else None
 
     if rag_result_guide_dict:
         log.info(f"TS_HANDLER_SPECIFIC: RAG Found guide for model '{active_model}'. Issue='{rag_result_guide_dict.get('issue')}'")
         
         if rag_result_guide_dict.get("images"): session.current_model_general_images = rag_result_guide_dict.get("images")
         elif not session.current_model_general_images and active_model: 
-            model_entry_for_images = next((item for item in data_store if item.get("model","").upper() == active_model.upper() and item.get("images")), None)
-            if model_entry_for_images and model_entry_for_images.get("images"):
-                session.current_model_general_images = model_entry_for_images.get("images")
+            model_general_images = model_catalog.general_images(active_model)
+            if model_general_images:
+                session.current_model_general_images = model_general_images
 
         guide_issue_en = rag_result_guide_dict.get("issue", "the relevant troubleshooting information") 
         steps_en_list_raw = rag_result_guide_dict.get("steps")
@@ -132,17 +145,20 @@ async def handle_specific_tv_troubleshooting(
         Do NOT add any conversational fluff before starting the step explanations, like "Okay, here are the explained steps:". Just start with the first explained step.
         """
         
-        explained_steps_response_en = await call_groq_llm_final_answer(
-            user_context_for_current_turn=llm_explanation_context_en,
-            target_language_name="English", 
-            dialect_context_hint=None, 
-            memory_messages=session.get_lc_memory_messages(), 
-            system_prompt_template_str=(
-                "You are a helpful AI assistant that explains technical TV troubleshooting steps clearly to a non-expert user. "
-                "You will be given raw steps and context. Your output should be a detailed, user-friendly explanation of these steps in {{target_language_name}} (which will be English for this call), "
-                "followed by a safety note and an optional offer for related media. Use Markdown for formatting."
+        # In English this explanation is the reply itself; otherwise it is translated and the translation is streamed.
+        with trace_stage("explain_steps"), final_answer_stream(enabled=session.current_language == "en"):
+            explained_steps_response_en = await call_groq_llm_final_answer(
+                user_context_for_current_turn=llm_explanation_context_en,
+                target_language_name="English", 
+                dialect_context_hint=None, 
+                memory_messages=session.get_lc_memory_messages("explain_steps"), 
+                call_site="explain_steps",
+                system_prompt_template_str=(
+                    "You are a helpful AI assistant that explains technical TV troubleshooting steps clearly to a non-expert user. "
+                    "You will be given raw steps and context. Your output should be a detailed, user-friendly explanation of these steps in {{target_language_name}} (which will be English for this call), "
+                    "followed by a safety note and an optional offer for related media. Use Markdown for formatting."
+                )
             )
-        )
 
         if explained_steps_response_en and not explained_steps_response_en.startswith("Error:"):
             log.info(f"TS_HANDLER_SPECIFIC: LLM generated explained steps (English): '{explained_steps_response_en[:150]}...'")
@@ -157,14 +173,14 @@ async def handle_specific_tv_troubleshooting(
             return (f"I found these steps for TV model '{active_model}' regarding '{guide_issue_en}':\n{raw_steps_formatted}"
                     f"{safety_note}\nI had trouble elaborating on them, but I hope this list helps.")
     else: 
-        log.warning(f"TS_HANDLER_SPECIFIC: RAG Search did NOT find guide for model '{active_model}', query '{search_query_text_en}'.")
+        log.warning(f"TS_HANDLER_SPECIFIC: RAG Search did NOT find guide for model '{active_model}', query '{search_query_variants_en[0]}'.")
         offer_text_en = ""
         image_offers_en = [] 
         if session.current_model_general_images:
             if session.current_model_general_images.get('motherboard'): image_offers_en.append("a motherboard image")
             if session.current_model_general_images.get('key_components'): image_offers_en.append("a general key components image")
             if session.current_model_general_images.get('block_diagram'): image_offers_en.append("a block diagram")
-        model_comp_data_entry = next((item for item in (components_data_store or []) if item.get("tv_model","").upper() == active_model.upper()), None)
+        model_comp_data_entry = model_catalog.component_entry(active_model)
         if model_comp_data_entry:
             if model_comp_data_entry.get("image_filename") and "a detailed key components diagram" not in image_offers_en:
                  image_offers_en.append("a detailed key components diagram")
@@ -205,11 +221,14 @@ Your task is to generate a helpful response in **English**. This response should
     system_prompt_template_en_advice = (
         "You are a helpful TV troubleshooting assistant... generate general advice in **English**..."
     ) 
-    memory_for_this_call = session.get_lc_memory_messages()[:1] if session.get_lc_memory_messages() else []
+    # One message of context, as before the token budgets: the rolling summary once older turns have been
+    # folded into it (it is what the oldest exchange became), otherwise the oldest message within the budget.
+    memory_for_this_call = session.get_lc_memory_messages("classify")[:1]
     english_advice = await call_groq_llm_final_answer( 
         user_context_for_current_turn=llm_context_for_general_advice_en,
         target_language_name="English", dialect_context_hint=None,      
-        memory_messages=memory_for_this_call, system_prompt_template_str=system_prompt_template_en_advice
+        memory_messages=memory_for_this_call, system_prompt_template_str=system_prompt_template_en_advice,
+        call_site="general_advice"
     )
     if english_advice and not english_advice.startswith("Error:"):
         if ask_for_model_explicitly and \
@@ -234,22 +253,15 @@ Your task is to generate a helpful response in **English**. This response should
             session.set_expectation("model_for_problem", problem_context_for_model_request=user_problem_original_lang)
         return fallback_en
 
-async def handle_list_all_model_issues(session: ChatSession, data_store) -> str | None:
+async def handle_list_all_model_issues(session: ChatSession, data_store, model_catalog: ModelCatalog) -> str | None:
     active_model = session.active_tv_model
     if not active_model:
         log.warning("TS_HANDLER_LIST_ISSUES: No active TV model in session.")
         session.set_expectation("model_for_list_issues", details={"original_request": "list all issues"})
         return "I need to know which TV model you're interested in to list its issues. What is the model number?"
     log.info(f"TS_HANDLER_LIST_ISSUES: Preparing English list of issues for model {active_model}.")
-    documented_issues_en = []
-    if data_store:
-        for item in data_store:
-            if item.get("model", "").upper() == active_model.upper():
-                issue_title_en = item.get("issue")
-                if issue_title_en and isinstance(issue_title_en, str):
-                    documented_issues_en.append(issue_title_en.strip())
-    if documented_issues_en:
-        unique_issues_en = sorted(list(set(documented_issues_en)))
+    unique_issues_en = model_catalog.issues(active_model) # Already unique and sorted
+    if unique_issues_en:
         issues_list_str_md_en = "\n- ".join(unique_issues_en)
         return (
             f"For TV model '{active_model}', here are some of the documented issues I have information about:\n- {issues_list_str_md_en}\n\n"
@@ -273,7 +285,7 @@ async def handle_session_follow_up_llm_call(user_query_original_lang: str, sessi
     log.info(f"TS_HANDLER_FOLLOWUP_LLM: Model '{session.active_tv_model or 'N/A'}', "
              f"Problem '{session.current_problem_description or 'General context'}'. Query: '{user_query_original_lang[:50]}...'")
 
-    lc_memory_messages = session.get_lc_memory_messages() 
+    lc_memory_messages = session.get_lc_memory_messages("chat") 
     pdf_context_str = session.get_pdf_context_for_llm(max_chars=500)
     last_bot_message_content = ""
     if lc_memory_messages:
@@ -327,7 +339,8 @@ async def handle_session_follow_up_llm_call(user_query_original_lang: str, sessi
         user_context_for_current_turn=context_for_llm_en,
         target_language_name="English", dialect_context_hint=None,
         memory_messages=lc_memory_messages,
-        system_prompt_template_str=system_prompt_en
+        system_prompt_template_str=system_prompt_en,
+        call_site="troubleshooting_follow_up"
     )
 
     if english_response_llm and not english_response_llm.startswith("Error:"):
@@ -0,0 +1,63 @@
+# backend/turn_events.py
+"""
+Progress events for a turn, for clients that stream the reply (/api/chat/stream).
+
+The endpoint installs a sink with turn_event_sink(); code inside the turn then reports stages
+(trace_stage() in turn_trace.py does this automatically) and, for the LLM call whose output is
+returned to the user verbatim, tokens as they arrive. Call sites opt in to token streaming with
+`with final_answer_stream():` and run their chain through invoke_chain(). Outside a streaming
+request all of this is a no-op and invoke_chain() is a plain ainvoke().
+
+Token events are provisional: the final "done" event carries the authoritative reply (cached
+translations, marker handling and fallbacks can make it differ from the streamed text).
+"""
+import contextvars
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable
+
+log = logging.getLogger(__name__)
+
+_event_sink: contextvars.ContextVar[Callable[[dict], None] | None] = contextvars.ContextVar("turn_event_sink", default=None)
+_stream_final_answer: contextvars.ContextVar[bool] = contextvars.ContextVar("turn_stream_final_answer", default=False)
+
+
+@contextmanager
+def turn_event_sink(sink: Callable[[dict], None]):
+    token = _event_sink.set(sink)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+
+def emit_event(event_type: str, **fields) -> None:
+    sink = _event_sink.get()
+    if sink is None:
+        return
+    try:
+        sink({"type": event_type, **fields})
+    except Exception as e: # A broken client connection must never break the turn
+        log.warning(f"TURN_EVENTS: Dropping '{event_type}' event: {e}")
+
+
+@contextmanager
+def final_answer_stream(enabled: bool = True):
+    """Marks LLM calls in the enclosed block as producing the final reply, so their tokens are streamed."""
+    token = _stream_final_answer.set(enabled and _event_sink.get() is not None)
+    try:
+        yield
+    finally:
+        _stream_final_answer.reset(token)
+
+
+async def invoke_chain(chain, inputs: dict, config: dict | None = None) -> Any:
+    """chain.ainvoke(inputs), or chain.astream(inputs) with a "token" event per chunk inside final_answer_stream()."""
+    if not _stream_final_answer.get():
+        return await chain.ainvoke(inputs, config)
+    parts = []
+    async for chunk in chain.astream(inputs, config):
+        if chunk:
+            parts.append(chunk)
+            emit_event("token", text=chunk)
+    return "".join(parts)
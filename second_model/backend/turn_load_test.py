@@ -0,0 +1,136 @@
+# backend/turn_load_test.py
+"""
+Offline load test of the full turn pipeline (process_user_turn) against the deterministic fake
+LLM provider (llm_providers.py), so our own overhead and throughput can be profiled without API
+quota. Starts the core like the app does (encoder, knowledge base, warm-ups), then runs
+--sessions concurrent conversations of --turns turns each and reports turn latency percentiles,
+throughput, per-stage averages (turn_trace), per-call-site LLM time and tokens (llm_metrics) and
+scheduler waits.
+
+Usage:
+    python turn_load_test.py [--sessions 20] [--turns 5] [--provider fake] [--queries queries.txt]
+
+The fake provider's latency is set with FAKE_LLM_LATENCY_MS / FAKE_LLM_ROLE_LATENCY_MS. The
+scheduler's rate limits apply only if GROQ_RPM_LIMIT / GROQ_TPM_LIMIT / GROQ_RATE_LIMITS are set.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+DEFAULT_QUERIES = [
+    "My TV won't turn on",
+    "EL.RT2864-FG48",
+    "yes",
+    "What is the difference between OLED and LED?",
+    "Show me the main board of the P75-2841AV9.7",
+    "Ma télé n'a pas de son",
+    "التلفاز لا يشتغل",
+    "The screen is black but there is sound",
+    "no",
+    "Tell me more",
+]
+
+
+def _percentile_ms(samples_seconds: list, percentile: float) -> float:
+    if not samples_seconds:
+        return 0.0
+    ordered = sorted(samples_seconds)
+    return ordered[min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))] * 1000.0
+
+
+async def _run_conversation(process_user_turn, session_factory, queries: list, offset: int, turns: int, latencies: list, errors: list) -> None:
+    session = session_factory()
+    for turn in range(turns):
+        user_input = queries[(offset + turn) % len(queries)]
+        session.add_to_history("user", user_input)
+        started_at = time.perf_counter()
+        try:
+            reply = await process_user_turn(session, user_input)
+            session.add_to_history("assistant", reply)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        latencies.append(time.perf_counter() - started_at)
+
+
+async def run_load_test(sessions: int, turns: int, queries: list) -> dict:
+    from chatbot_core import process_user_turn
+    from session_manager import ChatSession
+
+    latencies: list = []
+    errors: list = []
+    started_at = time.perf_counter()
+    await asyncio.gather(*(
+        _run_conversation(process_user_turn, ChatSession, queries, i, turns, latencies, errors) for i in range(sessions)
+    ))
+    wall_s = time.perf_counter() - started_at
+    return {
+        "turns": len(latencies),
+        "errors": len(errors),
+        "first_errors": errors[:5],
+        "wall_s": wall_s,
+        "turns_per_s": len(latencies) / wall_s if wall_s else 0.0,
+        "p50_ms": _percentile_ms(latencies, 50),
+        "p95_ms": _percentile_ms(latencies, 95),
+        "p99_ms": _percentile_ms(latencies, 99),
+        "max_ms": max(latencies) * 1000.0 if latencies else 0.0,
+    }
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the turn pipeline against a fake or local LLM provider.")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent conversations.")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per conversation.")
+    parser.add_argument("--provider", default=os.getenv("LLM_PROVIDER", "fake"), help="LLM_PROVIDER to use (default: fake).")
+    parser.add_argument("--queries", default=None, help="Text file with one user message per line (default: a built-in mix).")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    # Must be set before groq_api is imported.
+    os.environ["LLM_PROVIDER"] = args.provider
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()] or DEFAULT_QUERIES
+
+    from core_startup import run_startup
+    from llm_metrics import llm_metrics
+    from llm_scheduler import llm_scheduler
+    from turn_trace import get_turn_stats
+
+    if not run_startup():
+        print("Core startup failed (see log).", file=sys.stderr)
+        return 1
+    report = asyncio.run(run_load_test(args.sessions, args.turns, queries))
+    report["stages"] = get_turn_stats()["stages"]
+    report["llm_sites"] = llm_metrics.stats()["sites"]
+    report["scheduler"] = llm_scheduler.stats()
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+    print(f"Turn load test: provider={args.provider}, {args.sessions} sessions x {args.turns} turns")
+    print(f"{report['turns']} turns in {report['wall_s']:.2f}s ({report['turns_per_s']:.1f} turns/s), {report['errors']} errors")
+    print(f"Turn latency: p50={report['p50_ms']:.0f} ms, p95={report['p95_ms']:.0f} ms, p99={report['p99_ms']:.0f} ms, max={report['max_ms']:.0f} ms")
+    print(f"\n{'stage':<28} {'count':>6} {'avg ms':>9} {'max ms':>9}")
+    for name, stage in report["stages"].items():
+        print(f"{name:<28} {stage['count']:>6} {stage['avg_ms']:>9.1f} {stage['max_ms']:>9.1f}")
+    print(f"\n{'llm call site':<28} {'calls':>6} {'avg ms':>9} {'p95 ms':>9} {'share':>6} {'in tok':>8} {'out tok':>8}")
+    for name, site in report["llm_sites"].items():
+        print(f"{name:<28} {site['calls']:>6} {site['avg_total_ms']:>9.1f} {site['p95_total_ms']:>9.1f} {site['time_share']:>6.1%} "
+              f"{site['avg_prompt_tokens']:>8.0f} {site['avg_completion_tokens']:>8.0f}")
+    for model_name, lane in report["scheduler"].items():
+        print(f"\nScheduler [{model_name}]: admitted={lane['admitted']}, avg wait={lane['avg_wait_ms']:.1f} ms, "
+              f"max wait={lane['max_wait_ms']:.1f} ms, rate limited={lane['rate_limited']}")
+    for error in report["first_errors"]:
+        print(f"  error: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
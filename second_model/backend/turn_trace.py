@@ -0,0 +1,126 @@
+# backend/turn_trace.py
+"""
+Per-turn stage timing. process_user_turn() opens a TurnTrace; any code running inside the turn
+(including tasks started with asyncio.gather/create_task, which inherit the context) records its
+stages with `with trace_stage("name"):`. Stages may overlap, so a turn reports both its wall time
+(the critical path) and the sum of its stage times; the gap between the two is what concurrent
+execution saved. LLM calls made during the turn are attached by llm_metrics with their call site,
+latency and token counts. Per-stage aggregates are kept for the admin status endpoint.
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from turn_events import emit_event
+
+log = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar["TurnTrace | None"] = contextvars.ContextVar("turn_trace", default=None)
+
+_stats_lock = threading.Lock()
+_stage_stats: dict[str, dict] = {}
+_turn_stats = {"turns": 0, "total_wall_s": 0.0, "total_stage_s": 0.0, "max_wall_s": 0.0,
+               "llm_calls": 0, "total_llm_s": 0.0, "llm_tokens": 0}
+
+
+class TurnTrace:
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.started_at = time.perf_counter()
+        self.stages: list[tuple[str, float, float]] = [] # (name, start offset s, duration s)
+        self.llm_calls: list[dict] = [] # LLMCall.as_dict() plus start offset, see llm_metrics.py
+
+    def record(self, name: str, started_at: float, ended_at: float) -> None:
+        self.stages.append((name, started_at - self.started_at, ended_at - started_at))
+
+    def record_llm_call(self, call: dict) -> None:
+        self.llm_calls.append({**call, "start_ms": (time.perf_counter() - self.started_at) * 1000.0 - call["total_ms"]})
+
+    def summary(self) -> dict:
+        wall_s = time.perf_counter() - self.started_at
+        return {
+            "wall_ms": wall_s * 1000.0,
+            "stage_sum_ms": sum(duration for _, _, duration in self.stages) * 1000.0,
+            "stages": [
+                {"name": name, "start_ms": offset * 1000.0, "duration_ms": duration * 1000.0}
+                for name, offset, duration in sorted(self.stages, key=lambda stage: stage[1])
+            ],
+            "llm_sum_ms": sum(call["total_ms"] for call in self.llm_calls),
+            "llm_tokens": sum(call["prompt_tokens"] + call["completion_tokens"] for call in self.llm_calls),
+            "llm_calls": sorted(self.llm_calls, key=lambda call: call["start_ms"]),
+        }
+
+
+def current_turn_trace() -> TurnTrace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_stage(name: str):
+    """Times the enclosed block as stage `name` of the current turn (a no-op outside a turn)."""
+    trace = _current_trace.get()
+    started_at = time.perf_counter()
+    emit_event("stage", stage=name)
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.record(name, started_at, time.perf_counter())
+
+
+@contextmanager
+def turn_trace(label: str = ""):
+    """Opens a TurnTrace for the enclosed turn, then logs it and folds it into the aggregates."""
+    trace = TurnTrace(label)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        _finish_turn(trace)
+
+
+def _finish_turn(trace: TurnTrace) -> None:
+    summary = trace.summary()
+    wall_s = summary["wall_ms"] / 1000.0
+    with _stats_lock:
+        _turn_stats["turns"] += 1
+        _turn_stats["total_wall_s"] += wall_s
+        _turn_stats["total_stage_s"] += summary["stage_sum_ms"] / 1000.0
+        _turn_stats["max_wall_s"] = max(_turn_stats["max_wall_s"], wall_s)
+        _turn_stats["llm_calls"] += len(summary["llm_calls"])
+        _turn_stats["total_llm_s"] += summary["llm_sum_ms"] / 1000.0
+        _turn_stats["llm_tokens"] += summary["llm_tokens"]
+        for name, _, duration in trace.stages:
+            stats = _stage_stats.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stats["count"] += 1
+            stats["total_s"] += duration
+            stats["max_s"] = max(stats["max_s"], duration)
+    log.info(f"TURN_TRACE: {trace.label} wall={summary['wall_ms']:.0f} ms, stages={summary['stage_sum_ms']:.0f} ms: "
+             + ", ".join(f"{stage['name']}@{stage['start_ms']:.0f}+{stage['duration_ms']:.0f}" for stage in summary["stages"])
+             + f"; llm={len(summary['llm_calls'])} calls, {summary['llm_sum_ms']:.0f} ms, {summary['llm_tokens']} tokens: "
+             + ", ".join(f"{call['call_site']}+{call['total_ms']:.0f}" for call in summary["llm_calls"]))
+
+
+def get_turn_stats() -> dict:
+    with _stats_lock:
+        turns = _turn_stats["turns"] or 1
+        return {
+            "turns": _turn_stats["turns"],
+            "avg_wall_ms": _turn_stats["total_wall_s"] / turns * 1000.0,
+            "avg_stage_sum_ms": _turn_stats["total_stage_s"] / turns * 1000.0,
+            "max_wall_ms": _turn_stats["max_wall_s"] * 1000.0,
+            "avg_llm_calls": _turn_stats["llm_calls"] / turns,
+            "avg_llm_sum_ms": _turn_stats["total_llm_s"] / turns * 1000.0,
+            "avg_llm_tokens": _turn_stats["llm_tokens"] / turns,
+            "stages": {
+                name: {
+                    "count": stats["count"],
+                    "avg_ms": stats["total_s"] / stats["count"] * 1000.0,
+                    "max_ms": stats["max_s"] * 1000.0,
+                }
+                for name, stats in sorted(_stage_stats.items())
+            },
+        }
@@ -2,23 +2,147 @@
 import json
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+import hashlib
 import logging
 import os 
+import shutil
+import tempfile
+import threading
+
+from embedding_cache import EmbeddingCache, normalize_query_text
+from lexical_search import build_issue_bm25_index
+from onnx_encoder import SENTENCE_ENCODER_BACKEND, encoder_id, load_sentence_encoder
+from retrieval_executor import retrieval_executor
+from parallel_encoder import encode_corpus
 
 # --- Initialization ---
 MODEL_NAME = os.getenv("SENTENCE_TRANSFORMER_MODEL", 'all-MiniLM-L6-v2') # Allow override via env var
 log = logging.getLogger(__name__)
 
-log.info(f"VECTOR_SEARCH: Attempting to load sentence transformer model: {MODEL_NAME}")
-try:
-    model = SentenceTransformer(MODEL_NAME)
-    log.info(f"VECTOR_SEARCH: Successfully loaded sentence transformer model: {MODEL_NAME}")
-except Exception as e:
-    log.error(f"VECTOR_SEARCH: CRITICAL - Failed to load Sentence Transformer model '{MODEL_NAME}': {e}", exc_info=True)
-    # This is a critical failure; the application cannot perform RAG without it.
-    # Consider raising a more specific custom exception or handling it in the main app startup.
-    raise RuntimeError(f"Failed to initialize sentence transformer model: {MODEL_NAME}. RAG will not function.") from e
+# Checkpoints trained to embed paraphrases in different languages close together. Any other encoder
+# (the default all-MiniLM-L6-v2 included) is treated as English-only: its similarities between
+# French/Arabic/Darija texts are not meaningful, so similarity-thresholded shortcuts are skipped for them.
+MULTILINGUAL_ENCODER_MODELS = (
+    "paraphrase-multilingual-MiniLM-L12-v2",
+    "paraphrase-multilingual-mpnet-base-v2",
+    "distiluse-base-multilingual-cased-v1",
+    "distiluse-base-multilingual-cased-v2",
+    "LaBSE",
+)
+
+def encoder_supports_language(language_code: str | None) -> bool:
+    """Whether the sentence encoder's similarities can be trusted for text in this language (or catalog variant)."""
+    return language_code == "en" or MODEL_NAME.rstrip("/").split("/")[-1] in MULTILINGUAL_ENCODER_MODELS
+
+# --- On-disk index artifact ---
+# Bump INDEX_ARTIFACT_VERSION whenever the layout of the files below (or the way texts are
+# selected for embedding) changes, so stale artifacts are never memory-mapped back in.
+INDEX_ARTIFACT_VERSION = 2
+INDEX_CACHE_DIR = os.getenv("RAG_INDEX_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_cache"))
+INDEX_CACHE_ENABLED = os.getenv("RAG_INDEX_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+_ARTIFACT_EMBEDDINGS_FILE = "embeddings.npy"
+_ARTIFACT_INDEX_FILE = "index.faiss"
+_ARTIFACT_META_FILE = "meta.json"
+
+# --- Index backend ---
+# flat_l2  : exact L2 search over raw embeddings (original behaviour).
+# flat_ip  : exact cosine search (inner product over L2-normalized embeddings).
+# ivf_flat : cosine IVF with trained centroids; RAG_IVF_NPROBE lists are scanned per query.
+# hnsw     : cosine HNSW graph; RAG_HNSW_EF_SEARCH controls the search beam width.
+# sq8      : cosine over 8-bit scalar-quantized vectors (4x smaller than float32).
+# pq       : cosine over product-quantized codes, RAG_PQ_M bytes per vector (32x smaller at M=48).
+# pca      : cosine over vectors PCA-reduced to RAG_PCA_DIM dimensions.
+# The compressed backends (sq8, pq, pca) fetch RAG_RERANK_FACTOR x k candidates and re-rank them
+# exactly against the float32 embeddings, which are memory-mapped from the index artifact and so
+# live once in the page cache instead of once per worker.
+# Sublinear backends (ivf_flat, hnsw) only pay off once the catalog reaches a few thousand issues;
+# run `python index_benchmark.py` to compare recall@k and latency on the current data first.
+SUPPORTED_INDEX_BACKENDS = ("flat_l2", "flat_ip", "ivf_flat", "hnsw", "sq8", "pq", "pca")
+COMPRESSED_INDEX_BACKENDS = ("sq8", "pq", "pca")
+INDEX_BACKEND = os.getenv("RAG_INDEX_BACKEND", "flat_l2").strip().lower()
+if INDEX_BACKEND not in SUPPORTED_INDEX_BACKENDS:
+    log.warning(f"VECTOR_SEARCH: Unknown RAG_INDEX_BACKEND '{INDEX_BACKEND}'. Falling back to 'flat_l2'.")
+    INDEX_BACKEND = "flat_l2"
+IVF_NLIST = int(os.getenv("RAG_IVF_NLIST", "0")) # 0 = derive from the number of vectors
+IVF_NPROBE = int(os.getenv("RAG_IVF_NPROBE", "8"))
+HNSW_M = int(os.getenv("RAG_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("RAG_HNSW_EF_CONSTRUCTION", "80"))
+HNSW_EF_SEARCH = int(os.getenv("RAG_HNSW_EF_SEARCH", "64"))
+PQ_M = int(os.getenv("RAG_PQ_M", "48")) # Sub-quantizers (bytes per vector at 8 bits); must divide the dimension
+PQ_NBITS = int(os.getenv("RAG_PQ_NBITS", "8"))
+PCA_DIM = int(os.getenv("RAG_PCA_DIM", "128"))
+RERANK_FACTOR = max(1, int(os.getenv("RAG_RERANK_FACTOR", "4")))
+# Fuse BM25 over issue titles + step descriptions with the dense results, so exact designators
+# ("PF1", "SD2 12V", "EMI PLF1") are not lost to MiniLM's fuzziness.
+HYBRID_LEXICAL_ENABLED = os.getenv("RAG_HYBRID_LEXICAL", "true").lower() in ("1", "true", "yes")
+
+# The encoder is loaded on first use (normally by the startup warm-up), not at import time.
+model = None
+ENCODER_ID = MODEL_NAME
+_QUERY_CACHE_CASEFOLD = False
+_model_lock = threading.Lock()
+
+def get_sentence_model():
+    """Returns the sentence encoder, loading it on the first call. Thread-safe."""
+    global model, ENCODER_ID, _QUERY_CACHE_CASEFOLD
+    if model is not None:
+        return model
+    with _model_lock:
+        if model is not None:
+            return model
+        log.info(f"VECTOR_SEARCH: Attempting to load sentence transformer model: {MODEL_NAME} (backend: {SENTENCE_ENCODER_BACKEND})")
+        try:
+            loaded_model = load_sentence_encoder(MODEL_NAME)
+        except Exception as e:
+            log.error(f"VECTOR_SEARCH: CRITICAL - Failed to load Sentence Transformer model '{MODEL_NAME}': {e}", exc_info=True)
+            # This is a critical failure; the application cannot perform RAG without it.
+            raise RuntimeError(f"Failed to initialize sentence transformer model: {MODEL_NAME}. RAG will not function.") from e
+        # Embeddings from different execution backends are not interchangeable in caches and artifacts.
+        ENCODER_ID = encoder_id(MODEL_NAME, loaded_model)
+        # all-MiniLM-L6-v2 and most sentence-transformers checkpoints lowercase in the tokenizer; only then
+        # is it safe for "TV Not Powering On" and "tv not powering on" to share a cache entry.
+        _QUERY_CACHE_CASEFOLD = bool(getattr(getattr(loaded_model, "tokenizer", None), "do_lower_case", False))
+        model = loaded_model
+        log.info(f"VECTOR_SEARCH: Successfully loaded sentence transformer model: {ENCODER_ID}")
+        return model
+
+def is_sentence_model_loaded() -> bool:
+    return model is not None
+
+query_embedding_cache = EmbeddingCache()
+
+def encode_queries(query_texts: list) -> np.ndarray | None:
+    """
+    Encodes query texts, serving repeats from query_embedding_cache. All cache misses are
+    encoded in a single batched model.encode() call. Returns a float32 (n, dim) array.
+    """
+    if not query_texts:
+        return None
+    encoder = get_sentence_model()
+    keys = [
+        EmbeddingCache.make_key(ENCODER_ID, normalize_query_text(text, _QUERY_CACHE_CASEFOLD))
+        for text in query_texts
+    ]
+    vectors: list = [query_embedding_cache.get(key) for key in keys]
+    missing_positions = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing_positions:
+        # Repeated texts inside one batch are encoded once.
+        unique_missing: dict[str, int] = {}
+        for i in missing_positions:
+            unique_missing.setdefault(keys[i], i)
+        texts_to_encode = [query_texts[i].strip() for i in unique_missing.values()]
+        log.debug(f"VECTOR_SEARCH: Encoding {len(texts_to_encode)} uncached query text(s).")
+        encoded = encoder.encode(texts_to_encode, convert_to_numpy=True)
+        if encoded is None or encoded.size == 0:
+            log.error("VECTOR_SEARCH: Failed to encode search queries (resulted in empty embedding).")
+            return None
+        encoded_by_key = {}
+        for key, vector in zip(unique_missing.keys(), encoded.astype('float32')):
+            query_embedding_cache.put(key, vector)
+            encoded_by_key[key] = vector
+        for i in missing_positions:
+            vectors[i] = encoded_by_key[keys[i]]
+    return np.vstack(vectors).astype('float32')
 
 def load_data(json_path: str) -> list | None:
     """Loads troubleshooting data from a JSON file and flattens it."""
@@ -89,12 +213,8 @@ def load_data(json_path: str) -> list | None:
         log.error(f"VECTOR_SEARCH: An unexpected error occurred loading and flattening data from {json_path}: {e}", exc_info=True)
         return None
 
-def create_faiss_index(data: list) -> tuple[faiss.Index | None, list | None]: 
-    """Creates a FAISS index for the 'issue' field in the (flattened) data."""
-    if not data:
-        log.error("VECTOR_SEARCH: Cannot create FAISS index from empty or invalid (flattened) data.")
-        return None, None
-
+def _collect_issue_texts(data: list) -> tuple[list, list]:
+    """Returns the 'issue' texts to embed and the FAISS-row -> flattened-data-index map."""
     texts_to_embed = []
     # text_to_original_data_idx_map maps the index in FAISS (and texts_to_embed)
     # to the index in the *flattened data* list.
@@ -109,139 +229,735 @@ def create_faiss_index(data: list) -> tuple[faiss.Index | None, list | None]:
             log.debug(f"VECTOR_SEARCH_INDEXING: Adding to embed (FlatDataIdx {i}): Model='{item.get('model', 'N/A')}', Issue='{issue_text[:100]}...'")
         else:
             log.warning(f"VECTOR_SEARCH_INDEXING: Flattened item at index {i} is invalid or missing 'issue' field. Skipping. Item: {str(item)[:100]}")
+    return texts_to_embed, text_to_original_data_idx_map
 
+def _encode_issue_texts(data: list, reusable_embeddings: dict | None = None) -> tuple[np.ndarray | None, list | None]:
+    """
+    Encodes the 'issue' field of every flattened item. Returns (float32 embeddings, map).
+    Texts found in `reusable_embeddings` (issue text -> vector) are copied instead of re-encoded.
+    """
+    texts_to_embed, text_to_original_data_idx_map = _collect_issue_texts(data)
     if not texts_to_embed:
         log.error("VECTOR_SEARCH: No valid 'issue' fields found in flattened data to index. FAISS index will be empty.")
         return None, None
 
     log.info(f"VECTOR_SEARCH: Found {len(texts_to_embed)} valid issues from flattened data to index.")
-    try:
-        log.info(f"VECTOR_SEARCH: Encoding {len(texts_to_embed)} issues using '{MODEL_NAME}'...")
-        # Consider adding batch_size for very large datasets, e.g., model.encode(..., batch_size=128)
-        embeddings = model.encode(texts_to_embed, show_progress_bar=False, convert_to_numpy=True) 
-        if embeddings is None or embeddings.size == 0:
+    reusable_embeddings = reusable_embeddings or {}
+    texts_to_encode = list(dict.fromkeys(text for text in texts_to_embed if text not in reusable_embeddings))
+    log.info(f"VECTOR_SEARCH: Encoding {len(texts_to_encode)} issues using '{MODEL_NAME}' "
+             f"({len(texts_to_embed) - len(texts_to_encode)} reused from the previous index)...")
+    encoder = get_sentence_model()
+    dimension = int(encoder.get_sentence_embedding_dimension() or 0)
+    encoded = np.empty((0, dimension), dtype='float32')
+    if texts_to_encode:
+        # Length-sorted batches, spread over worker processes for large catalogs (see parallel_encoder.py).
+        encoded = encode_corpus(texts_to_encode, encoder, MODEL_NAME, dimension)
+        if encoded is None or encoded.size == 0:
             log.error("VECTOR_SEARCH: Encoding resulted in empty embeddings array.")
             return None, None
-        
-        embeddings_float32 = embeddings.astype('float32') # FAISS typically expects float32
-        dimension = embeddings_float32.shape[1]
-        log.info(f"VECTOR_SEARCH: Embeddings created with dimension: {dimension}")
-        
-        index = faiss.IndexFlatL2(dimension) # Using L2 distance (Euclidean)
-        # For larger datasets, consider more advanced FAISS indexes like IndexIVFFlat for speed,
-        # but IndexFlatL2 is exact and good for moderate sizes.
-        index.add(embeddings_float32)
-        log.info(f"VECTOR_SEARCH: FAISS index created successfully with {index.ntotal} vectors.")
+    encoded_row_by_text = {text: row for row, text in enumerate(texts_to_encode)}
+    # Filled row by row so peak memory stays at one copy of the corpus embeddings.
+    embeddings_float32 = np.empty((len(texts_to_embed), dimension), dtype='float32') # FAISS typically expects float32
+    for row, text in enumerate(texts_to_embed):
+        encoded_row = encoded_row_by_text.get(text)
+        embeddings_float32[row] = encoded[encoded_row] if encoded_row is not None else reusable_embeddings[text]
+    log.info(f"VECTOR_SEARCH: Embeddings created with dimension: {embeddings_float32.shape[1]}")
+    return embeddings_float32, text_to_original_data_idx_map
+
+def backend_uses_cosine(backend: str) -> bool:
+    return backend != "flat_l2"
+
+def prepare_embeddings_for_backend(embeddings: np.ndarray, backend: str = None) -> np.ndarray:
+    """Returns a contiguous float32 copy of `embeddings`, L2-normalized if the backend searches by cosine."""
+    prepared = np.array(embeddings, dtype='float32', order='C', copy=True)
+    if backend_uses_cosine(backend or INDEX_BACKEND):
+        faiss.normalize_L2(prepared)
+    return prepared
+
+def _resolve_ivf_nlist(num_vectors: int, nlist: int) -> int:
+    if nlist <= 0:
+        nlist = int(4 * np.sqrt(num_vectors))
+    # FAISS wants ~39 training points per centroid; never ask for more lists than that allows.
+    return max(1, min(nlist, num_vectors // 39 or 1))
+
+def _resolve_pq_m(dimension: int, m: int) -> int:
+    # FAISS needs the dimension to split evenly across sub-quantizers; take the nearest divisor below.
+    m = max(1, min(m, dimension))
+    while dimension % m:
+        m -= 1
+    return m
+
+def _resolve_pq_nbits(num_vectors: int, nbits: int) -> int:
+    # Each sub-quantizer trains 2**nbits centroids and needs at least that many training points.
+    return max(1, min(nbits, int(np.log2(max(num_vectors, 2)))))
+
+def index_build_params(num_vectors: int, backend: str = None, dimension: int = None) -> dict:
+    """Parameters that change the built index (and so belong in the artifact key)."""
+    backend = backend or INDEX_BACKEND
+    dimension = dimension or int(get_sentence_model().get_sentence_embedding_dimension() or 0)
+    if backend == "ivf_flat":
+        return {"nlist": _resolve_ivf_nlist(num_vectors, IVF_NLIST)}
+    if backend == "hnsw":
+        return {"M": HNSW_M, "efConstruction": HNSW_EF_CONSTRUCTION}
+    if backend == "pq":
+        return {"M": _resolve_pq_m(dimension, PQ_M), "nbits": _resolve_pq_nbits(num_vectors, PQ_NBITS)}
+    if backend == "pca":
+        return {"dim": max(1, min(PCA_DIM, dimension, num_vectors))}
+    return {}
+
+def backend_is_compressed(backend: str) -> bool:
+    return backend in COMPRESSED_INDEX_BACKENDS
+
+def apply_search_params(index: faiss.Index, nprobe: int = None, ef_search: int = None) -> None:
+    """Sets query-time knobs (nprobe for IVF, efSearch for HNSW). No-op for other index types."""
+    target = index.global_index if isinstance(index, ModelPartitionedIndex) else index
+    params = faiss.ParameterSpace()
+    try:
+        if faiss.try_extract_index_ivf(target) is not None:
+            params.set_index_parameter(target, "nprobe", nprobe or IVF_NPROBE)
+    except Exception as e:
+        log.warning(f"VECTOR_SEARCH: Could not set nprobe on index: {e}")
+    hnsw_index = faiss.downcast_index(target)
+    if hasattr(hnsw_index, "hnsw"):
+        hnsw_index.hnsw.efSearch = ef_search or HNSW_EF_SEARCH
+
+def create_index_from_embeddings(embeddings: np.ndarray, backend: str = None, build_params: dict = None) -> faiss.Index:
+    """
+    Builds a FAISS index of the requested backend over `embeddings`, which must already have been
+    passed through prepare_embeddings_for_backend() for the same backend.
+    """
+    backend = backend or INDEX_BACKEND
+    num_vectors, dimension = embeddings.shape
+    build_params = build_params if build_params is not None else index_build_params(num_vectors, backend, dimension)
+    metric = faiss.METRIC_INNER_PRODUCT if backend_uses_cosine(backend) else faiss.METRIC_L2
+
+    if backend == "ivf_flat":
+        index = faiss.index_factory(dimension, f"IVF{build_params['nlist']},Flat", metric)
+        log.info(f"VECTOR_SEARCH: Training IVF index with {build_params['nlist']} centroids on {num_vectors} vectors.")
+        index.train(embeddings)
+    elif backend == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, build_params["M"], metric)
+        index.hnsw.efConstruction = build_params["efConstruction"]
+    elif backend == "sq8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, metric)
+        index.train(embeddings)
+    elif backend == "pq":
+        index = faiss.IndexPQ(dimension, build_params["M"], build_params["nbits"], metric)
+        log.info(f"VECTOR_SEARCH: Training PQ index (M={build_params['M']}, nbits={build_params['nbits']}) on {num_vectors} vectors.")
+        index.train(embeddings)
+    elif backend == "pca":
+        index = faiss.index_factory(dimension, f"PCA{build_params['dim']},Flat", metric)
+        log.info(f"VECTOR_SEARCH: Training PCA {dimension}->{build_params['dim']} on {num_vectors} vectors.")
+        index.train(embeddings)
+    else:
+        index = faiss.IndexFlat(dimension, metric) # Exact search; fine for moderate catalog sizes
+    index.add(embeddings)
+    apply_search_params(index)
+    return index
+
+def _create_exact_index(dimension: int, metric_type: int) -> faiss.Index:
+    return faiss.IndexFlat(dimension, metric_type)
+
+def exact_scores(embeddings: np.ndarray, rows: np.ndarray, query_embedding: np.ndarray, metric_type: int) -> np.ndarray:
+    """Exact FAISS-style scores (inner product or squared L2) of one prepared query against `embeddings[rows]`."""
+    candidate_vectors = np.asarray(embeddings[rows], dtype='float32')
+    if metric_type == faiss.METRIC_INNER_PRODUCT:
+        return candidate_vectors @ query_embedding
+    return ((candidate_vectors - query_embedding) ** 2).sum(axis=1)
+
+def exact_rerank(
+    embeddings: np.ndarray,
+    query_embeddings: np.ndarray,
+    candidate_rows: np.ndarray,
+    k: int,
+    metric_type: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Re-scores each query's candidate rows exactly against the float32 embeddings and keeps the top k.
+    Same output shape and conventions as faiss.Index.search (missing results are row -1).
+    """
+    num_queries = query_embeddings.shape[0]
+    higher_is_better = metric_type == faiss.METRIC_INNER_PRODUCT
+    out_scores = np.full((num_queries, k), -np.inf if higher_is_better else np.inf, dtype='float32')
+    out_rows = np.full((num_queries, k), -1, dtype='int64')
+    for q in range(num_queries):
+        rows = candidate_rows[q]
+        rows = np.unique(rows[rows >= 0])
+        if rows.size == 0:
+            continue
+        scores = exact_scores(embeddings, rows, query_embeddings[q], metric_type)
+        order = np.argsort(-scores if higher_is_better else scores, kind="stable")[:k]
+        out_scores[q, :order.size] = scores[order]
+        out_rows[q, :order.size] = rows[order]
+    return out_scores, out_rows
+
+def scores_to_l2_distances(scores: np.ndarray, metric_type: int) -> np.ndarray:
+    """
+    Converts raw FAISS scores into squared L2 distances so lower is always better.
+    For inner product over unit vectors, ||a - b||^2 = 2 - 2 * <a, b>.
+    """
+    if metric_type == faiss.METRIC_INNER_PRODUCT:
+        return 2.0 - 2.0 * scores
+    return scores
+
+def prepare_query_embeddings(query_embeddings: np.ndarray, index: faiss.Index) -> np.ndarray:
+    prepared = np.array(query_embeddings, dtype='float32', order='C', copy=True)
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        faiss.normalize_L2(prepared)
+    return prepared
+
+def create_faiss_index(data: list) -> tuple[faiss.Index | None, list | None]: 
+    """Creates a FAISS index for the 'issue' field in the (flattened) data."""
+    if not data:
+        log.error("VECTOR_SEARCH: Cannot create FAISS index from empty or invalid (flattened) data.")
+        return None, None
+    try:
+        embeddings_float32, text_to_original_data_idx_map = _encode_issue_texts(data)
+        if embeddings_float32 is None:
+            return None, None
+        index = create_index_from_embeddings(prepare_embeddings_for_backend(embeddings_float32))
+        log.info(f"VECTOR_SEARCH: FAISS '{INDEX_BACKEND}' index created successfully with {index.ntotal} vectors.")
         return index, text_to_original_data_idx_map
     except Exception as e:
         log.error(f"VECTOR_SEARCH: Error creating FAISS index: {e}", exc_info=True)
         return None, None
 
-def search_relevant_guides(
+def normalize_model_key(model_name: str | None) -> str:
+    """Normalized form used to compare TV model names (case and surrounding whitespace ignored)."""
+    return (model_name or "").strip().lower()
+
+class ModelPartitionedIndex:
+    """
+    The global FAISS index plus one exact sub-index per TV model (same metric as the global index).
+
+    Searches scoped to a model only scan that model's vectors, so their cost follows the number of
+    issues per model instead of the size of the whole catalog. `ntotal` and `search()` delegate to
+    the global index, so callers that treat this as a plain FAISS index keep working.
+
+    With a compressed global index no float sub-indexes are built (they would undo the savings):
+    partitions hold only their rows and are scored exactly against `embeddings`, and global
+    searches re-rank RERANK_FACTOR x k compressed candidates the same way.
+    """
+    def __init__(self, global_index: faiss.Index, embeddings: np.ndarray, data: list, text_to_original_data_idx_map: list):
+        self.global_index = global_index
+        self.embeddings = embeddings
+        self.compressed = backend_is_compressed(INDEX_BACKEND)
+        self.partitions: dict[str, tuple[faiss.Index, np.ndarray]] = {}
+        # Issue text of every FAISS row, so a later rebuild can reuse unchanged embeddings.
+        self.issue_texts = [
+            data[original_data_idx]["issue"].strip() if 0 <= original_data_idx < len(data) and isinstance(data[original_data_idx], dict) else ""
+            for original_data_idx in text_to_original_data_idx_map
+        ]
+
+        rows_by_model: dict[str, list] = {}
+        for faiss_row, original_data_idx in enumerate(text_to_original_data_idx_map):
+            if not (0 <= original_data_idx < len(data)) or not isinstance(data[original_data_idx], dict):
+                continue
+            model_key = normalize_model_key(data[original_data_idx].get("model"))
+            if model_key:
+                rows_by_model.setdefault(model_key, []).append(faiss_row)
+
+        for model_key, rows in rows_by_model.items():
+            rows_np = np.asarray(rows, dtype='int64')
+            sub_index = None
+            if not self.compressed:
+                sub_index = _create_exact_index(embeddings.shape[1], global_index.metric_type)
+                sub_index.add(np.ascontiguousarray(embeddings[rows_np], dtype='float32'))
+            self.partitions[model_key] = (sub_index, rows_np)
+        log.info(f"VECTOR_SEARCH: Built {len(self.partitions)} per-model partitions over {global_index.ntotal} vectors.")
+        self.lexical = build_issue_bm25_index(data, text_to_original_data_idx_map) if HYBRID_LEXICAL_ENABLED else None
+
+    @property
+    def ntotal(self) -> int:
+        return self.global_index.ntotal
+
+    @property
+    def d(self) -> int:
+        return self.global_index.d
+
+    @property
+    def metric_type(self) -> int:
+        return self.global_index.metric_type
+
+    def search(self, query_embeddings: np.ndarray, k: int):
+        if not self.compressed:
+            return self.global_index.search(query_embeddings, k)
+        candidate_k = min(k * RERANK_FACTOR, self.global_index.ntotal)
+        _, candidate_rows = self.global_index.search(query_embeddings, candidate_k)
+        return exact_rerank(self.embeddings, query_embeddings, candidate_rows, k, self.metric_type)
+
+    def reusable_embeddings(self) -> dict:
+        """Issue text -> embedding (as stored in this index) for every row."""
+        return {text: self.embeddings[row] for row, text in enumerate(self.issue_texts) if text}
+
+    def has_model(self, model_name: str) -> bool:
+        return normalize_model_key(model_name) in self.partitions
+
+    def search_model(self, model_name: str, query_embeddings: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray] | None:
+        """Searches one model's partition. Returns (distances, global FAISS rows) or None if the model has no partition."""
+        partition = self.partitions.get(normalize_model_key(model_name))
+        if partition is None:
+            return None
+        sub_index, rows_np = partition
+        effective_k = min(k, rows_np.size)
+        if effective_k <= 0:
+            return None
+        if sub_index is None:
+            # Per-model candidate sets are small: score all of them exactly.
+            candidate_rows = np.broadcast_to(rows_np, (query_embeddings.shape[0], rows_np.size))
+            return exact_rerank(self.embeddings, query_embeddings, candidate_rows, effective_k, self.metric_type)
+        distances, local_rows = sub_index.search(query_embeddings, effective_k)
+        global_rows = np.where(local_rows >= 0, rows_np[np.clip(local_rows, 0, None)], -1)
+        return distances, global_rows
+
+    def lexical_search_model(self, model_name: str, query_text: str, prepared_query_embedding: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        BM25 search restricted to one model's partition. Returns (squared L2 distances, FAISS rows) in
+        BM25 order, the distances being exact ones against `prepared_query_embedding` (shape (d,)).
+        """
+        partition = self.partitions.get(normalize_model_key(model_name))
+        if self.lexical is None or partition is None:
+            return None
+        rows_np, _ = self.lexical.search(query_text, k, candidate_doc_ids=partition[1])
+        if rows_np.size == 0:
+            return None
+        candidate_vectors = np.asarray(self.embeddings[rows_np], dtype='float32')
+        distances = ((candidate_vectors - prepared_query_embedding) ** 2).sum(axis=1)
+        return distances, rows_np
+
+def _reusable_embeddings_from(previous_index) -> dict | None:
+    if not isinstance(previous_index, ModelPartitionedIndex):
+        return None
+    try:
+        return previous_index.reusable_embeddings()
+    except Exception as e:
+        log.warning(f"VECTOR_SEARCH: Could not reuse embeddings from the previous index: {e}. Re-encoding everything.")
+        return None
+
+def create_partitioned_faiss_index(data: list, previous_index=None) -> tuple[ModelPartitionedIndex | None, list | None]:
+    """
+    Like create_faiss_index(), but returns a ModelPartitionedIndex. No on-disk artifact is involved.
+    Issues whose text is unchanged since `previous_index` keep their embedding instead of being re-encoded.
+    """
+    if not data:
+        log.error("VECTOR_SEARCH: Cannot create FAISS index from empty or invalid (flattened) data.")
+        return None, None
+    try:
+        embeddings, text_to_original_data_idx_map = _encode_issue_texts(data, _reusable_embeddings_from(previous_index))
+        if embeddings is None:
+            return None, None
+        embeddings = prepare_embeddings_for_backend(embeddings)
+        index = create_index_from_embeddings(embeddings)
+        log.info(f"VECTOR_SEARCH: FAISS '{INDEX_BACKEND}' index created successfully with {index.ntotal} vectors.")
+        return ModelPartitionedIndex(index, embeddings, data, text_to_original_data_idx_map), text_to_original_data_idx_map
+    except Exception as e:
+        log.error(f"VECTOR_SEARCH: Error creating FAISS index: {e}", exc_info=True)
+        return None, None
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def compute_index_artifact_key(data_file_path: str, num_vectors: int) -> dict:
+    """
+    Describes the inputs an index artifact was built from. Any change in the data file contents,
+    the embedding model or its execution backend, its output dimension or the index backend/build
+    parameters yields a different key (and so a rebuild).
+    """
+    encoder = get_sentence_model()
+    key_fields = {
+        "artifact_version": INDEX_ARTIFACT_VERSION,
+        "data_sha256": _file_sha256(data_file_path),
+        "model_name": MODEL_NAME,
+        "encoder": ENCODER_ID,
+        "dimension": int(encoder.get_sentence_embedding_dimension() or 0),
+        "index_backend": INDEX_BACKEND,
+        "index_build_params": index_build_params(num_vectors),
+    }
+    key_fields["key"] = hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode("utf-8")).hexdigest()
+    return key_fields
+
+def _artifact_dir_for_key(key_fields: dict) -> str:
+    return os.path.join(INDEX_CACHE_DIR, f"v{INDEX_ARTIFACT_VERSION}-{key_fields['key'][:24]}")
+
+def save_index_artifact(key_fields: dict, embeddings: np.ndarray, index: faiss.Index, text_to_original_data_idx_map: list) -> bool:
+    """Writes embeddings, index and map into a key-named directory. The directory appears atomically."""
+    final_dir = _artifact_dir_for_key(key_fields)
+    try:
+        os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=INDEX_CACHE_DIR)
+        np.save(os.path.join(tmp_dir, _ARTIFACT_EMBEDDINGS_FILE), np.ascontiguousarray(embeddings, dtype='float32'))
+        faiss.write_index(index, os.path.join(tmp_dir, _ARTIFACT_INDEX_FILE))
+        meta = dict(key_fields)
+        meta["ntotal"] = int(index.ntotal)
+        meta["text_to_original_data_idx_map"] = [int(i) for i in text_to_original_data_idx_map]
+        with open(os.path.join(tmp_dir, _ARTIFACT_META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        try:
+            os.replace(tmp_dir, final_dir)
+        except OSError:
+            # Another worker published the same artifact first; theirs is equivalent.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        log.info(f"VECTOR_SEARCH: Saved index artifact ({index.ntotal} vectors) to {final_dir}")
+        return True
+    except Exception as e:
+        log.error(f"VECTOR_SEARCH: Failed to save index artifact to {final_dir}: {e}", exc_info=True)
+        if 'tmp_dir' in locals():
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+def load_index_artifact(key_fields: dict) -> tuple[np.ndarray | None, faiss.Index | None, list | None]:
+    """Memory-maps a previously saved artifact for this key. Returns (None, None, None) on any mismatch."""
+    artifact_dir = _artifact_dir_for_key(key_fields)
+    meta_path = os.path.join(artifact_dir, _ARTIFACT_META_FILE)
+    if not os.path.exists(meta_path):
+        log.info(f"VECTOR_SEARCH: No index artifact found for key {key_fields['key'][:12]}.")
+        return None, None, None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if any(meta.get(field) != key_fields[field] for field in ("artifact_version", "data_sha256", "model_name", "encoder", "dimension", "index_backend", "index_build_params")):
+            log.warning(f"VECTOR_SEARCH: Index artifact in {artifact_dir} does not match current inputs. Ignoring it.")
+            return None, None, None
+
+        embeddings = np.load(os.path.join(artifact_dir, _ARTIFACT_EMBEDDINGS_FILE), mmap_mode="r")
+        index_path = os.path.join(artifact_dir, _ARTIFACT_INDEX_FILE)
+        try:
+            index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except Exception:
+            # Not every index type supports mmap'd reads; a plain read is still far cheaper than re-encoding.
+            index = faiss.read_index(index_path)
+        text_to_original_data_idx_map = meta.get("text_to_original_data_idx_map") or []
+        apply_search_params(index)
+
+        if index.ntotal != meta.get("ntotal") or embeddings.shape[0] != index.ntotal or \
+           len(text_to_original_data_idx_map) != index.ntotal or embeddings.shape[1] != key_fields["dimension"]:
+            log.warning(f"VECTOR_SEARCH: Index artifact in {artifact_dir} is inconsistent. Ignoring it.")
+            return None, None, None
+        log.info(f"VECTOR_SEARCH: Loaded index artifact ({index.ntotal} vectors) from {artifact_dir}")
+        return embeddings, index, text_to_original_data_idx_map
+    except Exception as e:
+        log.error(f"VECTOR_SEARCH: Failed to load index artifact from {artifact_dir}: {e}", exc_info=True)
+        return None, None, None
+
+def load_or_create_faiss_index(data: list, data_file_path: str, previous_index=None) -> tuple[faiss.Index | None, list | None]:
+    """
+    Returns the FAISS index and map for `data`, reusing the on-disk artifact when the data file,
+    embedding model and dimension are unchanged. Otherwise re-encodes and writes a new artifact;
+    when `previous_index` is given (a hot reload), only issues whose text changed are re-encoded.
+    """
+    if not data:
+        log.error("VECTOR_SEARCH: Cannot create FAISS index from empty or invalid (flattened) data.")
+        return None, None
+    if not INDEX_CACHE_ENABLED:
+        return create_partitioned_faiss_index(data, previous_index)
+
+    try:
+        key_fields = compute_index_artifact_key(data_file_path, len(_collect_issue_texts(data)[0]))
+    except Exception as e:
+        log.error(f"VECTOR_SEARCH: Could not compute index artifact key for {data_file_path}: {e}. Building without cache.", exc_info=True)
+        return create_partitioned_faiss_index(data, previous_index)
+
+    embeddings, index, text_to_original_data_idx_map = load_index_artifact(key_fields)
+    if index is not None:
+        return ModelPartitionedIndex(index, embeddings, data, text_to_original_data_idx_map), text_to_original_data_idx_map
+
+    try:
+        embeddings, text_to_original_data_idx_map = _encode_issue_texts(data, _reusable_embeddings_from(previous_index))
+        if embeddings is None:
+            return None, None
+        embeddings = prepare_embeddings_for_backend(embeddings)
+        index = create_index_from_embeddings(embeddings)
+        log.info(f"VECTOR_SEARCH: FAISS '{INDEX_BACKEND}' index created successfully with {index.ntotal} vectors.")
+    except Exception as e:
+        log.error(f"VECTOR_SEARCH: Error creating FAISS index: {e}", exc_info=True)
+        return None, None
+    if save_index_artifact(key_fields, embeddings, index, text_to_original_data_idx_map) and backend_is_compressed(INDEX_BACKEND):
+        # Swap the freshly built float32 copy for the memory-mapped one, so it is shared between workers.
+        mapped_embeddings, _, _ = load_index_artifact(key_fields)
+        if mapped_embeddings is not None:
+            embeddings = mapped_embeddings
+    return ModelPartitionedIndex(index, embeddings, data, text_to_original_data_idx_map), text_to_original_data_idx_map
+
+def _rank_candidates(
+    distances_row: np.ndarray,
+    faiss_rows: np.ndarray,
+    target_model_processed: str,
+    data: list,
+    text_to_original_data_idx_map: list,
+    sort_by_distance: bool = True,
+) -> list[tuple[dict, float]]:
+    """
+    Maps FAISS rows to flattened-data guides, keeping only those of the target model. Sorted by
+    distance (best first) unless sort_by_distance is False, in which case input order is kept.
+    """
+    ranked: list[tuple[dict, float]] = []
+    seen_data_indices = set()
+    for rank, (faiss_idx, score) in enumerate(zip(faiss_rows, distances_row), start=1):
+        faiss_idx = int(faiss_idx)
+        score = float(score) # L2 distance
+        if not (0 <= faiss_idx < len(text_to_original_data_idx_map)):
+            log.warning(f"VECTOR_SEARCH: Invalid faiss_idx {faiss_idx} from FAISS search (Rank {rank}). Skipping.")
+            continue
+
+        original_data_idx = text_to_original_data_idx_map[faiss_idx] # Map to index in flattened `data`
+        if not (0 <= original_data_idx < len(data)):
+            log.warning(f"VECTOR_SEARCH: Mapped original_data_idx {original_data_idx} (from faiss_idx {faiss_idx}) is out of bounds "
+                        f"for flattened data (len={len(data)}) (Rank {rank}). Skipping.")
+            continue
+        if original_data_idx in seen_data_indices:
+            continue
+
+        candidate_guide = data[original_data_idx] 
+        if not isinstance(candidate_guide, dict):
+            log.warning(f"VECTOR_SEARCH: Data item at original_data_idx {original_data_idx} is not a dictionary (Rank {rank}). Skipping.")
+            continue
+
+        candidate_model_original_case = candidate_guide.get("model", "")
+        log.debug(f"  - Candidate (Rank {rank}, FAISS Idx: {faiss_idx}, FlatData Idx: {original_data_idx}, Score: {score:.4f}): "
+                  f"Model='{candidate_model_original_case}', Issue='{candidate_guide.get('issue', 'N/A')[:70]}...'")
+        if normalize_model_key(candidate_model_original_case) != target_model_processed:
+            continue
+        seen_data_indices.add(original_data_idx)
+        ranked.append((candidate_guide, score))
+
+    if sort_by_distance:
+        ranked.sort(key=lambda pair: pair[1]) # Lower L2 distance is better
+    return ranked
+
+def _search_for_model(
+    index: faiss.Index,
+    target_model_processed: str,
+    query_embeddings: np.ndarray,
+    k_results: int,
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Runs one (batched) FAISS search for all query rows. Returns (squared L2 distances, FAISS rows),
+    one row per query, or None if nothing can be searched.
+
+    With a ModelPartitionedIndex only the target model's partition is searched. Partitions cover every
+    model in the data, so a model without one has no guides and None is returned. A plain FAISS index
+    is searched globally for the top-k_results (filtered by model later).
+    """
+    query_embeddings_np = prepare_query_embeddings(query_embeddings, index)
+    if isinstance(index, ModelPartitionedIndex):
+        partition_result = index.search_model(target_model_processed, query_embeddings_np, k_results)
+        if partition_result is None:
+            log.info(f"VECTOR_SEARCH: No guides indexed for model '{target_model_processed}'.")
+            return None
+        distances, faiss_rows = partition_result
+        log.debug(f"VECTOR_SEARCH: Partition results for '{target_model_processed}' - Distances: {distances[0]}, FAISS Indices: {faiss_rows[0]}")
+    else:
+        # Ensure k_results is not greater than the total number of items in the index
+        effective_k_semantic = min(k_results, index.ntotal)
+        if effective_k_semantic == 0:
+            log.warning(f"VECTOR_SEARCH: effective_k_semantic is 0 (k_results={k_results}, index.ntotal={index.ntotal}). Cannot search.")
+            return None
+        log.debug(f"VECTOR_SEARCH: Searching global FAISS index for top {effective_k_semantic} semantic matches.")
+        # D: L2 squared distances or inner products (per metric), I: indices in the FAISS index
+        distances, faiss_rows = index.search(query_embeddings_np, k=effective_k_semantic)
+        log.debug(f"VECTOR_SEARCH: Raw FAISS results - Distances: {distances[0]}, FAISS Indices: {faiss_rows[0]}")
+    return scores_to_l2_distances(distances, index.metric_type), faiss_rows
+
+def _lexical_ranked_lists(
+    index: faiss.Index,
+    target_model_processed: str,
+    query_texts: list,
+    query_embeddings: np.ndarray,
+    data: list,
+    text_to_original_data_idx_map: list,
+    k_results: int,
+) -> list:
+    """One BM25-ordered [(guide, squared L2 distance), ...] list per query text (empty without a lexical index)."""
+    if not isinstance(index, ModelPartitionedIndex) or index.lexical is None:
+        return []
+    prepared = prepare_query_embeddings(query_embeddings, index)
+    ranked_lists = []
+    for i, query_text in enumerate(query_texts):
+        lexical_result = index.lexical_search_model(target_model_processed, query_text, prepared[i], k_results)
+        if lexical_result is None:
+            continue
+        distances, rows_np = lexical_result
+        ranked_lists.append(_rank_candidates(distances, rows_np, target_model_processed, data, text_to_original_data_idx_map, sort_by_distance=False))
+    return ranked_lists
+
+def search_relevant_guides_ranked(
     query_text: str, 
     target_model: str, 
     data: list,  # This is the FLATTENED data list
     index: faiss.Index, 
     text_to_original_data_idx_map: list, 
-    k_results: int = 5 # Retrieve a few top semantic matches to filter by model
-) -> dict | None:
-    """
-    Searches for relevant guides from the FLATTENED data,
-    STRICTLY matching the target_model from the top k_results semantic matches.
-    Returns a single best guide dictionary (from flattened_data) or None.
-    """
+    k_results: int = 5
+) -> list[tuple[dict, float]]:
+    """Returns up to k_results (guide, squared L2 distance) pairs for target_model, best first."""
     if not all([index, data, text_to_original_data_idx_map, query_text, target_model]):
         log.error("VECTOR_SEARCH: Search cannot be performed - missing critical inputs (index, data, map, query, or target_model).")
-        return None
+        return []
     if index.ntotal == 0:
         log.warning("VECTOR_SEARCH: FAISS index is empty. Cannot perform search.")
-        return None
+        return []
     if not query_text.strip():
         log.warning("VECTOR_SEARCH: Empty query_text provided. Cannot perform search.")
-        return None
+        return []
     
     log.debug(f"VECTOR_SEARCH: Starting search. Query='{query_text}', TargetModel='{target_model}', k_to_retrieve_semantically={k_results}")
 
     try:
         log.debug(f"VECTOR_SEARCH: Encoding search query: '{query_text[:100]}'")
-        query_embedding = model.encode([query_text.strip()], convert_to_numpy=True)
+        query_embedding = encode_queries([query_text.strip()])
         if query_embedding is None or query_embedding.size == 0:
-             log.error("VECTOR_SEARCH: Failed to encode search query (resulted in empty embedding).")
-             return None
-        
-        query_embedding_np = query_embedding.astype('float32')
-        
-        # Ensure k_results is not greater than the total number of items in the index
-        effective_k_semantic = min(k_results, index.ntotal)
-        if effective_k_semantic == 0:
-            log.warning(f"VECTOR_SEARCH: effective_k_semantic is 0 (k_results={k_results}, index.ntotal={index.ntotal}). Cannot search.")
-            return None
-            
-        log.debug(f"VECTOR_SEARCH: Searching FAISS index for top {effective_k_semantic} semantic matches.")
-        # D: distances (L2 squared), I: indices in the FAISS index
-        distances, faiss_indices = index.search(query_embedding_np, k=effective_k_semantic)
-        
-        log.debug(f"VECTOR_SEARCH: Raw FAISS results - Distances: {distances[0]}, FAISS Indices: {faiss_indices[0]}")
-
-        best_match_for_model: dict | None = None
-        best_score_for_model = float('inf') # Lower L2 distance is better
-
-        target_model_processed = target_model.strip().lower() # Normalize target model once
-
-        log.debug(f"VECTOR_SEARCH: Evaluating top {effective_k_semantic} semantic candidates against target model '{target_model_processed}':")
-        
-        for i in range(effective_k_semantic):
-            faiss_idx = faiss_indices[0][i]
-            score = float(distances[0][i]) # L2 distance
-
-            if not (0 <= faiss_idx < len(text_to_original_data_idx_map)):
-                 log.warning(f"VECTOR_SEARCH: Invalid faiss_idx {faiss_idx} from FAISS search (Rank {i+1}). Skipping.")
-                 continue
-            
-            original_data_idx = text_to_original_data_idx_map[faiss_idx] # Map to index in flattened `data`
-            
-            if not (0 <= original_data_idx < len(data)):
-                 log.warning(f"VECTOR_SEARCH: Mapped original_data_idx {original_data_idx} (from faiss_idx {faiss_idx}) is out of bounds "
-                             f"for flattened data (len={len(data)}) (Rank {i+1}). Skipping.")
-                 continue
-
-            candidate_guide = data[original_data_idx] 
-            
-            if not isinstance(candidate_guide, dict):
-                log.warning(f"VECTOR_SEARCH: Data item at original_data_idx {original_data_idx} is not a dictionary (Rank {i+1}). Skipping.")
-                continue
-
-            candidate_model_original_case = candidate_guide.get("model", "")
-            candidate_model_processed = candidate_model_original_case.strip().lower()
-            candidate_issue = candidate_guide.get("issue","N/A")
-
-            log.debug(f"  - Candidate (Rank {i+1}, FAISS Idx: {faiss_idx}, FlatData Idx: {original_data_idx}, Score: {score:.4f}): "
-                      f"Model='{candidate_model_original_case}' (processed: '{candidate_model_processed}'), Issue='{candidate_issue[:70]}...'")
-
-            if candidate_model_processed == target_model_processed:
-                log.info(f"VECTOR_SEARCH:   >>> Candidate matches target model '{target_model_processed}'.")
-                # If we only want the absolute best semantic match for this model, we can take the first one.
-                # If multiple issues for the same model could match semantically, this first one is the most similar.
-                if score < best_score_for_model: # Keep track if we wanted to find the one with lowest score among matches
-                    best_score_for_model = score
-                    best_match_for_model = candidate_guide
-                    log.info(f"VECTOR_SEARCH:     This is currently the best match for model '{target_model_processed}' with score {score:.4f}.")
-                # For your use case (k_results=1 in handler), this loop will likely only process one if model matches.
-                # If k_results in handler is >1, this will find the first semantic match that also matches model.
-                # If you want the BEST SEMANTIC match out of ALL candidates for that model, this logic is fine.
-        
-        if best_match_for_model:
-             log.info(f"VECTOR_SEARCH: *** 최종 매치 발견! *** 최종 선택된 가이드: Model='{best_match_for_model.get('model')}', "
-                      f"Issue='{best_match_for_model.get('issue', 'N/A')}', Score: {best_score_for_model:.4f}")
-        else:
-             log.warning(f"VECTOR_SEARCH: No guide strictly matching target model '{target_model_processed}' found within the top "
-                         f"{effective_k_semantic} semantic matches for query '{query_text[:60]}...'.")
+             return []
+        target_model_processed = normalize_model_key(target_model) # Normalize target model once
 
-        return best_match_for_model
+        search_result = _search_for_model(index, target_model_processed, query_embedding, k_results)
+        if search_result is None:
+            return []
+        distances, faiss_rows = search_result
+        ranked = _rank_candidates(distances[0], faiss_rows[0], target_model_processed, data, text_to_original_data_idx_map)
+        lexical_lists = _lexical_ranked_lists(index, target_model_processed, [query_text.strip()], query_embedding,
+                                              data, text_to_original_data_idx_map, k_results)
+        if lexical_lists:
+            ranked = fuse_ranked_lists([ranked] + lexical_lists)
+        if not ranked:
+            log.warning(f"VECTOR_SEARCH: No guide strictly matching target model '{target_model_processed}' found within the top "
+                        f"{k_results} semantic matches for query '{query_text[:60]}...'.")
+        return ranked[:k_results]
 
     except faiss.FaissException as e_faiss: 
         log.error(f"VECTOR_SEARCH: FAISS Error during search for query '{query_text[:60]}...': {e_faiss}", exc_info=True)
-        return None
+        return []
     except Exception as e_generic:
         log.error(f"VECTOR_SEARCH: Unexpected error during search for query '{query_text[:60]}...': {e_generic}", exc_info=True)
-        return None
\ No newline at end of file
+        return []
+
+RRF_K = 60 # Standard reciprocal-rank-fusion damping constant
+
+def fuse_ranked_lists(ranked_lists: list, fusion: str = "rrf") -> list[tuple[dict, float]]:
+    """
+    Fuses several [(guide, squared L2 distance), ...] lists into one, best first.
+
+    "rrf" orders by reciprocal-rank fusion (sum of 1 / (RRF_K + rank)), which rewards guides that
+    several variants agree on; "max" orders by each guide's best (lowest) distance. Each returned
+    pair carries the guide's best distance across all variants.
+    """
+    fused: dict[int, dict] = {}
+    for ranked in ranked_lists:
+        for rank, (guide, distance) in enumerate(ranked, start=1):
+            entry = fused.setdefault(id(guide), {"guide": guide, "rrf": 0.0, "best_distance": float('inf')})
+            entry["rrf"] += 1.0 / (RRF_K + rank)
+            entry["best_distance"] = min(entry["best_distance"], distance)
+    if fusion == "max":
+        ordered = sorted(fused.values(), key=lambda e: e["best_distance"])
+    else:
+        ordered = sorted(fused.values(), key=lambda e: (-e["rrf"], e["best_distance"]))
+    return [(entry["guide"], entry["best_distance"]) for entry in ordered]
+
+def search_relevant_guides_multi(
+    query_texts: list,
+    target_model: str,
+    data: list,  # This is the FLATTENED data list
+    index: faiss.Index,
+    text_to_original_data_idx_map: list,
+    k_results: int = 5,
+    fusion: str = "rrf",
+) -> list[tuple[dict, float]]:
+    """
+    Searches with several phrasings of the same problem (e.g. the HyDE title and the translated
+    user text) and fuses the results. All variants are encoded in one batched encode call and
+    searched with one batched FAISS call. Returns up to k_results (guide, squared L2 distance)
+    pairs for target_model, best first.
+    """
+    unique_queries = []
+    for text in query_texts or []:
+        if isinstance(text, str) and text.strip() and text.strip() not in unique_queries:
+            unique_queries.append(text.strip())
+    if not all([index, data, text_to_original_data_idx_map, unique_queries, target_model]):
+        log.error("VECTOR_SEARCH: Multi-query search cannot be performed - missing critical inputs (index, data, map, queries, or target_model).")
+        return []
+    if index.ntotal == 0:
+        log.warning("VECTOR_SEARCH: FAISS index is empty. Cannot perform search.")
+        return []
+
+    log.debug(f"VECTOR_SEARCH: Starting multi-query search. Variants={unique_queries}, TargetModel='{target_model}', k={k_results}, fusion={fusion}")
+    try:
+        query_embeddings = encode_queries(unique_queries)
+        if query_embeddings is None or query_embeddings.size == 0:
+            return []
+        target_model_processed = normalize_model_key(target_model)
+
+        search_result = _search_for_model(index, target_model_processed, query_embeddings, k_results)
+        if search_result is None:
+            return []
+        distances, faiss_rows = search_result
+        ranked_lists = [
+            _rank_candidates(distances[i], faiss_rows[i], target_model_processed, data, text_to_original_data_idx_map)
+            for i in range(len(unique_queries))
+        ]
+        ranked_lists += _lexical_ranked_lists(index, target_model_processed, unique_queries, query_embeddings,
+                                              data, text_to_original_data_idx_map, k_results)
+        fused = fuse_ranked_lists(ranked_lists, fusion)
+        if not fused:
+            log.warning(f"VECTOR_SEARCH: No guide strictly matching target model '{target_model_processed}' found for any of "
+                        f"{len(unique_queries)} query variants.")
+        else:
+            log.info(f"VECTOR_SEARCH: Multi-query ({len(unique_queries)} variants, {fusion}) best guide: "
+                     f"Issue='{fused[0][0].get('issue', 'N/A')}', Score: {fused[0][1]:.4f}")
+        return fused[:k_results]
+
+    except faiss.FaissException as e_faiss:
+        log.error(f"VECTOR_SEARCH: FAISS Error during multi-query search for {unique_queries}: {e_faiss}", exc_info=True)
+        return []
+    except Exception as e_generic:
+        log.error(f"VECTOR_SEARCH: Unexpected error during multi-query search for {unique_queries}: {e_generic}", exc_info=True)
+        return []
+
+def search_relevant_guides(
+    query_text: str, 
+    target_model: str, 
+    data: list,  # This is the FLATTENED data list
+    index: faiss.Index, 
+    text_to_original_data_idx_map: list, 
+    k_results: int = 5 # Retrieve a few top semantic matches to filter by model
+) -> dict | None:
+    """
+    Searches for relevant guides from the FLATTENED data,
+    STRICTLY matching the target_model.
+    Returns a single best guide dictionary (from flattened_data) or None.
+    """
+    ranked = search_relevant_guides_ranked(query_text, target_model, data, index, text_to_original_data_idx_map, k_results)
+    if not ranked:
+        return None
+    best_match_for_model, best_score_for_model = ranked[0]
+    log.info(f"VECTOR_SEARCH: Final guide selected: Model='{best_match_for_model.get('model')}', "
+             f"Issue='{best_match_for_model.get('issue', 'N/A')}', Score: {best_score_for_model:.4f}")
+    return best_match_for_model
+
+async def search_relevant_guides_multi_async(
+    query_texts: list,
+    target_model: str,
+    data: list,
+    index: faiss.Index,
+    text_to_original_data_idx_map: list,
+    k_results: int = 5,
+    fusion: str = "rrf",
+) -> list[tuple[dict, float]]:
+    """search_relevant_guides_multi() on the bounded retrieval pool, so the event loop keeps serving LLM awaits."""
+    return await retrieval_executor.run(
+        search_relevant_guides_multi, query_texts, target_model, data, index, text_to_original_data_idx_map, k_results, fusion
+    )
+
+async def search_relevant_guides_async(
+    query_text: str,
+    target_model: str,
+    data: list,
+    index: faiss.Index,
+    text_to_original_data_idx_map: list,
+    k_results: int = 5,
+) -> dict | None:
+    """search_relevant_guides() on the bounded retrieval pool."""
+    return await retrieval_executor.run(
+        search_relevant_guides, query_text, target_model, data, index, text_to_original_data_idx_map, k_results
+    )
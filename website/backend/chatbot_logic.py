@@ -1,6 +1,7 @@
 
 # backend/chatbot_logic.py
 import json
+import logging
 import re
 import os
 import random
@@ -8,14 +9,112 @@ from pathlib import Path
 from sentence_transformers import SentenceTransformer, util
 from googletrans import Translator, LANGUAGES
 
+NLP_MODEL_NAME = 'paraphrase-MiniLM-L6-v2'
+# "torch" (default) or "onnx": ONNX Runtime with a dynamically int8-quantized export of the model.
+NLP_ENCODER_BACKEND = os.getenv("NLP_ENCODER_BACKEND", "torch").strip().lower()
+# Pre-quantized file in the model repo; pick the one matching the server CPU (avx2 runs on any recent x86).
+NLP_ONNX_FILE = os.getenv("NLP_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+NLP_ONNX_THREADS = int(os.getenv("NLP_ONNX_THREADS", str(min(4, os.cpu_count() or 1))))
+# The quantized model is only used if its embeddings stay this close (cosine) to the PyTorch ones on NLP_PARITY_SENTENCES.
+NLP_ONNX_PARITY_MIN_COSINE = float(os.getenv("NLP_ONNX_PARITY_MIN_COSINE", "0.98"))
+NLP_PARITY_SENTENCES = [
+    "TV not powering on",
+    "No picture but sound is working",
+    "Red standby light blinks and the TV does not start",
+    "Remote control not responding",
+    "Horizontal lines on the screen",
+    "La télé ne s'allume pas",
+    "Show me the main board",
+    "thank you, it works now",
+]
+# Parity results per (model, ONNX file), so the PyTorch model is only loaded for the first check or a fallback.
+NLP_ONNX_PARITY_FILE = os.getenv("NLP_ONNX_PARITY_FILE", str(Path(__file__).resolve().parent / "onnx_parity.json"))
+
+log = logging.getLogger(__name__)
+
 # --- NLPHelper Class ---
 class NLPHelper:
     def __init__(self):
+        self.model = None
+        if NLP_ENCODER_BACKEND == "onnx":
+            try:
+                self.model = self._load_checked_onnx_model()
+            except Exception as e:
+                log.error(f"NLP_HELPER: Could not load ONNX encoder '{NLP_ONNX_FILE}': {e}. Falling back to PyTorch.", exc_info=True)
+        if self.model is None:
+            try:
+                self.model = SentenceTransformer(NLP_MODEL_NAME)
+            except Exception as e:
+                # print(f"Error loading SentenceTransformer model: {e}")
+                raise
+
+    @classmethod
+    def _load_checked_onnx_model(cls):
+        """
+        The ONNX model if it passes the parity check, else None. The check (which needs the PyTorch model)
+        runs once per model/file and is recorded in NLP_ONNX_PARITY_FILE; later starts only read the record.
+        """
+        parity_key = f"{NLP_MODEL_NAME}|{NLP_ONNX_FILE}"
+        records = cls._read_parity_records()
+        min_cosine = records.get(parity_key, {}).get("min_cosine")
+        if min_cosine is not None and min_cosine < NLP_ONNX_PARITY_MIN_COSINE:
+            log.warning(f"NLP_HELPER: ONNX encoder '{NLP_ONNX_FILE}' failed its recorded parity check (min cosine {min_cosine:.4f} "
+                        f"< {NLP_ONNX_PARITY_MIN_COSINE}). Falling back to PyTorch.")
+            return None
+        onnx_model = cls._load_onnx_model()
+        if min_cosine is None:
+            torch_model = SentenceTransformer(NLP_MODEL_NAME)
+            min_cosine = cls._parity_min_cosine(torch_model, onnx_model)
+            records[parity_key] = {"min_cosine": min_cosine, "sentences": len(NLP_PARITY_SENTENCES)}
+            cls._write_parity_records(records)
+            if min_cosine < NLP_ONNX_PARITY_MIN_COSINE:
+                log.warning(f"NLP_HELPER: ONNX encoder '{NLP_ONNX_FILE}' failed the parity check (min cosine {min_cosine:.4f} "
+                            f"< {NLP_ONNX_PARITY_MIN_COSINE}). Falling back to PyTorch.")
+                return None
+        log.info(f"NLP_HELPER: Using ONNX encoder '{NLP_ONNX_FILE}' (parity min cosine {min_cosine:.4f}).")
+        return onnx_model
+
+    @staticmethod
+    def _read_parity_records() -> dict:
         try:
-            self.model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-        except Exception as e:
-            # print(f"Error loading SentenceTransformer model: {e}")
-            raise
+            with open(NLP_ONNX_PARITY_FILE, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            log.warning(f"NLP_HELPER: Ignoring unreadable parity record file '{NLP_ONNX_PARITY_FILE}': {e}")
+            return {}
+
+    @staticmethod
+    def _write_parity_records(records: dict) -> None:
+        try:
+            tmp_path = f"{NLP_ONNX_PARITY_FILE}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(records, file, indent=2)
+            os.replace(tmp_path, NLP_ONNX_PARITY_FILE)
+        except OSError as e:
+            log.warning(f"NLP_HELPER: Could not record the ONNX parity result in '{NLP_ONNX_PARITY_FILE}': {e}")
+
+    @staticmethod
+    def _parity_min_cosine(torch_model, onnx_model) -> float:
+        """Smallest cosine similarity between the two backends' embeddings of the probe sentences."""
+        torch_embeddings = torch_model.encode(NLP_PARITY_SENTENCES, convert_to_numpy=True, normalize_embeddings=True)
+        onnx_embeddings = onnx_model.encode(NLP_PARITY_SENTENCES, convert_to_numpy=True, normalize_embeddings=True)
+        return float((torch_embeddings * onnx_embeddings).sum(axis=1).min())
+
+    @staticmethod
+    def _load_onnx_model():
+        import onnxruntime as ort
+
+        session_options = ort.SessionOptions()
+        session_options.intra_op_num_threads = max(1, NLP_ONNX_THREADS)
+        session_options.inter_op_num_threads = 1
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return SentenceTransformer(
+            NLP_MODEL_NAME,
+            backend="onnx",
+            model_kwargs={"file_name": NLP_ONNX_FILE, "provider": "CPUExecutionProvider", "session_options": session_options},
+        )
 
     def find_best_match(self, description, candidates):
         if not description or not candidates: